@@ -6,16 +6,40 @@
 # Main App File
 # ###################
 
-from dash import ALL, Dash, dcc, html, Input, Output, State
-from domain.compound import Compound
-from domain.reaction import Reaction
-import plotly.graph_objs as go
+import argparse
+from collections.abc import Callable, Iterable
+import hashlib
+import json
+import os
+from typing import TYPE_CHECKING
+from dash import ALL, ctx, Dash, dcc, html, Input, Output, State
 from domain.compounds import compounds
-from numpy.typing import NDArray
+from services import compute_api, hot_reload, metrics
+from services.jobs import create_job_manager, job_metrics_outbox
+from services.warmup import start_background_warmup
 
-DEFAULT_TEMP: float = 298.15
+if TYPE_CHECKING: # numpy, scipy, plotly and the solvers are imported in the callbacks that use them, so the server binds quickly
+    import plotly.graph_objs as go
+    from numpy.typing import NDArray
+    from domain.compound import Compound
+    from domain.reaction import Reaction
 
-app = Dash(suppress_callback_exceptions=True) # Necessary for dynamic layout components
+DEFAULT_TEMP: float = 298.15
+DEFAULT_REACTANTS: list[str] = ["Methane", "Oxygen"]
+WARMUP_REACTANT_SETS: list[frozenset[str]] = [frozenset(DEFAULT_REACTANTS)]
+HOST = "127.0.0.1"
+PORT = 8050
+REACTION_RESOLUTION = 100 # Points of the reaction graph
+PROGRESS_INTERVAL = 250 # Milliseconds between polls for a running reaction job's partial graph
+
+app = Dash(
+    title="Adiabatic Flame Temperature",
+    suppress_callback_exceptions=True, # Necessary for dynamic layout components
+    background_callback_manager=create_job_manager(), # Reaction graphs are computed in job processes, off the server threads
+)
+metrics.install(app.server, job_metrics_outbox) # GET /metrics, only when FLAME_METRICS is set; includes what background jobs recorded
+compute_api.install(app.server) # POST /api/flame-temperature
+hot_reload.install(app.server) # Picks up csv_editor merges without a restart, in every process serving requests
 
 
 """
@@ -34,25 +58,35 @@ def create_layout() -> html.Div:
                 children = [
                     graph_panel("compound-graph"),
                     graph_panel("reaction-graph"),
+                    graph_panel("comparison-graph"),
                 ]
             ),
+            dcc.Store(id="comparison-series", data=[]), # Kept outside the mode controls so series survive switching modes
+            dcc.Store(id="comparison-results", data={}),
         ]
     )
 
 
+app.layout = create_layout # Built per page load; set here so serving app.server (e.g. from a WSGI server) needs nothing else
+
+
 """
 Switches which graph is visible based on the selected mode.
 """
 @app.callback(
         Output("compound-graph", "style"),
         Output("reaction-graph", "style"),
+        Output("comparison-graph", "style"),
         Input("mode-dropdown", "value"),
 )
-def toggle_graph_visibility(mode: str) -> tuple[dict[str, str], dict[str, str]]:
+@metrics.traced("toggle_graph_visibility")
+def toggle_graph_visibility(mode: str) -> tuple[dict[str, str], dict[str, str], dict[str, str]]:
     if mode == "compound":
-        return {"display": "block"}, {"display": "none"}
+        return {"display": "block"}, {"display": "none"}, {"display": "none"}
+    elif mode == "comparison":
+        return {"display": "none"}, {"display": "none"}, {"display": "block"}
     else:
-        return {"display": "none"}, {"display": "block"}
+        return {"display": "none"}, {"display": "block"}, {"display": "none"}
 
 
 """
@@ -61,12 +95,16 @@ Determines which mode-specific controls to display based on the selected mode.
 @app.callback(
     Output("mode-controls-div", "children"),
     Input("mode-dropdown", "value"),
+    State("comparison-series", "data"),
 )
-def update_mode_controls(mode: str):
+@metrics.traced("update_mode_controls")
+def update_mode_controls(mode: str, series: list[dict]):
     if mode == "compound":
         return compound_controls()
     elif mode == "reaction":
         return reaction_controls()
+    elif mode == "comparison":
+        return comparison_controls(series)
     else:
         return html.Div("Invalid mode")
 
@@ -105,6 +143,7 @@ def mode_dropdown() -> html.Div:
                 options=[
                     {"label": "Compound Data", "value": "compound"},
                     {"label": "Reaction Flame Temperature", "value": "reaction"},
+                    {"label": "Compare Reactions", "value": "comparison"},
                 ],
                 value="reaction",
             ),
@@ -121,11 +160,13 @@ Pulls data from the compound controls and generates the compound graph.
     State("compound-selection", "value"),
     State("compound-variable", "value"),
 )
-def on_compound_graph_update(_, compound_id: str, compound_var: str) -> go.Figure:
+@metrics.traced("on_compound_graph_update")
+def on_compound_graph_update(_, compound_id: str, compound_var: str) -> "go.Figure":
 
-    compound: Compound = compounds[compound_id]
-    y_vals: NDArray = compound.get_data(compound_var)
-    x_vals: NDArray = compound.get_temperatures()
+    import plotly.graph_objs as go
+    compound: "Compound" = compounds[compound_id]
+    y_vals: "NDArray" = compound.get_data(compound_var)
+    x_vals: "NDArray" = compound.get_temperatures()
     match compound_var:
         case "Cf":
             y_label = "Specific Heat Capacity (Cf) [J/(mol·K)]"
@@ -177,7 +218,7 @@ def compound_controls() -> html.Div:
             html.Label("Select Compound"),
             dcc.Dropdown(
                 id="compound-selection",
-                options=[{"label": c.name, "value": c.id} for c in compounds.values()],
+                options=[{"label": c.name, "value": c.id} for c in compounds.specs()],
                 value="Methane",
             ),
             html.Label("Select Variable"),
@@ -208,8 +249,9 @@ Populates the controlled reactant dropdown based on selected reactants.
     Output("reaction-variable", "options"),
     Input("reactant-selection", "value"),
 )
+@metrics.traced("on_reactant_selection")
 def on_reactant_selection(r_ids: list[str]) -> list[dict[str, str]]:
-    return [{"label": compounds[r].name, "value": compounds[r].id} for r in r_ids]
+    return [{"label": compounds.spec(r).name, "value": compounds.spec(r).id} for r in r_ids]
 
 
 """
@@ -220,6 +262,7 @@ Dynamically generates ratio input boxes for each selected reactant except the co
     Input("reactant-selection", "value"),
     Input("reaction-variable", "value"),
 )
+@metrics.traced("update_reactant_ratio_boxes")
 def update_reactant_ratio_boxes(
     all_reactants: list[str], controlled: str
 ) -> list[html.Div]:
@@ -231,7 +274,7 @@ def update_reactant_ratio_boxes(
         boxes.append(
             html.Div(
                 [
-                    html.Label(f"{compounds[r].name} Ratio: "),
+                    html.Label(f"{compounds.spec(r).name} Ratio: "),
                     dcc.Input(
                         id={"type": "ratio-input", "compound": r},
                         type="number",
@@ -252,6 +295,7 @@ Dynamically generates temperature input boxes for each selected reactant.
     Output("reactant-temperature-boxes", "children"),
     Input("reactant-selection", "value"),
 )
+@metrics.traced("update_reactant_temperature_boxes")
 def update_reactant_temperature_boxes(all_reactants: list[str]) -> list[html.Div]:
 
     boxes = []
@@ -259,7 +303,7 @@ def update_reactant_temperature_boxes(all_reactants: list[str]) -> list[html.Div
         boxes.append(
             html.Div(
                 [
-                    html.Label(f"{compounds[r].name} Temperature (K): "),
+                    html.Label(f"{compounds.spec(r).name} Temperature (K): "),
                     dcc.Input(
                         id={"type": "temp-input", "compound": r},
                         type="number",
@@ -273,8 +317,23 @@ def update_reactant_temperature_boxes(all_reactants: list[str]) -> list[html.Div
     return boxes
 
 
+"""
+Collects the ratio and temperature inputs into one store, so a change to any of them can cancel a running reaction job.
+"""
+@app.callback(
+    Output("reaction-inputs", "data"),
+    Input({"type": "ratio-input", "compound": ALL}, "value"),
+    Input({"type": "temp-input", "compound": ALL}, "value"),
+)
+@metrics.traced("on_reaction_inputs_change")
+def on_reaction_inputs_change(ratios: list[float | int], temps: list[float | int]) -> list[list[float | int]]:
+
+    return [ratios, temps]
+
+
 """
 On update-reaction-graph button pressed, pulls data from the reaction controls and generates the reaction graph.
+Runs as a background job; the graph fills in coarse to fine as points are solved. Changing any reaction input or pressing Cancel stops it.
 """
 @app.callback(
     Output("reaction-graph", "figure"),
@@ -285,13 +344,114 @@ On update-reaction-graph button pressed, pulls data from the reaction controls a
     State({"type": "ratio-input", "compound": ALL}, "value"),
     State({"type": "temp-input", "compound": ALL}, "id"),
     State({"type": "temp-input", "compound": ALL}, "value"),
+    background=True,
+    interval=PROGRESS_INTERVAL,
+    progress=[
+        Output("reaction-graph", "figure", allow_duplicate=True),
+        Output("reaction-progress", "value"),
+        Output("reaction-progress", "max"),
+    ],
+    running=[
+        (Output("reaction-progress", "style"), {"width": "100%"}, {"display": "none"}),
+        (Output("reaction-cancel", "disabled"), False, True),
+    ],
+    cancel=[
+        Input("reaction-cancel", "n_clicks"),
+        Input("reactant-selection", "value"),
+        Input("reaction-variable", "value"),
+        Input("reaction-inputs", "data"),
+    ],
+    prevent_initial_call=True,
 )
+@metrics.job(job_metrics_outbox)
+@metrics.traced("on_reaction_graph_update")
 def on_reaction_graph_update(
+    set_progress, _, r_ids: list[str], controlled: str, ratio_ids: list[dict[str, str]], ratios: list[float | int], temp_ids: list[dict[str, str]], temps: list[float | int]
+):
+    from services.result_cache import stream_flame_table
+
+    flame_table = lambda reaction, variable, concentrations: stream_flame_table(reaction, variable, concentrations, REACTION_RESOLUTION)
+    on_update = lambda figure, solved: set_progress((figure, min(solved, REACTION_RESOLUTION), REACTION_RESOLUTION))
+    return build_reaction_figure(r_ids, controlled, ratio_ids, ratios, temp_ids, temps, flame_table, on_update)
+
+
+"""
+On reaction-download button pressed, streams the flame table of the current reaction settings to a CSV file and sends it to the browser.
+"""
+@app.callback(
+    Output("reaction-download-file", "data"),
+    Input("reaction-download", "n_clicks"),
+    State("reactant-selection", "value"),
+    State("reaction-variable", "value"),
+    State({"type": "ratio-input", "compound": ALL}, "id"),
+    State({"type": "ratio-input", "compound": ALL}, "value"),
+    State({"type": "temp-input", "compound": ALL}, "id"),
+    State({"type": "temp-input", "compound": ALL}, "value"),
+    prevent_initial_call=True,
+)
+@metrics.traced("on_reaction_table_download")
+def on_reaction_table_download(
     _, r_ids: list[str], controlled: str, ratio_ids: list[dict[str, str]], ratios: list[float | int], temp_ids: list[dict[str, str]], temps: list[float | int]
 ):
+    import tempfile
+    from domain.reaction import Reaction
+    from services.export import export_flame_table
+
+    if not ratios:
+        return None
+    concentrations, temperatures = reaction_settings(r_ids, controlled, ratio_ids, ratios, temp_ids, temps)
+    reaction = Reaction(set(r_ids), temperatures)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"{controlled}_flame_table.csv")
+        export_flame_table(path, reaction, controlled, concentrations, REACTION_RESOLUTION)
+        return dcc.send_file(path)
+
+
+"""
+Body of on_reaction_graph_update as a plain function, so it can be run (e.g. benchmarked) without Dash.
+flame_table yields the table of a Reaction in chunks (partial tables, 2 x points); the callback streams them through the disk cache.
+on_update is called after each chunk with the graph of the points solved so far and their count
+"""
+def build_reaction_figure(
+    r_ids: list[str],
+    controlled: str,
+    ratio_ids: list[dict[str, str]],
+    ratios: list[float | int],
+    temp_ids: list[dict[str, str]],
+    temps: list[float | int],
+    flame_table: Callable[["Reaction", str, dict[str, float]], Iterable["NDArray"]],
+    on_update: Callable[["go.Figure", int], None] | None = None,
+) -> "go.Figure":
+
+    import plotly.graph_objs as go
+    from domain.reaction import Reaction
+
     if not ratios:
         return go.Figure()
 
+    concentrations, temperatures = reaction_settings(r_ids, controlled, ratio_ids, ratios, temp_ids, temps)
+
+    with metrics.stage("reaction"):
+        reaction = Reaction(set(r_ids), temperatures)
+    with metrics.stage("flame_table"):
+        chunks = []
+        for chunk in flame_table(reaction, controlled, concentrations):
+            chunks.append(chunk)
+            if on_update is not None:
+                partial = merge_chunks(chunks)
+                on_update(reaction_figure(reaction, controlled, partial), partial.shape[1])
+        table = merge_chunks(chunks)
+    with metrics.stage("figure"):
+        return reaction_figure(reaction, controlled, table)
+
+
+"""
+Maps the reaction controls' values to the base concentrations (controlled reactant at 1) and entry temperatures of each reactant
+"""
+def reaction_settings(
+    r_ids: list[str], controlled: str, ratio_ids: list[dict[str, str]], ratios: list[float | int], temp_ids: list[dict[str, str]], temps: list[float | int]
+) -> tuple[dict[str, float], dict[str, float]]:
+
     ratio_map = { # Necessary to map input ids to values as they get jumbled otherwise
         rid["compound"]: ratio
         for rid, ratio in zip(ratio_ids, ratios)
@@ -310,11 +470,27 @@ def on_reaction_graph_update(
             concentrations[r] = ratio_map[r]
 
     temperatures: dict[str, float] = {r: temp_map[r] for r in r_ids}
+    return concentrations, temperatures
 
-    reaction = Reaction(set(r_ids), temperatures)
-    x, t = reaction.calc_flame_table(
-        controlled, concentrations
-    )
+
+"""
+Joins partial flame tables into one table sorted by concentration
+"""
+def merge_chunks(chunks: list["NDArray"]) -> "NDArray":
+
+    import numpy as np
+    table = np.concatenate(chunks, axis=1)
+    return table[:, np.argsort(table[0], kind="stable")]
+
+
+"""
+Graph of a flame table (2 x points, sorted by concentration)
+"""
+def reaction_figure(reaction: "Reaction", controlled: str, table: "NDArray") -> "go.Figure":
+
+    import plotly.graph_objs as go
+
+    x, t = table
     y_label = "Flame Temperature (K)"
     figure = go.Figure()
     figure.add_trace(
@@ -324,13 +500,156 @@ def on_reaction_graph_update(
     )
     figure.update_yaxes(range = [reaction.min_temp, reaction.max_temp])
     figure.update_layout(
-        title=f"Flame Temperature vs {compounds[controlled].name} Concentration",
-        xaxis_title=f"{compounds[controlled].name} Concentration (mol fraction)",
+        title=f"Flame Temperature vs {compounds.spec(controlled).name} Concentration",
+        xaxis_title=f"{compounds.spec(controlled).name} Concentration (mol fraction)",
         yaxis_title=y_label,
     )
     return figure
 
 
+"""
+Adds the current reaction settings as a new comparison series, replaces the selected series with them, or removes the selected series.
+"""
+@app.callback(
+    Output("comparison-series", "data"),
+    Output("comparison-selection", "options"),
+    Output("comparison-selection", "value"),
+    Input("comparison-add", "n_clicks"),
+    Input("comparison-replace", "n_clicks"),
+    Input("comparison-remove", "n_clicks"),
+    State("comparison-series", "data"),
+    State("comparison-selection", "value"),
+    State("reactant-selection", "value"),
+    State("reaction-variable", "value"),
+    State({"type": "ratio-input", "compound": ALL}, "id"),
+    State({"type": "ratio-input", "compound": ALL}, "value"),
+    State({"type": "temp-input", "compound": ALL}, "id"),
+    State({"type": "temp-input", "compound": ALL}, "value"),
+    prevent_initial_call=True,
+)
+@metrics.traced("on_comparison_series_edit")
+def on_comparison_series_edit(
+    _add, _replace, _remove, series: list[dict], selected: int | None,
+    r_ids: list[str], controlled: str, ratio_ids: list[dict[str, str]], ratios: list[float | int], temp_ids: list[dict[str, str]], temps: list[float | int],
+):
+    series = list(series)
+    if ctx.triggered_id == "comparison-remove":
+        if selected is not None and selected < len(series):
+            series.pop(selected)
+        selected = None
+    elif r_ids and controlled in r_ids:
+        concentrations, temperatures = reaction_settings(r_ids, controlled, ratio_ids, ratios, temp_ids, temps)
+        new_series = {"reactants": sorted(r_ids), "variable": controlled, "ratios": concentrations, "temperatures": temperatures}
+        if ctx.triggered_id == "comparison-replace" and selected is not None and selected < len(series):
+            series[selected] = new_series
+        else:
+            series.append(new_series)
+            selected = len(series) - 1
+    return series, series_options(series), selected
+
+
+"""
+Computes the comparison graph. Only series not already in the results store are solved, all in one batch;
+series sharing a reactant set share one reaction setup (see calc_flame_tables).
+"""
+@app.callback(
+    Output("comparison-graph", "figure"),
+    Output("comparison-results", "data"),
+    Input("comparison-series", "data"),
+    State("comparison-results", "data"),
+    background=True,
+    prevent_initial_call=True,
+)
+@metrics.job(job_metrics_outbox)
+@metrics.traced("on_comparison_graph_update")
+def on_comparison_graph_update(series: list[dict], results: dict[str, list[list[float]]]):
+
+    return build_comparison_figure(series, results)
+
+
+"""
+Body of on_comparison_graph_update as a plain function. results maps series_key to each series' flame table;
+returns the figure and the results of the current series
+"""
+def build_comparison_figure(series: list[dict], results: dict[str, list[list[float]]]) -> tuple["go.Figure", dict[str, list[list[float]]]]:
+
+    import numpy as np
+    import plotly.graph_objs as go
+    from domain.reaction import calc_flame_tables, FlameSeries, Reaction
+
+    with metrics.stage("reaction"):
+        reactions = [Reaction(set(s["reactants"]), s["temperatures"]) for s in series]
+    keys = [series_key(s, reaction.data_hashes) for s, reaction in zip(series, reactions)]
+    results = {key: table for key, table in results.items() if key in keys} # Drops removed series and those whose data was reloaded
+    missing = {key: (s, reaction) for key, s, reaction in zip(keys, series, reactions) if key not in results} # Also merges duplicates
+    if missing:
+        batch = [FlameSeries(reaction, s["variable"], s["ratios"]) for s, reaction in missing.values()]
+        with metrics.stage("flame_table"):
+            tables = calc_flame_tables(batch, REACTION_RESOLUTION)
+        results.update({key: table.tolist() for key, table in zip(missing, tables)})
+
+    with metrics.stage("figure"):
+        figure = go.Figure()
+        for label, key in zip(series_labels(series), keys):
+            x, t = np.array(results[key], dtype=float) # Stored nan values come back as None
+            figure.add_trace(go.Scatter(x=x, y=t, mode="lines+markers", name=label))
+        figure.update_layout(
+            title="Flame Temperature Comparison",
+            xaxis_title="Controlled Reactant Concentration (mol fraction)",
+            yaxis_title="Flame Temperature (K)",
+        )
+    return figure, results
+
+
+"""
+Content address of a comparison series; equal settings on equal species data (Reaction.data_hashes) give equal keys
+"""
+def series_key(series: dict, data_hashes: dict[str, str]) -> str:
+
+    return hashlib.sha256(json.dumps({"series": series, "data": data_hashes}, sort_keys=True).encode()).hexdigest()
+
+
+"""
+Short description of each comparison series: controlled reactant, ratios and entry temperatures
+"""
+def series_labels(series: list[dict]) -> list[str]:
+
+    labels = []
+    for i, s in enumerate(series):
+        names = {r: compounds.spec(r).name for r in s["reactants"]}
+        others = [r for r in s["reactants"] if r != s["variable"]]
+        ratios = ":".join(f"{s['ratios'][r]:g}" for r in others)
+        temps = ", ".join(f"{names[r]} {s['temperatures'][r]:g} K" for r in s["reactants"])
+        labels.append(f"{i + 1}. {names[s['variable']]} in {'/'.join(names[r] for r in others)} {ratios} ({temps})")
+    return labels
+
+
+def series_options(series: list[dict]) -> list[dict[str, str | int]]:
+
+    return [{"label": label, "value": i} for i, label in enumerate(series_labels(series))]
+
+
+"""
+Cache statistics for the metrics endpoint, read at scrape time from the counters the caches already keep
+"""
+def cache_metrics():
+
+    from domain.reaction_template import template_cache
+    from services.result_cache import flame_table_cache
+
+    template_info = template_cache.info()
+    for cache, hits, misses in (
+        ("reaction_template", template_info.hits, template_info.misses),
+        ("flame_table", flame_table_cache.hits, flame_table_cache.misses),
+    ):
+        yield "cache_hits_total", "counter", "Cache hits, by cache", {"cache": cache}, hits
+        yield "cache_misses_total", "counter", "Cache misses, by cache", {"cache": cache}, misses
+
+
+if metrics.ENABLED:
+    metrics.registry.add_collector(cache_metrics)
+
+
 """
 Creates the reaction controls panel.
 """
@@ -339,25 +658,71 @@ def reaction_controls() -> html.Div:
     return html.Div(
         id="reaction-controls",
         children=[
-            html.Label("Select Reactants"),
-            dcc.Dropdown(
-                id="reactant-selection",
-                options=[{"label": c.name, "value": c.id} for c in compounds.values()],
-                multi=True,
-                value=["Methane", "Oxygen"],
-            ),
-            html.Label("Select Controlled Reactant"),
-            dcc.Dropdown(id="reaction-variable", value="Methane"),
-            html.Label("Ratios of Other Reactants"),
-            html.Div(id="reactant-ratio-boxes"),
-            html.Div(id="reactant-temperature-boxes"),
+            *reaction_inputs(),
             html.Hr(),
-            html.Button(id="reaction-update-graph", children=["Update Graph"])
+            html.Button(id="reaction-update-graph", children=["Update Graph"]),
+            html.Button(id="reaction-cancel", children=["Cancel"], disabled=True),
+            html.Progress(id="reaction-progress", value="0", max=str(REACTION_RESOLUTION), style={"display": "none"}),
+            html.Button(id="reaction-download", children=["Download Table"]),
+            dcc.Download(id="reaction-download-file"),
         ],
     )
 
 
+"""
+Creates the comparison controls panel: the reaction inputs, which define a series, and the list of series.
+"""
+def comparison_controls(series: list[dict]) -> html.Div:
+
+    return html.Div(
+        id="comparison-controls",
+        children=[
+            *reaction_inputs(),
+            html.Hr(),
+            html.Button(id="comparison-add", children=["Add Series"]),
+            html.Button(id="comparison-replace", children=["Replace Selected"]),
+            html.Button(id="comparison-remove", children=["Remove Selected"]),
+            html.Label("Series"),
+            dcc.RadioItems(id="comparison-selection", options=series_options(series), value=None),
+        ],
+    )
+
+
+"""
+Creates the reactant, ratio and temperature inputs shared by the reaction and comparison controls.
+"""
+def reaction_inputs() -> list:
+
+    return [
+        html.Label("Select Reactants"),
+        dcc.Dropdown(
+            id="reactant-selection",
+            options=[{"label": c.name, "value": c.id} for c in compounds.specs()],
+            multi=True,
+            value=DEFAULT_REACTANTS,
+        ),
+        html.Label("Select Controlled Reactant"),
+        dcc.Dropdown(id="reaction-variable", value="Methane"),
+        html.Label("Ratios of Other Reactants"),
+        html.Div(id="reactant-ratio-boxes"),
+        html.Div(id="reactant-temperature-boxes"),
+        dcc.Store(id="reaction-inputs"),
+    ]
+
+
 if __name__ == "__main__":
-    app.title = "Adiabatic Flame Temperature"
-    app.layout = create_layout()
-    app.run(debug=True)
+    parser = argparse.ArgumentParser(description="Adiabatic flame temperature web app")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Report import and data loading time per module in a fresh interpreter, then exit",
+    )
+    parser.add_argument("--no-reload", action="store_true", help="Serve without restarting when the code changes")
+    args = parser.parse_args()
+    if args.profile_startup:
+        from services.startup_profiler import profile_startup
+        print(profile_startup())
+    else:
+        if args.no_reload or os.environ.get("WERKZEUG_RUN_MAIN") == "true": # Not in the reloader's file-watcher parent, which serves nothing
+            start_background_warmup(HOST, PORT, WARMUP_REACTANT_SETS)
+        app.run(debug=True, use_reloader=not args.no_reload, host=HOST, port=PORT)
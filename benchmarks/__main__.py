@@ -0,0 +1,80 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Benchmark Command File
+# ###################
+
+import argparse
+import os
+import sys
+from benchmarks.runner import (
+    DEFAULT_REPEAT,
+    DEFAULT_THRESHOLD,
+    find_regressions,
+    format_seconds,
+    load_baseline,
+    machine_info,
+    run_benchmarks,
+    save_baseline,
+)
+from benchmarks.workloads import WORKLOADS
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+"""
+Runs the benchmark suite and compares it against the stored baseline. Exits with status 1 if any workload regressed
+"""
+def main(argv: list[str] | None = None) -> int:
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks of the data loading and flame temperature paths")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON baseline to compare against or save to")
+    parser.add_argument("--save", action="store_true", help="Save the results as the new baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Fail when a workload is this many times slower than its baseline (default %(default)s)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed batches per workload (default %(default)s)")
+    parser.add_argument("--only", nargs="+", metavar="NAME", choices=list(WORKLOADS), help="Run only these workloads")
+    parser.add_argument("--list", action="store_true", help="List the workloads and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(WORKLOADS))
+        return 0
+    workloads = {name: WORKLOADS[name] for name in args.only} if args.only else WORKLOADS
+
+    print(f"Running {len(workloads)} workloads (best of {args.repeat} batches per workload)")
+    results = run_benchmarks(workloads, args.repeat)
+
+    if args.save or not os.path.exists(args.baseline):
+        if not args.save:
+            print(f"No baseline at {args.baseline}; saving these results as the baseline.")
+        if args.only and os.path.exists(args.baseline): # Keep the other workloads' baselines
+            baseline, _ = load_baseline(args.baseline)
+            results = {**baseline, **results}
+        save_baseline(args.baseline, results)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    baseline, environment = load_baseline(args.baseline)
+    if environment and environment != machine_info():
+        print(f"Warning: the baseline was measured in a different environment ({environment}); timings may not be comparable.")
+    print(f"\nCompared with {args.baseline} (threshold {args.threshold:.2f}x)")
+    for name, timing in results.items():
+        if name in baseline:
+            print(f"  {name:<36} {format_seconds(baseline[name].best):>12} -> {format_seconds(timing.best):>12}  {timing.best / baseline[name].best:6.2f}x")
+        else:
+            print(f"  {name:<36} {'(no baseline)':>12} -> {format_seconds(timing.best):>12}")
+
+    regressions = find_regressions(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} workload(s) regressed:")
+        for regression in regressions:
+            print(f"  {regression.name}: {regression.ratio:.2f}x slower than baseline")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
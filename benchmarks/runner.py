@@ -0,0 +1,129 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Benchmark Runner File
+# ###################
+
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import statistics
+import timeit
+from benchmarks.workloads import Workload
+
+DEFAULT_REPEAT = 7
+MIN_BATCH_TIME = 0.05 # Seconds each timed batch of calls runs for at least
+DEFAULT_THRESHOLD = 1.25 # A workload regresses when it gets this many times slower than its baseline
+
+
+@dataclass
+class Timing:
+    best: float # Seconds per call, fastest batch; the compared figure, as it is least affected by other load
+    median: float # Seconds per call, median batch
+    number: int # Calls per batch
+
+
+@dataclass
+class Regression:
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+"""
+Times one workload: sets it up, picks a batch size that runs for at least MIN_BATCH_TIME, then times repeat batches
+"""
+def time_workload(workload: Workload, repeat: int = DEFAULT_REPEAT) -> Timing:
+
+    timer = timeit.Timer(workload())
+    number = 1
+    while timer.timeit(number) < MIN_BATCH_TIME and number < 1_000_000:
+        number *= 10 if number < 100 else 2
+    batches = [t / number for t in timer.repeat(repeat, number)]
+    return Timing(best=min(batches), median=statistics.median(batches), number=number)
+
+
+"""
+Times every named workload, in order
+"""
+def run_benchmarks(workloads: dict[str, Workload], repeat: int = DEFAULT_REPEAT, progress=print) -> dict[str, Timing]:
+
+    results = {}
+    for name, workload in workloads.items():
+        results[name] = time_workload(workload, repeat)
+        if progress is not None:
+            progress(f"  {name:<36} {format_seconds(results[name].best):>12}  ({results[name].number} calls/batch)")
+    return results
+
+
+"""
+Workloads whose best time exceeds threshold times their baseline's. Workloads missing from the baseline are skipped
+"""
+def find_regressions(results: dict[str, Timing], baseline: dict[str, Timing], threshold: float = DEFAULT_THRESHOLD) -> list[Regression]:
+
+    return [
+        Regression(name, baseline[name].best, timing.best)
+        for name, timing in results.items()
+        if name in baseline and timing.best > threshold * baseline[name].best
+    ]
+
+
+def machine_info() -> dict[str, str]:
+
+    import numpy
+    import scipy
+    return {
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "scipy": scipy.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+        "cpus": str(os.cpu_count()),
+    }
+
+
+def save_baseline(path: str, results: dict[str, Timing]) -> None:
+
+    """
+    Writes results to a JSON baseline with the machine and library versions it was measured on. Replaces the file atomically.
+    """
+
+    document = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": machine_info(),
+        "results": {name: asdict(timing) for name, timing in results.items()},
+    }
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as file:
+        json.dump(document, file, indent=2)
+        file.write("\n")
+    os.replace(temp_path, path)
+
+
+def load_baseline(path: str) -> tuple[dict[str, Timing], dict[str, str]]:
+
+    """
+    Returns the timings and environment of a JSON baseline.
+    """
+
+    with open(path) as file:
+        document = json.load(file)
+    results = {name: Timing(**timing) for name, timing in document["results"].items()}
+    return results, document.get("environment", {})
+
+
+def format_seconds(seconds: float) -> str:
+
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
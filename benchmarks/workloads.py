@@ -0,0 +1,166 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Benchmark Workloads File
+# ###################
+
+from collections.abc import Callable
+import numpy as np
+
+# Fixed inputs, so every run times exactly the same work
+REACTANTS = {"Methane", "Oxygen", "Nitrogen"}
+TEMPERATURES = {"Methane": 298.15, "Oxygen": 500.0, "Nitrogen": 500.0}
+VARIABLE = "Methane"
+RATIOS = {"Methane": 1, "Oxygen": 21, "Nitrogen": 79}
+CONCENTRATIONS = {"Methane": 0.09, "Oxygen": 0.21 * 0.91, "Nitrogen": 0.79 * 0.91}
+PROPERTY_TEMPERATURES = np.linspace(300.0, 5000.0, 1000)
+COMPOUND = "Methane"
+
+Workload = Callable[[], Callable[[], object]] # Does any setup and returns the call to time
+
+
+def compound_loader_load() -> Callable[[], object]:
+
+    from services.comp_loader import CompoundLoader, load_table
+    load_table() # The parse is timed separately by parse_data_file
+    loader = CompoundLoader()
+    return lambda: loader.load(COMPOUND)
+
+
+def parse_data_file() -> Callable[[], object]:
+
+    from services.comp_loader import parse_data_file
+    return parse_data_file
+
+
+def binary_store_load() -> Callable[[], object]:
+
+    from services.binary_store import BinaryCompoundLoader
+    loader = BinaryCompoundLoader()
+    loader.load(COMPOUND)
+    return lambda: loader.load(COMPOUND)
+
+
+def compound_construction() -> Callable[[], object]:
+
+    """
+    Construction plus the first property call, which builds that property's interpolant.
+    """
+
+    from domain.compound import Compound
+    from domain.compounds import compounds, load_compound_data
+    spec = compounds.spec(COMPOUND)
+    data = load_compound_data(COMPOUND)
+
+    def construct() -> object:
+        compound = Compound(name=spec.name, formula=spec.formula, id=spec.id, data=data)
+        return compound.SH(1500.0)
+    return construct
+
+
+def scalar_property() -> Callable[[], object]:
+
+    from domain.compounds import compounds
+    compound = compounds[COMPOUND]
+    compound.SH(1500.0)
+    return lambda: compound.SH(1500.0)
+
+
+def array_property() -> Callable[[], object]:
+
+    from domain.compounds import compounds
+    compound = compounds[COMPOUND]
+    compound.SH(PROPERTY_TEMPERATURES)
+    return lambda: compound.SH(PROPERTY_TEMPERATURES)
+
+
+def evaluate_properties() -> Callable[[], object]:
+
+    from domain.compounds import compounds
+    compound = compounds[COMPOUND]
+    compound.evaluate(PROPERTY_TEMPERATURES)
+    return lambda: compound.evaluate(PROPERTY_TEMPERATURES)
+
+
+def reaction_init() -> Callable[[], object]:
+
+    from domain.reaction import Reaction
+    Reaction(REACTANTS, TEMPERATURES)
+    return lambda: Reaction(REACTANTS, TEMPERATURES)
+
+
+def reaction_init_uncached() -> Callable[[], object]:
+
+    """
+    Reaction construction including its template (products, balancing, kernel), as for a reactant set seen for the first time.
+    """
+
+    from domain.reaction import Reaction
+    from domain.reaction_template import template_cache
+
+    def construct() -> object:
+        template_cache.clear()
+        return Reaction(REACTANTS, TEMPERATURES)
+    return construct
+
+
+def calc_flame_temp() -> Callable[[], object]:
+
+    from domain.reaction import Reaction
+    reaction = Reaction(REACTANTS, TEMPERATURES)
+    return lambda: reaction.calc_flame_temp(CONCENTRATIONS)
+
+
+def calc_flame_temp_iterative() -> Callable[[], object]:
+
+    from domain.reaction import Reaction
+    reaction = Reaction(REACTANTS, TEMPERATURES)
+    return lambda: reaction.calc_flame_temp(CONCENTRATIONS, "iterative")
+
+
+def calc_flame_table(resolution: int, solver: str = "exact", dissociation: bool = False) -> Workload:
+
+    def setup() -> Callable[[], object]:
+        from domain.reaction import Reaction
+        reaction = Reaction(REACTANTS, TEMPERATURES, dissociation)
+        return lambda: reaction.calc_flame_table(VARIABLE, RATIOS, resolution, solver)
+    return setup
+
+
+def reaction_graph_callback() -> Callable[[], object]:
+
+    """
+    The body of app.on_reaction_graph_update without the disk cache: Reaction construction, the flame table and the figure.
+    """
+
+    from app import build_reaction_figure
+    reactants = sorted(REACTANTS)
+    ratio_ids = [{"type": "ratio-input", "compound": r} for r in reactants if r != VARIABLE]
+    ratios = [RATIOS[r["compound"]] for r in ratio_ids]
+    temp_ids = [{"type": "temp-input", "compound": r} for r in reactants]
+    temps = [TEMPERATURES[r] for r in reactants]
+    compute = lambda reaction, variable, concentrations: [reaction.calc_flame_table(variable, concentrations)] # One chunk, as from the cache
+    return lambda: build_reaction_figure(reactants, VARIABLE, ratio_ids, ratios, temp_ids, temps, compute)
+
+
+WORKLOADS: dict[str, Workload] = {
+    "parse_data_file": parse_data_file,
+    "compound_loader_load": compound_loader_load,
+    "binary_store_load": binary_store_load,
+    "compound_construction": compound_construction,
+    "scalar_property": scalar_property,
+    "array_property_1000": array_property,
+    "evaluate_properties_1000": evaluate_properties,
+    "reaction_init": reaction_init,
+    "reaction_init_uncached": reaction_init_uncached,
+    "calc_flame_temp": calc_flame_temp,
+    "calc_flame_temp_iterative": calc_flame_temp_iterative,
+    "calc_flame_table_100": calc_flame_table(100),
+    "calc_flame_table_1000": calc_flame_table(1000),
+    "calc_flame_table_10000": calc_flame_table(10000),
+    "calc_flame_table_1000_iterative": calc_flame_table(1000, "iterative"),
+    "calc_flame_table_100_dissociation": calc_flame_table(100, dissociation=True),
+    "reaction_graph_callback": reaction_graph_callback,
+}
@@ -6,19 +6,22 @@
 # Configuration File
 # ###################
 
+from domain.compounds import compounds
+
 INERTS = {"Argon", "Nitrogen"}
 
-def products_from_reactants(reactants: set[str], dissociation: bool = False) -> tuple[set[str], set[str]]:  # Placeholder function for potential reaction product generation
+"""
+Returns the complete combustion products and the inert reactants, looked up from the element composition of the active reactants
+(see domain/element_index.py); cached per reactant set.
+With dissociation, the products also include every registered compound made only of the active reactants' elements,
+as any of them can be present at equilibrium
+"""
+def products_from_reactants(reactants: set[str], dissociation: bool = False) -> tuple[set[str], set[str]]:
 
     active_reactants = reactants - INERTS
     inert_reactants = reactants & INERTS
-    if (active_reactants == {"Methane", "Oxygen"}) and not dissociation:
-        products = {"Carbon_Dioxide", "Water"}
-    elif (active_reactants == {"Hydrogen", "Oxygen"}) and not dissociation:
-        products = {"Water"}
-    else:
-        raise NotImplementedError(
-            f"Reaction product generation not implemented for given reactants.\n"
-            f"{reactants}"
-        )
-    return products, inert_reactants
\ No newline at end of file
+    index = compounds.element_index()
+    products = index.complete_products(active_reactants)
+    if dissociation:
+        products |= index.compounds_within(active_reactants) - reactants
+    return products, inert_reactants
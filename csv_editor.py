@@ -9,6 +9,7 @@
 import pandas as pd
 from pathlib import Path
 import numpy as np
+from services.segment_store import create_segment_store, segment_dir, SegmentStore
 
 MASTER_FILE = "thermochemical_data.csv"
 REQUIRED_HEADER = ["Compound", "T", "Cf", "S", "(G-H)/T", "SH", "Hf", "G", "logKf"]
@@ -78,14 +79,10 @@ def merge_csv():
         print("File validation failed.")
         return
     
-    master = Path(MASTER_FILE)
-    if master.exists():
-        master_df = pd.read_csv(master)
-    else:
-        master_df = pd.DataFrame(columns=REQUIRED_HEADER) # Creates DataFrame with header to become master file later in process
+    store = get_segment_store()
 
     new_compounds = set(new_df["Compound"])
-    conflicts = new_compounds.intersection(set(master_df["Compound"]))
+    conflicts = new_compounds.intersection(store.compounds() if store.exists() else [])
     if conflicts:
         print(f"The following compounds already exist in the master file:")
         for c in conflicts:
@@ -94,9 +91,7 @@ def merge_csv():
         if confirm != "y":
             print("Merge cancelled.")
             return
-        master_df = master_df[~master_df["Compound"].isin(conflicts)]
-    merged_df = pd.concat([master_df, new_df], ignore_index=True)
-    merged_df.to_csv(master, index=False)
+    store.commit({id: compound_df for id, compound_df in new_df.groupby("Compound", sort=False)}) # Writes only these compounds' segments
     print("Merge completed successfully.")
 
     delete = input(f"Delete {csv_file.name}? (y/n): ")
@@ -107,12 +102,19 @@ def merge_csv():
 def extract_csv():
 
     compound_name = input("Enter the compound to extract data for: ")
+    store = SegmentStore(segment_dir(MASTER_FILE))
     master = Path(MASTER_FILE)
-    if not master.exists():
+    if store.exists():
+        try:
+            compound_df = store.read(compound_name) # Reads that compound's segment only
+        except KeyError:
+            compound_df = pd.DataFrame()
+    elif master.exists():
+        df = pd.read_csv(master)
+        compound_df = df[df["Compound"] == compound_name]
+    else:
         print("Master file does not exist.")
         return
-    df = pd.read_csv(master)
-    compound_df = df[df["Compound"] == compound_name]
     if compound_df.empty:
         print("No data found for that compound.")
         return
@@ -120,14 +122,34 @@ def extract_csv():
     compound_df.to_csv(output_file, index=False)
     print(f"Saved to {output_file}")
 
+def compact_csv():
+
+    store = SegmentStore(segment_dir(MASTER_FILE))
+    if not store.exists():
+        print("No segments to compact; the master file is already the data.")
+        return
+    compound_count = len(store.compounds())
+    rows = store.compact(MASTER_FILE) # Also retires the segments; the master file is the data again
+    print(f"Rebuilt {MASTER_FILE} from {compound_count} compound segments ({rows} rows). It is the data again; the next merge splits it anew.")
+
+def get_segment_store() -> SegmentStore:
+
+    store = SegmentStore(segment_dir(MASTER_FILE))
+    if not store.exists() and Path(MASTER_FILE).exists(): # First merge; split the master file into per-compound segments once
+        print(f"Splitting {MASTER_FILE} into per-compound segments in {store.directory}")
+        store = create_segment_store(MASTER_FILE, store.directory)
+    return store
+
 def main():
 
     while True:
-        choice = input("Select an option:\n1. Merge CSV\n2. Extract CSV\nQ. Quit\n> ")
+        choice = input("Select an option:\n1. Merge CSV\n2. Extract CSV\n3. Compact segments into master CSV\nQ. Quit\n> ")
         if choice == "1":
             merge_csv()
         elif choice == "2":
             extract_csv()
+        elif choice == "3":
+            compact_csv()
         elif choice.lower() == "q":
             break
         else:
@@ -6,129 +6,175 @@
 # Compound Class File
 # ###################
 
+from dataclasses import fields
+import hashlib
 import numpy as np
 from numpy.typing import NDArray
 from domain.compound_data import CompoundData
 from scipy.interpolate import BSpline, make_interp_spline
+from threading import Lock
 
 STANDARD_REF_TEMP = 298.15
+PROPERTIES = ["Cf", "S", "DS", "SH", "Hf", "Gf", "logKf"]
+DEFAULT_SPLINE_ORDER = 1 # Piecewise linear; lets Reaction invert mixture sensible heat exactly
+
+
+"""
+sha256 of a compound's data, over every column in field order; changes exactly when its rows do, wherever they were loaded from
+"""
+def content_hash(data: CompoundData) -> str:
+
+    digest = hashlib.sha256()
+    for field in fields(data):
+        digest.update(np.ascontiguousarray(getattr(data, field.name), dtype=np.float64).tobytes())
+    return digest.hexdigest()
 
 
 class Compound:
 
-    def __init__(self, name: str, formula: str, id: str, data: CompoundData):
+    def __init__(self, name: str, formula: str, id: str, data: CompoundData, spline_order: int = DEFAULT_SPLINE_ORDER):
         self.name: str = name
         self.formula: str = formula
         self.id: str = id
+        self.spline_order: int = spline_order
         self._data: CompoundData = data
 
-        self._Cf_function = make_interp_spline(
-            self._data.temperatures,
-            self._data.Cf_list,
-            k=1,
-        )
+        self._functions: dict[str, BSpline] = {} # Interpolants are built on first use, see _function
+        self._functions_lock = Lock()
+        self._finite_data: dict[str, NDArray] = {}
+        self._segments: tuple[NDArray, NDArray] | None = None
+        self._stdHf: float | None = None
+        self._content_hash: str | None = None
 
-        self._S_function = make_interp_spline(
-            self._data.temperatures,
-            self._data.S_list,
-            k=1,
-        )
 
-        self._DS_function = self._make_finite_function(self._data.DS_list)
+    @property
+    def content_hash(self) -> str:
+
+        """
+        sha256 of the compound's data (see content_hash), computed once.
+        """
 
-        self._SH_function = make_interp_spline(
-            self._data.temperatures,
-            self._data.SH_list,
-            k=1,
-        )
+        if self._content_hash is None:
+            self._content_hash = content_hash(self._data)
+        return self._content_hash
 
-        self._Hf_function = make_interp_spline(
-            self._data.temperatures,
-            self._data.Hf_list,
-            k=1,
-        )
 
-        self._Gf_function = make_interp_spline(
-            self._data.temperatures,
-            self._data.Gf_list,
-            k=1,
-        )
+    @property
+    def stdHf(self) -> float:
 
-        self._logKf_function = self._make_finite_function(self._data.logKf_list)
+        """
+        Standard heat of formation (kJ/mol) at the standard reference temperature, 298.15 K.
+        """
 
-        self.stdHf = self._Hf_function(STANDARD_REF_TEMP)
+        if self._stdHf is None:
+            self._stdHf = float(self._function("Hf")(STANDARD_REF_TEMP))
+        return self._stdHf
 
 
-    def Cf(self, temperature: float) -> float:
+    def Cf(self, temperature: float | NDArray) -> float | NDArray:
 
         """
         Returns the heat capacity (kJ/mol-K) of the compound at a given temperature (K).
+        Given an array of temperatures, returns an array of heat capacities.
         """
 
-        value = float(self._Cf_function(temperature))
-        return value
-    
+        return self._call("Cf", temperature)
 
-    def S(self, temperature: float) -> float:
+
+    def S(self, temperature: float | NDArray) -> float | NDArray:
 
         """
         Returns the entropy (kJ/mol-K) of the compound at a given temperature (K).
+        Given an array of temperatures, returns an array of entropies.
         """
 
-        value = float(self._S_function(temperature))
-        return value
-    
+        return self._call("S", temperature)
+
 
-    def DS(self, temperature: float) -> float:
+    def DS(self, temperature: float | NDArray) -> float | NDArray:
 
         """
         Returns the change in entropy (kJ/mol-K) of the compound at a given temperature (K).
+        Given an array of temperatures, returns an array of changes in entropy.
         """
 
-        value = float(self._DS_function(temperature))
-        return value
+        return self._call("DS", temperature)
 
 
-    def SH(self, temperature: float) -> float:
+    def SH(self, temperature: float | NDArray) -> float | NDArray:
 
         """
         Returns the sensible heat (kJ/mol) of the compound at a given temperature (K).
+        Given an array of temperatures, returns an array of sensible heats.
         """
 
-        value = float(self._SH_function(temperature))
-        return value
+        return self._call("SH", temperature)
 
 
-    def Hf(self, temperature: float) -> float:
+    def Hf(self, temperature: float | NDArray) -> float | NDArray:
 
         """
         Returns the heat of formation (kJ/mol) of the compound at a given temperature (K).
+        Given an array of temperatures, returns an array of heats of formation.
         """
 
-        value = float(self._Hf_function(temperature))
-        return value
+        return self._call("Hf", temperature)
 
 
-    def Gf(self, temperature: float) -> float:
+    def Gf(self, temperature: float | NDArray) -> float | NDArray:
 
         """
         Returns the Gibbs free energy of formation (kJ/mol) of the compound at a given temperature (K).
+        Given an array of temperatures, returns an array of Gibbs free energies of formation.
         """
 
-        value = float(self._Gf_function(temperature))
-        return value
+        return self._call("Gf", temperature)
 
 
-    def logKf(self, temperature: float) -> float:
+    def logKf(self, temperature: float | NDArray) -> float | NDArray:
 
         """
         Returns the logKf of the compound at a given temperature (K).
+        Given an array of temperatures, returns an array of logKf values.
+        """
+
+        return self._call("logKf", temperature)
+
+
+    def evaluate(self, temperatures: float | NDArray, props: list[str] = PROPERTIES) -> NDArray:
+
+        """
+        Returns several properties at once as a 2D array (props x temperatures), or 1D (props,) for a single temperature.
+        For piecewise linear interpolants the data interval of each temperature is found once and shared by every property.
+        Labels: "Cf", "S", "DS", "Hf", "SH", "Gf", "logKf"
         """
 
-        value = self._logKf_function(temperature)
+        if not self.is_piecewise_linear():
+            return np.array([self._function(label)(temperatures) for label in props])
+        data_temps = self._data.temperatures
+        segment = np.clip(np.searchsorted(data_temps, temperatures), 1, len(data_temps) - 1) - 1
+        intercepts, slopes = self._segment_table()
+        rows = [PROPERTIES.index(label) for label in props]
+        return np.take(intercepts[rows], segment, axis=-1) + np.take(slopes[rows], segment, axis=-1) * temperatures
+
+
+    def _call(self, label: str, temperature: float | NDArray) -> float | NDArray:
+
+        value = self._function(label)(temperature)
+        if np.ndim(value) == 0:
+            return float(value)
         return value
 
 
+    def is_piecewise_linear(self) -> bool:
+
+        """
+        Returns whether the property interpolants are linear between data temperatures.
+        """
+
+        return self.spline_order == 1
+
+
     def get_temperatures(self) -> NDArray:
 
         """
@@ -163,18 +209,57 @@ class Compound:
             case _:
                 raise ValueError(f"Data label '{label}' not recognized.")
 
-    def _make_finite_function(self, list: NDArray) -> BSpline:
+    def _function(self, label: str) -> BSpline:
 
         """
-        Separate function maker method as DS and logKf tables include np.inf values.
+        Returns the interpolant for the given label, building it on first call. Safe to call from multiple threads.
+        Labels: "Cf", "S", "DS", "Hf", "SH", "Gf", "logKf"
         """
 
-        finite_list: NDArray = self._get_finite_list(list)
-        return make_interp_spline(
-            self._data.temperatures,
-            finite_list,
-            k=1,
-        )
+        function = self._functions.get(label)
+        if function is None:
+            with self._functions_lock:
+                function = self._functions.get(label)
+                if function is None:
+                    function = make_interp_spline(
+                        self._data.temperatures,
+                        self._interpolation_values(label),
+                        k=self.spline_order,
+                    )
+                    self._functions[label] = function
+        return function
+
+
+    def _interpolation_values(self, label: str) -> NDArray:
+
+        """
+        Returns the data the interpolant for a label passes through. Separate from get_data as DS and logKf tables include np.inf values.
+        """
+
+        values = self._finite_data.get(label)
+        if values is None:
+            data = self.get_data(label)
+            values = self._get_finite_list(data) if label in ("DS", "logKf") else data
+            self._finite_data[label] = values
+        return values
+
+
+    def _segment_table(self) -> tuple[NDArray, NDArray]:
+
+        """
+        Returns the intercept and slope of every property on every data interval (PROPERTIES x intervals), building it on first call.
+        """
+
+        if self._segments is None:
+            with self._functions_lock:
+                if self._segments is None:
+                    values = np.array([self._interpolation_values(label) for label in PROPERTIES], dtype=np.float64)
+                    data_temps = self._data.temperatures
+                    slopes = np.diff(values, axis=1) / np.diff(data_temps)
+                    intercepts = values[:, :-1] - slopes * data_temps[:-1]
+                    self._segments = (intercepts, slopes)
+        return self._segments
+
 
     def _get_finite_list(self, list: NDArray) -> NDArray:
 
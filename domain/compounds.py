@@ -6,64 +6,246 @@
 # Compound Dictionary File
 # ###################
 
-from services.comp_loader import CompoundLoader
-from domain.compound_data import CompoundData
-from domain.compound import Compound
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from threading import Lock
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING: # Imported on first use instead; they pull in numpy and scipy, which the registry itself does not need
+    from domain.compound import Compound
+    from domain.compound_data import CompoundData
+    from domain.element_index import ElementIndex
 
-def load_compound_data(compound_id: str) -> CompoundData:
-    # replace CompoundLoader with other types of loaders as needed
-    loader: CompoundLoader = CompoundLoader()
+
+def load_compound_data(compound_id: str) -> "CompoundData":
+    from services.binary_store import BinaryCompoundLoader # Deferred until data is first needed
+    # replace BinaryCompoundLoader with other types of loaders (e.g. CompoundLoader for the CSV) as needed
+    loader: BinaryCompoundLoader = BinaryCompoundLoader()
     return loader.load(compound_id)  # eg "Carbon_Dioxide"
 
 
-compounds: dict[str, Compound] = {}
+"""
+What is known about a compound before its data is loaded
+"""
+@dataclass(frozen=True)
+class CompoundSpec:
+    id: str
+    name: str
+    formula: str
+
+
+class CompoundRegistry(Mapping[str, "Compound"]):
+
+    def __init__(self, loader: Callable[[str], "CompoundData"] = load_compound_data):
+        """
+        Read-only mapping of Compound.id to Compound that loads a compound's data the first time it is accessed.
+        Names and formulas are available through spec() without loading anything. Safe under threaded request handling.
+
+        @param loader : Callable[[str], CompoundData] - Loads the data of a compound given its id.
+        """
+
+        self._loader = loader
+        self._specs: dict[str, CompoundSpec] = {}
+        self._compounds: dict[str, "Compound"] = {} # Replaced under _swap_lock, never modified in place, so snapshots can share it
+        self._load_locks: dict[str, Lock] = {}
+        self._swap_lock = Lock() # Held only to replace _compounds; taken after any per-compound load lock
+        self._element_index: "ElementIndex | None" = None
+        self.generation: int = 0 # Incremented by every reload
+
+
+    def register(self, id: str, name: str, formula: str) -> None:
+
+        """
+        Adds a compound to the registry without loading its data.
+        """
+
+        self._specs[id] = CompoundSpec(id=id, name=name, formula=formula)
+        self._load_locks[id] = Lock()
+        self._element_index = None # Rebuilt with the new compound on next use
+
+
+    def element_index(self) -> "ElementIndex":
+
+        """
+        Returns the element composition index of every registered compound, built from the formulas on first use.
+        """
+
+        index = self._element_index
+        if index is None:
+            from domain.element_index import ElementIndex
+            index = ElementIndex(self.specs(), lambda id: self[id].stdHf)
+            self._element_index = index
+        return index
+
+
+    def spec(self, id: str) -> CompoundSpec:
+
+        return self._specs[id]
+
+
+    def specs(self) -> list[CompoundSpec]:
+
+        return list(self._specs.values())
+
+
+    def is_loaded(self, id: str) -> bool:
+
+        return id in self._compounds
+
+
+    def __getitem__(self, id: str) -> "Compound":
+
+        compound = self._compounds.get(id)
+        if compound is None:
+            from domain.compound import Compound
+            spec = self._specs[id] # KeyError for unregistered compounds, like a dict
+            with self._load_locks[id]: # Per compound, so loading one does not block another
+                compound = self._compounds.get(id)
+                if compound is None:
+                    compound = Compound(
+                        name=spec.name,
+                        formula=spec.formula,
+                        id=spec.id,
+                        data=self._loader(spec.id),
+                    )
+                    with self._swap_lock: # A copy with the new compound, so a concurrent reload cannot drop it
+                        self._compounds = self._compounds | {id: compound}
+        return compound
+
+
+    def reload(self, data: Mapping[str, "CompoundData"]) -> None:
+
+        """
+        Replaces the data of the given compounds, e.g. after the data file changed; every other compound is untouched.
+        New Compound objects are swapped in, so Reactions and snapshots holding the old ones keep using the old data.
+        """
+
+        from domain.compound import Compound
+        replacements = {
+            id: Compound(name=spec.name, formula=spec.formula, id=spec.id, data=compound_data)
+            for id, compound_data in data.items()
+            if (spec := self._specs.get(id)) is not None
+        }
+        locks = [self._load_locks[id] for id in sorted(replacements)] # So a load already under way cannot land after the swap
+        for lock in locks:
+            lock.acquire()
+        try:
+            with self._swap_lock:
+                self._compounds = self._compounds | replacements
+            self._element_index = None # Complete products depend on heats of formation
+            self.generation += 1
+        finally:
+            for lock in locks:
+                lock.release()
+
+
+    def snapshot(self) -> "CompoundSnapshot":
+
+        """
+        Returns a read-only view of the compounds as they are now, unaffected by later reloads of compounds already loaded.
+        """
+
+        return CompoundSnapshot(self, self._compounds, self.generation)
+
+
+    def preload(self, ids: Iterable[str] | None = None) -> None:
+
+        """
+        Loads the data of the given compounds (default every registered compound) ahead of first use, e.g. in a background warm-up.
+        """
+
+        for id in (self._specs if ids is None else ids):
+            self[id]
+
 
-compounds["Carbon_Dioxide"] = Compound(
+    def __iter__(self) -> Iterator[str]:
+
+        return iter(self._specs)
+
+
+    def __len__(self) -> int:
+
+        return len(self._specs)
+
+
+class CompoundSnapshot(Mapping[str, "Compound"]):
+
+    def __init__(self, registry: CompoundRegistry, loaded: dict[str, "Compound"], generation: int):
+        """
+        Compounds of a registry as of one generation (see CompoundRegistry.snapshot). Compounds not yet loaded when it was taken
+        are loaded through the registry on access; is_current() tells whether a reload may have happened since.
+
+        @param registry : CompoundRegistry - Registry the snapshot was taken of.
+        @param loaded : dict[str, Compound] - The registry's loaded compounds at the time; reloads replace that dict rather than change it.
+        @param generation : int - The registry's generation at the time.
+        """
+
+        self._registry = registry
+        self._loaded = loaded
+        self.generation = generation
+
+
+    def is_current(self) -> bool:
+
+        return self._registry.generation == self.generation
+
+
+    def __getitem__(self, id: str) -> "Compound":
+
+        compound = self._loaded.get(id)
+        return compound if compound is not None else self._registry[id]
+
+
+    def __iter__(self) -> Iterator[str]:
+
+        return iter(self._registry)
+
+
+    def __len__(self) -> int:
+
+        return len(self._registry)
+
+
+compounds = CompoundRegistry()
+
+compounds.register(
+    id="Carbon_Dioxide",
     name="Carbon Dioxide",
     formula="CO2",
-    id="Carbon_Dioxide",
-    data=load_compound_data("Carbon_Dioxide"),
 )
 
-compounds["Methane"] = Compound(
+compounds.register(
+    id="Methane",
     name="Methane",
     formula="CH4",
-    id="Methane",
-    data=load_compound_data("Methane"),
 )
 
-compounds["Water"] = Compound(
+compounds.register(
+    id="Water",
     name="Water",
     formula="H2O",
-    id="Water",
-    data=load_compound_data("Water"),
 )
 
-compounds["Oxygen"] = Compound(
+compounds.register(
+    id="Oxygen",
     name="Oxygen",
     formula="O2",
-    id="Oxygen",
-    data=load_compound_data("Oxygen"),
 )
 
-compounds["Hydrogen"] = Compound(
+compounds.register(
+    id = "Hydrogen",
     name = "Hydrogen",
     formula = "H2",
-    id = "Hydrogen",
-    data = load_compound_data("Hydrogen"),
 )
 
-compounds["Nitrogen"] = Compound(
+compounds.register(
+    id = "Nitrogen",
     name = "Nitrogen",
     formula = "N2",
-    id = "Nitrogen",
-    data = load_compound_data("Nitrogen"),
 )
 
-compounds["Argon"] = Compound(
+compounds.register(
+    id = "Argon",
     name = "Argon",
     formula = "Ar",
-    id = "Argon",
-    data = load_compound_data("Argon")
-)
\ No newline at end of file
+)
@@ -0,0 +1,133 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Element Index File
+# ###################
+
+from collections.abc import Callable, Iterable
+import numpy as np
+from domain.formula import parse_formula
+
+OXYGEN = "O"
+
+
+class ElementIndex:
+
+    def __init__(self, specs: Iterable, std_Hf: Callable[[str], float]):
+        """
+        Element composition of every registered compound, parsed once from the formulas, for looking up reaction products.
+        Each compound's elements are also kept as a bit mask, so "made only of these elements" is one integer comparison.
+
+        @param specs : Iterable[CompoundSpec] - Compounds to index (id and formula).
+        @param std_Hf : Callable[[str], float] - Standard heat of formation (kJ/mol) of a compound by id; only called to choose between competing oxides.
+
+        @attrib ids : list[str] - Compound.id of each row of the composition matrix.
+        @attrib elements : list[str] - Element of each column of the composition matrix.
+        @attrib composition : NDArray - Atoms of each element in each compound (compounds x elements).
+        """
+
+        specs = list(specs)
+        compositions = [parse_formula(s.formula) for s in specs]
+        self.ids: list[str] = [s.id for s in specs]
+        self.elements: list[str] = sorted(set().union(*compositions))
+        self._element_bit = {e: 1 << i for i, e in enumerate(self.elements)}
+        self.composition = np.array(
+            [[c.get(e, 0) for e in self.elements] for c in compositions], dtype=np.int64
+        ).reshape(len(specs), len(self.elements))
+        self._masks = np.array([self._mask(c) for c in compositions], dtype=np.int64)
+        self._id_masks: dict[str, int] = dict(zip(self.ids, self._masks.tolist()))
+        self._std_Hf = std_Hf
+        self._oxidation_products: dict[str, str | None] = {}
+        self._within_cache: dict[frozenset[str], frozenset[str]] = {}
+        self._products_cache: dict[frozenset[str], frozenset[str]] = {}
+
+
+    def _mask(self, elements: Iterable[str]) -> int:
+
+        mask = 0
+        for element in elements:
+            mask |= self._element_bit[element]
+        return mask
+
+
+    def element_mask(self, ids: Iterable[str]) -> int:
+
+        """
+        Bit mask of every element in the given compounds.
+        """
+
+        mask = 0
+        for id in ids:
+            mask |= self._id_masks[id]
+        return mask
+
+
+    def compounds_within(self, ids: Iterable[str]) -> set[str]:
+
+        """
+        Every indexed compound made only of the elements of the given compounds (the given compounds included).
+        """
+
+        key = frozenset(ids)
+        within = self._within_cache.get(key)
+        if within is None:
+            mask = self.element_mask(key)
+            within = frozenset(np.asarray(self.ids)[(self._masks & ~mask) == 0].tolist())
+            self._within_cache[key] = within
+        return set(within)
+
+
+    def complete_products(self, active_reactants: Iterable[str]) -> set[str]:
+
+        """
+        Products of complete combustion of the active reactants: every element is taken to its most stable oxide, or to its
+        elemental form if it has no oxide (e.g. fuel-bound nitrogen to N2). Oxygen only ends up in the oxides.
+        Raises NotImplementedError if there is no oxygen, or an element has neither an oxide nor an elemental form.
+        """
+
+        key = frozenset(active_reactants)
+        products = self._products_cache.get(key)
+        if products is None:
+            products = self._find_complete_products(key)
+            self._products_cache[key] = products
+        return set(products)
+
+
+    def _find_complete_products(self, active_reactants: frozenset[str]) -> frozenset[str]:
+
+        elements = {e for e in self.elements if self.element_mask(active_reactants) & self._element_bit[e]}
+        if OXYGEN not in elements:
+            raise NotImplementedError(f"Complete combustion needs an oxygen-containing reactant.\n{set(active_reactants)}")
+        products = set()
+        for element in sorted(elements - {OXYGEN}):
+            product = self._oxidation_product(element)
+            if product is None:
+                raise NotImplementedError(
+                    f"No registered oxide or elemental form of {element} to take as a combustion product.\n{set(active_reactants)}"
+                )
+            products.add(product)
+        return frozenset(products)
+
+
+    def _oxidation_product(self, element: str) -> str | None:
+
+        """
+        The registered oxide of an element (made of only it and oxygen) with the lowest formation enthalpy per atom of the element,
+        or the element's pure form if it has no oxide.
+        """
+
+        if element not in self._oxidation_products:
+            column = self.elements.index(element)
+            oxide_mask = self._element_bit[element] | self._element_bit.get(OXYGEN, 0)
+            candidates = [
+                i for i, mask in enumerate(self._masks.tolist())
+                if mask == oxide_mask and oxide_mask != self._element_bit[element]
+            ]
+            if not candidates:
+                candidates = [i for i, mask in enumerate(self._masks.tolist()) if mask == self._element_bit[element]]
+            if len(candidates) > 1: # Data is only loaded to break ties, e.g. CO2 over CO
+                candidates.sort(key=lambda i: self._std_Hf(self.ids[i]) / self.composition[i, column])
+            self._oxidation_products[element] = self.ids[candidates[0]] if candidates else None
+        return self._oxidation_products[element]
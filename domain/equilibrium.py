@@ -0,0 +1,354 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Chemical Equilibrium File
+# ###################
+
+import numpy as np
+from numpy.typing import NDArray
+from scipy.optimize import brentq
+from domain.compound import Compound
+from domain.formula import parse_formula
+from services import metrics
+
+GAS_CONSTANT = 8.314462618e-3 # kJ/(mol·K)
+MAX_NEWTON_ITERATIONS = 60
+MAX_KNOT_BOUNCES = 3 # Times the temperature may jump back to the knot segment it just left before the point is bracketed instead
+COMPOSITION_TOLERANCE = 5e-10 # Largest allowed mole-weighted change in ln(amount) at convergence
+TEMPERATURE_TOLERANCE = 1e-10 # Largest allowed change in ln(T) at convergence
+TRACE_LOG_FRACTION = -18.420681 # ln(1e-8); species below this mole fraction are trace species for step control
+TRACE_STEP_TARGET = -9.2103404 # ln(1e-4); a trace species' step is limited so it cannot jump past this mole fraction
+MIN_LOG_AMOUNT = -150.0 # Keeps absent species representable; exp(-150) mol does not affect any sum
+
+
+class EquilibriumSolver:
+
+    def __init__(self, species: list[Compound], min_temp: float, max_temp: float):
+        """
+        Adiabatic, constant pressure (1 bar) chemical equilibrium of ideal gas mixtures, solved with the element potential method
+        (Gordon & McBride, NASA RP-1311): a Newton iteration on element potentials, ln(total moles) and ln(T), with each
+        species' amount following from its Gibbs energy of formation.
+        Gibbs energies of formation and sensible heats are stacked on a shared knot grid once, so each Newton step is a few
+        array operations over all species.
+
+        @param species : list[Compound] - Every species that may be present at equilibrium, in column order.
+        @param min_temp : float - Lowest temperature (K) shared by all species data.
+        @param max_temp : float - Highest temperature (K) shared by all species data.
+
+        @attrib elements : list[str] - Every element in the species, in row order of element_matrix.
+        @attrib element_matrix : NDArray - Atoms of each element in each species (elements x species).
+        @attrib std_Hf : NDArray - Standard heat of formation (kJ/mol) of each species.
+        """
+
+        self.ids: list[str] = [c.id for c in species]
+        self.min_temp: float = min_temp
+        self.max_temp: float = max_temp
+        compositions = [parse_formula(c.formula) for c in species]
+        self.elements: list[str] = sorted(set().union(*compositions))
+        self.element_matrix = np.array(
+            [[composition.get(e, 0) for composition in compositions] for e in self.elements], dtype=np.float64
+        )
+        self.std_Hf = np.array([c.stdHf for c in species], dtype=np.float64)
+        self._log_temp_bounds = (np.log(max(min_temp, 1.0)), np.log(max_temp)) # Data starting at 0 K has no logarithm
+
+        knots = np.unique(np.concatenate([c.get_temperatures() for c in species]))
+        self._knots = knots[(knots >= min_temp) & (knots <= max_temp)]
+        tables = np.stack([c.evaluate(self._knots, ["SH", "Gf"]) for c in species], axis=-1) # property x knots x species
+        self._slopes = np.diff(tables, axis=1) / np.diff(self._knots)[np.newaxis, :, np.newaxis]
+        self._intercepts = tables[:, :-1] - self._slopes * self._knots[np.newaxis, :-1, np.newaxis]
+
+
+    def element_amounts(self, amounts: NDArray[np.float64]) -> NDArray[np.float64]:
+
+        """
+        Returns the moles of each element in one amount vector, or in every row of a (points x species) array.
+        """
+
+        return amounts @ self.element_matrix.T
+
+
+    def solve(
+        self,
+        initial_amounts: NDArray[np.float64],
+        enthalpy: NDArray[np.float64],
+        guess_amounts: NDArray[np.float64],
+        guess_temps: NDArray[np.float64],
+    ) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+
+        """
+        Solves the equilibrium flame temperature and composition of every row of initial amounts (points x species), in order.
+        Each point starts from the previous point's solution, which is only a few Newton steps away when points are neighbours
+        on a concentration grid. If that fails the point is retried from its own guess (e.g. the complete combustion products).
+        Returns (flame temperatures, equilibrium amounts); points without an equilibrium within bounds are np.nan.
+
+        @param initial_amounts : NDArray - Moles of each species entering (points x species).
+        @param enthalpy : NDArray - Total enthalpy (kJ) entering with each point, formation enthalpy included.
+        @param guess_amounts : NDArray - Starting composition of each point (points x species).
+        @param guess_temps : NDArray - Starting temperature (K) of each point; np.nan is allowed.
+        """
+
+        element_amounts = self.element_amounts(initial_amounts)
+        flame_temps = np.full(len(initial_amounts), np.nan)
+        amounts = np.full(initial_amounts.shape, np.nan)
+        history: list[tuple[NDArray[np.float64], float]] = [] # Solutions of the last (up to) two consecutive points
+        for i in range(len(initial_amounts)):
+            guess_temp = np.clip(np.nan_to_num(guess_temps[i], nan=self.max_temp), *np.exp(self._log_temp_bounds))
+            starts = [self._predict(history)] if history else []
+            starts.append((guess_amounts[i], guess_temp))
+            history = history[-1:] if history else []
+            for start_amounts, start_temp in starts:
+                result = self._solve_point(element_amounts[i], enthalpy[i], start_amounts, start_temp)
+                if result is not None:
+                    amounts[i], flame_temps[i] = result
+                    history.append(result)
+                    break
+            else:
+                history = []
+        if metrics.ENABLED:
+            metrics.registry.inc("flame_temperature_points_total", len(flame_temps), method="equilibrium")
+        return flame_temps, amounts
+
+
+    def _predict(self, history: list[tuple[NDArray[np.float64], float]]) -> tuple[NDArray[np.float64], float]:
+
+        """
+        Starting point from the previous solutions: the last one, or a linear extrapolation (in ln(amount) and T) of the last two.
+        """
+
+        if len(history) == 1:
+            return history[0]
+        (amounts_0, temp_0), (amounts_1, temp_1) = history
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where((amounts_0 > 0) & (amounts_1 > 0), amounts_1 / amounts_0, 1.0)
+        return amounts_1 * ratio, float(np.clip(2.0 * temp_1 - temp_0, *np.exp(self._log_temp_bounds)))
+
+
+    def _properties(self, temperature: float) -> tuple[NDArray[np.float64], ...]:
+
+        """
+        Returns the sensible heat (kJ/mol), its temperature slope, the Gibbs energy of formation (kJ/mol) and its slope for every species.
+        """
+
+        segment = min(max(int(np.searchsorted(self._knots, temperature)), 1), len(self._knots) - 1) - 1
+        slopes = self._slopes[:, segment]
+        values = self._intercepts[:, segment] + slopes * temperature
+        return values[0], slopes[0], values[1], slopes[1]
+
+
+    def _solve_point(
+        self, element_amounts: NDArray[np.float64], enthalpy: float, guess_amounts: NDArray[np.float64], guess_temp: float
+    ) -> tuple[NDArray[np.float64], float] | None:
+
+        """
+        Newton iteration for one point. Returns (amounts, temperature), or None if it does not converge within bounds.
+        The data are piecewise linear in temperature, so near a knot the temperature step can bounce between the segments on
+        either side; then (or when the iterations run out) the temperature is bracketed instead (see _solve_bracketed).
+        """
+
+        present = element_amounts > 0 # Elements absent from this point, and species containing them, drop out
+        possible = ~np.any(self.element_matrix[~present] > 0, axis=0)
+        A, b = self.element_matrix[present][:, possible], element_amounts[present]
+        num_elements = len(b)
+
+        scale = b.sum()
+        log_amounts = np.log(np.maximum(guess_amounts[possible], 1e-8 * scale))
+        log_total = np.log(np.exp(log_amounts).sum())
+        log_temp = np.log(guess_temp)
+        std_Hf = self.std_Hf[possible]
+        segments: list[int] = []
+        bounces = 0
+        for _ in range(MAX_NEWTON_ITERATIONS):
+            temperature = np.exp(log_temp)
+            segments.append(int(np.searchsorted(self._knots, temperature)))
+            if len(segments) >= 3 and segments[-1] != segments[-2] and segments[-1] == segments[-3]:
+                bounces += 1
+                if bounces >= MAX_KNOT_BOUNCES:
+                    break
+            SH, SH_slope, Gf, Gf_slope = (p[possible] for p in self._properties(temperature))
+            RT = GAS_CONSTANT * temperature
+            amounts = np.exp(log_amounts)
+            total = np.exp(log_total)
+            potential = Gf / RT + log_amounts - log_total # mu/RT at 1 bar
+            enthalpy_RT = (std_Hf + SH) / RT
+            formation_enthalpy_RT = (Gf - temperature * Gf_slope) / RT # -d(Gf/RT)/d(lnT)
+            heat_capacity_R = SH_slope / GAS_CONSTANT
+
+            weighted = A * amounts # elements x species
+            jacobian = np.empty((num_elements + 2, num_elements + 2))
+            jacobian[:num_elements, :num_elements] = weighted @ A.T
+            jacobian[:num_elements, num_elements] = weighted.sum(axis=1)
+            jacobian[:num_elements, num_elements + 1] = weighted @ formation_enthalpy_RT
+            jacobian[num_elements, :num_elements] = weighted.sum(axis=1)
+            jacobian[num_elements, num_elements] = amounts.sum() - total
+            jacobian[num_elements, num_elements + 1] = amounts @ formation_enthalpy_RT
+            jacobian[num_elements + 1, :num_elements] = weighted @ enthalpy_RT
+            jacobian[num_elements + 1, num_elements] = amounts @ enthalpy_RT
+            jacobian[num_elements + 1, num_elements + 1] = amounts @ (enthalpy_RT * formation_enthalpy_RT + heat_capacity_R)
+            residual = np.concatenate((
+                b - weighted.sum(axis=1) + weighted @ potential,
+                [total - amounts.sum() + amounts @ potential],
+                [enthalpy / RT - amounts @ enthalpy_RT + (amounts * enthalpy_RT) @ potential],
+            ))
+            try:
+                step = np.linalg.solve(jacobian, residual)
+            except np.linalg.LinAlgError:
+                return None
+            element_potentials, d_log_total, d_log_temp = step[:num_elements], step[num_elements], step[num_elements + 1]
+            d_log_amounts = -potential + element_potentials @ A + d_log_total + formation_enthalpy_RT * d_log_temp
+
+            converged = (
+                np.max(amounts * np.abs(d_log_amounts)) <= COMPOSITION_TOLERANCE * total
+                and abs(d_log_total) <= COMPOSITION_TOLERANCE
+                and abs(d_log_temp) <= TEMPERATURE_TOLERANCE
+            )
+            log_amounts, log_total, log_temp = self._damped_update(
+                log_amounts, log_total, log_temp, d_log_amounts, d_log_total, d_log_temp
+            )
+            if converged:
+                if not self.min_temp < temperature < self.max_temp: # Pinned to a bound; the true flame temperature is outside the data
+                    return None
+                solution = np.zeros(len(self.ids))
+                solution[possible] = np.exp(log_amounts)
+                return solution, float(np.exp(log_temp))
+        return self._solve_bracketed(A, b, enthalpy, possible, log_amounts, log_total, float(np.exp(log_temp)))
+
+
+    def _solve_bracketed(
+        self,
+        A: NDArray[np.float64],
+        b: NDArray[np.float64],
+        enthalpy: float,
+        possible: NDArray[np.bool_],
+        log_amounts: NDArray[np.float64],
+        log_total: float,
+        temperature: float,
+    ) -> tuple[NDArray[np.float64], float] | None:
+
+        """
+        Solves one point as a root in temperature alone: the composition is solved at fixed temperatures (see _solve_at_temperature)
+        and the enthalpy of that equilibrium mixture is matched to the entering enthalpy.
+        Steps knot to knot from the given temperature, upwards while the mixture is short of enthalpy, until the mismatch changes sign,
+        then refines with brentq inside that segment, where the data are smooth. Returns (amounts, temperature), or None if there is no match within bounds.
+        """
+
+        std_Hf = self.std_Hf[possible]
+        state = [log_amounts, log_total] # Each solve starts from the last
+
+        def excess_enthalpy(temp: float) -> float:
+            result = self._solve_at_temperature(A, b, possible, state[0], state[1], temp)
+            if result is None:
+                raise ValueError(f"No equilibrium composition at {temp} K.")
+            state[:] = result
+            return float(np.exp(result[0]) @ (std_Hf + self._properties(temp)[0][possible]) - enthalpy)
+
+        knots = self._knots
+        segment = min(max(int(np.searchsorted(knots, temperature)), 1), len(knots) - 1) - 1
+        try:
+            lower, upper = knots[segment], knots[segment + 1]
+            excess_lower, excess_upper = excess_enthalpy(lower), excess_enthalpy(upper)
+            while not excess_lower <= 0 <= excess_upper:
+                if excess_upper < 0: # Still too cold at the top of the segment
+                    if segment + 2 >= len(knots):
+                        return None
+                    segment += 1
+                    lower, excess_lower = upper, excess_upper
+                    upper = knots[segment + 1]
+                    excess_upper = excess_enthalpy(upper)
+                else:
+                    if segment == 0:
+                        return None
+                    segment -= 1
+                    upper, excess_upper = lower, excess_lower
+                    lower = knots[segment]
+                    excess_lower = excess_enthalpy(lower)
+            temperature = brentq(excess_enthalpy, lower, upper, rtol=TEMPERATURE_TOLERANCE)
+            excess_enthalpy(temperature) # Composition at the root itself
+        except ValueError:
+            return None
+        if not self.min_temp < temperature < self.max_temp:
+            return None
+        solution = np.zeros(len(self.ids))
+        solution[possible] = np.exp(state[0])
+        return solution, float(temperature)
+
+
+    def _solve_at_temperature(
+        self,
+        A: NDArray[np.float64],
+        b: NDArray[np.float64],
+        possible: NDArray[np.bool_],
+        log_amounts: NDArray[np.float64],
+        log_total: float,
+        temperature: float,
+    ) -> tuple[NDArray[np.float64], float] | None:
+
+        """
+        Newton iteration on the element potentials and ln(total moles) alone, at a fixed temperature.
+        Returns (ln(amounts), ln(total moles)) of the equilibrium composition, or None if it does not converge.
+        """
+
+        num_elements = len(b)
+        Gf = self._properties(temperature)[2][possible]
+        RT = GAS_CONSTANT * temperature
+        log_temp = float(np.log(temperature))
+        for _ in range(MAX_NEWTON_ITERATIONS):
+            amounts = np.exp(log_amounts)
+            total = np.exp(log_total)
+            potential = Gf / RT + log_amounts - log_total
+
+            weighted = A * amounts
+            jacobian = np.empty((num_elements + 1, num_elements + 1))
+            jacobian[:num_elements, :num_elements] = weighted @ A.T
+            jacobian[:num_elements, num_elements] = weighted.sum(axis=1)
+            jacobian[num_elements, :num_elements] = weighted.sum(axis=1)
+            jacobian[num_elements, num_elements] = amounts.sum() - total
+            residual = np.concatenate((
+                b - weighted.sum(axis=1) + weighted @ potential,
+                [total - amounts.sum() + amounts @ potential],
+            ))
+            try:
+                step = np.linalg.solve(jacobian, residual)
+            except np.linalg.LinAlgError:
+                return None
+            element_potentials, d_log_total = step[:num_elements], step[num_elements]
+            d_log_amounts = -potential + element_potentials @ A + d_log_total
+
+            converged = (
+                np.max(amounts * np.abs(d_log_amounts)) <= COMPOSITION_TOLERANCE * total
+                and abs(d_log_total) <= COMPOSITION_TOLERANCE
+            )
+            log_amounts, log_total, _ = self._damped_update(log_amounts, log_total, log_temp, d_log_amounts, d_log_total, 0.0)
+            if converged:
+                return log_amounts, log_total
+        return None
+
+
+    @metrics.counted("equilibrium_newton_steps_total")
+    def _damped_update(
+        self,
+        log_amounts: NDArray[np.float64],
+        log_total: float,
+        log_temp: float,
+        d_log_amounts: NDArray[np.float64],
+        d_log_total: float,
+        d_log_temp: float,
+    ) -> tuple[NDArray[np.float64], float, float]:
+
+        """
+        Applies a Newton step, shortened as in NASA RP-1311 so no major species or the temperature changes by more than e^2,
+        and trace species cannot jump to significant amounts in one step. The temperature is kept within the data bounds.
+        """
+
+        trace = (log_amounts - log_total) <= TRACE_LOG_FRACTION
+        largest = max(5.0 * abs(d_log_temp), 5.0 * abs(d_log_total), np.max(np.abs(d_log_amounts[~trace]), initial=0.0))
+        damping = min(1.0, 2.0 / largest) if largest > 0 else 1.0
+        rising_trace = trace & (d_log_amounts - d_log_total > 0)
+        if np.any(rising_trace):
+            limits = np.abs((log_total - log_amounts[rising_trace] + TRACE_STEP_TARGET) / (d_log_amounts[rising_trace] - d_log_total))
+            damping = min(damping, float(np.min(limits)))
+        log_amounts = np.maximum(log_amounts + damping * d_log_amounts, MIN_LOG_AMOUNT)
+        log_total = log_total + damping * d_log_total
+        log_temp = float(np.clip(log_temp + damping * d_log_temp, *self._log_temp_bounds))
+        return log_amounts, log_total, log_temp
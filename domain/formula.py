@@ -0,0 +1,55 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Chemical Formula File
+# ###################
+
+from functools import lru_cache
+import re
+
+_TOKEN = re.compile(r"([A-Z][a-z]?|\(|\))(\d*)")
+
+
+"""
+Counts the atoms of each element in a chemical formula, e.g. "CH4" -> {"C": 1, "H": 4}. Parentheses are supported, e.g. "Ca(OH)2"
+"""
+def parse_formula(formula: str) -> dict[str, int]:
+
+    return dict(_parse_formula(formula)) # Copy, so callers cannot change the cached result
+
+
+@lru_cache(maxsize=None)
+def _parse_formula(formula: str) -> tuple[tuple[str, int], ...]:
+
+    stack: list[dict[str, int]] = [{}]
+    position = 0
+    for match in _TOKEN.finditer(formula):
+        if match.start() != position:
+            raise ValueError(f"Could not parse formula '{formula}' at position {position}.")
+        position = match.end()
+        token, count = match.group(1), int(match.group(2) or 1)
+        if token == "(":
+            if match.group(2):
+                raise ValueError(f"Could not parse formula '{formula}'; a count cannot follow '('.")
+            stack.append({})
+        elif token == ")":
+            if len(stack) == 1:
+                raise ValueError(f"Unbalanced parentheses in formula '{formula}'.")
+            group = stack.pop()
+            for element, atoms in group.items():
+                stack[-1][element] = stack[-1].get(element, 0) + atoms * count
+        else:
+            stack[-1][token] = stack[-1].get(token, 0) + count
+    if position != len(formula) or len(stack) != 1 or not stack[0]:
+        raise ValueError(f"Could not parse formula '{formula}'.")
+    return tuple(stack[0].items())
+
+
+"""
+Elements of a chemical formula
+"""
+def formula_elements(formula: str) -> frozenset[str]:
+
+    return frozenset(element for element, _ in _parse_formula(formula))
@@ -6,13 +6,57 @@
 # Reaction Class File
 # ###################
 
-from chempy import balance_stoichiometry
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
 from domain.compound import Compound
 from domain.compounds import compounds
-from config import products_from_reactants
+from domain.reaction_template import ReactionTemplate, template_cache
 import numpy as np
 from numpy.typing import NDArray
-from scipy.optimize import brentq
+from scipy.optimize import brentq, minimize_scalar
+from services import metrics
+
+SOLVERS = ("exact", "iterative") # "exact" inverts piecewise linear sensible heat directly, "iterative" root-finds
+DEFAULT_SOLVER = "exact"
+ADAPTIVE_COARSE_RESOLUTION = 17 # Starting grid of adaptive flame tables
+PEAK_XTOL = 1e-6 # Concentration (mol fraction) tolerance of the peak flame temperature search
+FIRST_STREAM_CHUNK = 16 # Points in the first chunk of a streamed flame table; later chunks double in size
+STREAM_CHUNK_SIZE = 1024 # Largest chunk of a streamed flame table
+
+
+"""
+Indices of a grid of n points in chunks, coarse to fine: first every stride-th point (FIRST_STREAM_CHUNK to twice that many), then the points
+halfway between those already visited, halving the stride each pass, so every prefix is spread evenly across the grid.
+Each chunk is an increasing arithmetic range of at most max_size indices; nothing the size of the grid is built
+"""
+def coarse_to_fine_chunks(n: int, max_size: int = STREAM_CHUNK_SIZE) -> Iterator[NDArray[np.int64]]:
+
+    stride = 1
+    while -(-n // (2 * stride)) >= FIRST_STREAM_CHUNK:
+        stride *= 2
+    yield from _arithmetic_chunks(0, n, stride, max_size)
+    while stride > 1:
+        stride //= 2
+        yield from _arithmetic_chunks(stride, n, 2 * stride, max_size)
+
+
+def _arithmetic_chunks(first: int, stop: int, step: int, max_size: int) -> Iterator[NDArray[np.int64]]:
+
+    for start in range(first, stop, step * max_size):
+        yield np.arange(start, min(stop, start + step * max_size), step)
+
+
+"""
+Indices of a grid of n points in increasing order, in chunks of FIRST_STREAM_CHUNK doubling up to max_size
+"""
+def _increasing_chunks(n: int, max_size: int = STREAM_CHUNK_SIZE) -> Iterator[NDArray[np.int64]]:
+
+    start, size = 0, FIRST_STREAM_CHUNK
+    while start < n:
+        yield np.arange(start, min(n, start + size))
+        start += size
+        size = min(2 * size, max_size)
+
 
 class Reaction:
 
@@ -24,6 +68,7 @@ class Reaction:
     ):  # Potentially arguments for reaction complexity
         """
         Initializes a Reaction object given a set of reactant Compounds.
+        Everything that depends only on the reactant set (products, stoichiometry, bounds, kernel) comes from a cached ReactionTemplate, so construction is cheap after the first time.
 
         @param reactants : set[str] - Set of Compound.id strings representing the reactants of the reaction.
         @param temperatures : dict[str, float] - Dictionary mapping each reactant Compound.id to its entry temperature (K).
@@ -34,14 +79,17 @@ class Reaction:
         @attrib products : set[str] - Set of Compound objects representing the products of the reaction.
         @attrib stoichiometry : tuple[dict[str, int], dict[str, int]] - Tuple containing two dictionaries representing the stoichiometric coefficients of reactants and products.
         @attrib delta_Hf : float - Total formation enthalpy change (kJ) for the reaction.
+        @attrib species : list[str] - Every reactant and product Compound.id, in the column order of batch concentration arrays.
+        @attrib kernel : ReactionKernel - Array-backed species data the energy balance is evaluated on.
+        @attrib equilibrium : EquilibriumSolver | None - Chemical equilibrium solver used in place of complete combustion when dissociation is considered.
+        @attrib data_hashes : dict[str, str] - Content hash of each species' data the Reaction was built with; it keeps that data if compounds are reloaded.
         """
 
         self._set_reactants(reactants)
-        self._set_inert_reactants(dissociation)
-        self._set_products(dissociation)
-        self._set_stoichiometry()
+        self.dissociation = dissociation
+        self._set_template(template_cache.get(reactants, dissociation))
         self._set_temperatures(temperatures)
-        self._set_temperature_bounds()
+        self._set_inlet_SH()
 
 
     def _set_reactants(self, reactants: set[str]):
@@ -49,27 +97,17 @@ class Reaction:
         self.reactants = reactants
 
 
-    def _set_inert_reactants(self, dissociation: bool):
-
-        self.inert_reactants = products_from_reactants(self.reactants, dissociation)[1]
-
-
-    def _set_products(self, dissociation: bool):
+    def _set_template(self, template: ReactionTemplate):
 
-        self.products = products_from_reactants(self.reactants, dissociation)[0]
-
-
-    def _set_stoichiometry(self):
-
-        reactive_species = self.reactants - self.inert_reactants
-        reactant_strs = {compounds[r].formula for r in reactive_species}
-        product_strs = {compounds[p].formula for p in self.products}
-        balanced_reactants, balanced_products = balance_stoichiometry(
-            reactant_strs, product_strs
-        )
-        for inert in self.inert_reactants:
-            balanced_reactants[compounds[inert].formula] = 0
-        self.stoichiometry = (balanced_reactants, balanced_products)
+        self.inert_reactants = set(template.inert_reactants)
+        self.products = set(template.products)
+        self.stoichiometry = template.stoichiometry
+        self.species = list(template.species)
+        self.min_temp = template.min_temp
+        self.max_temp = template.max_temp
+        self.kernel = template.kernel
+        self.equilibrium = template.equilibrium
+        self.data_hashes = template.data_hashes
 
 
     def _set_temperatures(self, temperatures: dict[str, float]):
@@ -80,177 +118,399 @@ class Reaction:
 
 
     """
-    Finds minimum and maximum shared temperatures from reactant data. Prevents extrapolation
+    Hoists the reactants' inlet sensible heats out of the solve; they only depend on entry temperatures
     """
-    def _set_temperature_bounds(self):
+    def _set_inlet_SH(self):
 
-        min_temp = 0.0
-        max_temp = np.inf
-        for component in self.reactants.union(self.products):
-            temperatures = compounds[component].get_temperatures()
-            min_temp = max(min_temp, np.min(temperatures))
-            max_temp = min(max_temp, np.max(temperatures))
-        self.min_temp = min_temp
-        self.max_temp = max_temp
+        self._inlet_SH = self.kernel.inlet_SH(self.temperatures)
 
 
     """
-    Using initial concentrations of reactants, determines and returns proportion of reactants used up
+    Helper function for root-finding; computes residual of energy balance at given temperature
     """
-    def _find_extent_of_reaction(self, concentrations: dict[str, float]) -> float:
+    def _energy_balance(self, temperature: float, final_amounts: NDArray[np.float64], target_SH: float) -> float:
+
+        return self.kernel.energy_balance(temperature, final_amounts, target_SH)
+
 
-        reactive_species = self.reactants - self.inert_reactants
-        weighted_conc = {c: concentrations[c] / self.stoichiometry[0][compounds[c].formula] for c in reactive_species}
-        extent = min(weighted_conc.values())
-        return extent
+    def _validate_concentrations(self, conc_dict: dict[str, float]) -> None:
+
+        total = sum(conc_dict.values())
+        if not np.isclose(total, 1.0):
+            raise ValueError(f"Concentrations do not sum to 1.0. Sum: {total:.5f}")
 
 
     """
-    Using intitial concentrations and extent of reaction, calculates final amounts of every species; reactants and products
+    Uses initial concentrations of reactants to find at what temperature the sensible heat of the products is equal to the sensible heat of reactants and heat of formation of reaction
     """
-    def _compute_final_species_amounts(self, concentrations: dict[str, float], extent: float,) -> dict[str, float]:
+    def calc_flame_temp(self, concentrations: dict[str, float], solver: str = DEFAULT_SOLVER) -> float:
 
-        final_amounts = {}
-        for reactant in self.reactants:
-            initial_amount = concentrations[reactant]
-            if reactant in self.inert_reactants:
-                final_amounts[reactant] = initial_amount
+        self._validate_concentrations(concentrations)
+        self._validate_solver(solver)
+        initial_amounts = self.kernel.amount_vector(concentrations)
+        if self.dissociation or (solver == "exact" and self.kernel.piecewise_linear):
+            return float(self.calc_flame_temps(initial_amounts[np.newaxis], solver)[0])
+        final_amounts = self.kernel.final_amounts(initial_amounts)
+        target_SH = float(self.kernel.target_SH(initial_amounts, final_amounts, self._inlet_SH))
+        if (self._energy_balance(self.min_temp, final_amounts, target_SH) * self._energy_balance(self.max_temp, final_amounts, target_SH) > 0):  # No root (flame temp) in bounds
+            flame_temp = np.nan
+        else:
+            result = brentq(self._energy_balance, self.min_temp, self.max_temp, args=(final_amounts, target_SH), full_output=metrics.ENABLED)
+            if isinstance(result, tuple):
+                flame_temp, root_info = result
+                metrics.registry.observe("root_finder_iterations", root_info.iterations, metrics.ITERATION_BUCKETS)
             else:
-                coef = self.stoichiometry[0][compounds[reactant].formula]
-                consumed_amount = extent * coef
-                final_amounts[reactant] = initial_amount - consumed_amount
-        for product in self.products:
-            final_amounts[product] = extent * self.stoichiometry[1][compounds[product].formula]
-        return final_amounts
+                flame_temp = result
+        return flame_temp
 
 
-    def _calc_Hf_initial(self, initial_amounts: dict[str, float]) -> float:
+    def _validate_solver(self, solver: str) -> None:
 
-        total_Hf = 0.0
-        for reactant in self.reactants:
-            total_Hf += initial_amounts[reactant] * compounds[reactant].stdHf
-        return total_Hf
-    
+        if solver not in SOLVERS:
+            raise ValueError(f"Solver '{solver}' not recognized. Options: {SOLVERS}")
 
-    def _calc_Hf_final(self, final_amounts: dict[str, float]) -> float:
 
-        total_Hf = 0.0
-        for compound in self.reactants.union(self.products): # Hf for unreacted reactants as well as products
-            total_Hf += final_amounts[compound] * compounds[compound].stdHf
-        return total_Hf
-    
-
-    def _calc_SH_initial(self, initial_amounts: dict[str, float]) -> float:
+    """
+    Turns ratios into proportions
+    """
+    def _normalize(self, d: dict[str, float]) -> dict[str, float]:
 
-        total_SH = 0.0
-        for reactant in self.reactants:
-            temp = self.temperatures[reactant]
-            total_SH += initial_amounts[reactant] * compounds[reactant].SH(temp)
-        return total_SH
+        total = sum(d.values())
+        return {k: v/total for k, v in d.items()}
     
 
-    def _calc_SH_final(self, final_amounts: dict[str, float], temperature: float) -> float:
+    """
+    Generates the concentrations of the controlled reactant at the given indices (all of them by default) of the grid of resolution points
+    evenly spaced between 0 and 1 exclusive
+    """
+    def _generate_x_values(self, resolution: int = 100, indices: NDArray[np.int64] | None = None) -> NDArray[np.float64]:
+
+        indices = np.arange(resolution) if indices is None else indices
+        return (indices + 1) / (resolution + 1)
 
-        total_SH = 0.0
-        for compound in self.reactants.union(self.products): # SH for unreacted reactants as well as products
-            total_SH += final_amounts[compound] * compounds[compound].SH(temperature)
-        return total_SH
-    
 
     """
-    Helper function for root-finding; computes residual of energy balance at given temperature
+    Generates the concentrations of all reactants for every concentration of controlled reactant as a 2D array (points x species), columns ordered as self.species
     """
-    def _energy_balance(self, temperature: float, initial_amounts: dict[str, float], final_amounts: dict[str, float]) -> float:
+    def _generate_concentration_matrix(self, variable: str, base_concs: dict[str, float | int], resolution: int = 100) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
 
-        SH_final = self._calc_SH_final(final_amounts, temperature)
-        Hf_final = self._calc_Hf_final(final_amounts)
-        SH_initial = self._calc_SH_initial(initial_amounts)
-        Hf_initial = self._calc_Hf_initial(initial_amounts)
-        residual = float(SH_final + Hf_final - SH_initial - Hf_initial)
-        return residual
+        x_values = self._generate_x_values(resolution)
+        return x_values, self._concentration_matrix(variable, base_concs, x_values)
 
 
-    def _validate_concentrations(self, conc_dict: dict[str, float]) -> None:
+    """
+    Builds the concentrations of all reactants (points x species) for given concentrations of the controlled reactant
+    """
+    def _concentration_matrix(self, variable: str, base_concs: dict[str, float | int], x_values: NDArray[np.float64]) -> NDArray[np.float64]:
 
-        total = sum(conc_dict.values())
-        if not np.isclose(total, 1.0):
-            raise ValueError(f"Concentrations do not sum to 1.0. Sum: {total:.5f}")
+        dependents = self._normalize({k: v for k, v in base_concs.items() if k != variable})
+        concentrations = np.zeros((len(x_values), len(self.species)))
+        for j, species in enumerate(self.species):
+            if species == variable:
+                concentrations[:, j] = x_values
+            elif species in dependents:
+                concentrations[:, j] = (1.0 - x_values) * dependents[species]
+        return concentrations
 
 
     """
-    Uses initial concentrations of reactants to find at what temperature the sensible heat of the products is equal to the sensible heat of reactants and heat of formation of reaction
+    Solves the flame temperature of every row of a concentration array (points x species) at once. Points with no root in bounds are np.nan
     """
-    def calc_flame_temp(self, concentrations: dict[str, float]) -> float:
+    def calc_flame_temps(self, concentrations: NDArray[np.float64], solver: str = DEFAULT_SOLVER) -> NDArray[np.float64]:
 
-        self._validate_concentrations(concentrations)
-        extent = self._find_extent_of_reaction(concentrations)
-        final_amounts = self._compute_final_species_amounts(concentrations, extent)
-        if (self._energy_balance(self.min_temp, concentrations, final_amounts) * self._energy_balance(self.max_temp, concentrations, final_amounts) > 0):  # No root (flame temp) in bounds
-            flame_temp = np.nan
-        else:
-            result = brentq(self._energy_balance, self.min_temp, self.max_temp, args=(concentrations, final_amounts))
-            flame_temp = result[0] if isinstance(result, tuple) else result
-        return flame_temp
+        return self._calc_flame_temps(concentrations, self._inlet_SH, solver)
 
 
     """
-    Turns ratios into proportions
+    calc_flame_temps with the inlet sensible heats given, either one vector or one row per concentration row
     """
-    def _normalize(self, d: dict[str, float]) -> dict[str, float]:
+    def _calc_flame_temps(self, concentrations: NDArray[np.float64], inlet_SH: NDArray[np.float64], solver: str) -> NDArray[np.float64]:
+
+        if self.dissociation:
+            return self._calc_equilibrium(concentrations, inlet_SH, solver)[0]
+        self._validate_solver(solver)
+        final_amounts = self.kernel.final_amounts(concentrations)
+        target_SH = self.kernel.target_SH(concentrations, final_amounts, inlet_SH)
+        return self.kernel.solve(final_amounts, target_SH, exact=(solver == "exact"))
 
-        total = sum(d.values())
-        return {k: v/total for k, v in d.items()}
-    
 
     """
-    Given a controlled reactant and its current concentration, scales the remaining reactants to appropriate concentrations with fixed relative ratios
+    Solves the dissociated (chemical equilibrium) flame temperature and product amounts of every row of a concentration array (points x species).
+    Rows are solved in order, each starting from the previous row's solution; complete combustion (solved with solver) is the fallback start.
+    Returns (flame temperatures, amounts of each species per row), np.nan where there is no solution within bounds
     """
-    def _scale_dependents(self, variable: str, x: float, ratios: dict[str, float]) -> dict[str, float]:
+    def calc_equilibrium(self, concentrations: NDArray[np.float64], solver: str = DEFAULT_SOLVER) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
 
-        """
-        @param (str) variable : The compound id corresponding to the controlled reactant
-        @param (float) x : The current concentration of the controlled reactant
-        @param (dict[str, float]) ratios : The dictionary mapping the ratios of all of the reactants, including the variable
-        """
+        return self._calc_equilibrium(concentrations, self._inlet_SH, solver)
 
-        dependents = {k: v for k, v in ratios.items() if k != variable}
-        dependents = self._normalize(dependents)
-        leftover = 1.0 - x
-        return {k: leftover * prop for k, prop in dependents.items()}
-    
 
     """
-    Generates initial concentrations of all reactants for every concentration of controlled reactant
+    calc_equilibrium with the inlet sensible heats given, either one vector or one row per concentration row
     """
-    def _generate_concentrations(self, variable: str, base_concs: dict[str, float | int], resolution: int = 100) -> list[dict[str, float]]:
-
-        base_ratios = self._normalize(base_concs)
-        delta_x = 1.0 / (resolution + 1)
-        conc_list = []
-        x_val = delta_x
-        while x_val < 1.0:
-            conc_dict = {variable: x_val}
-            scaled_dependents = self._scale_dependents(variable, x_val, base_ratios)
-            conc_dict.update(scaled_dependents)
-            conc_list.append(conc_dict)
-            x_val += delta_x
-        return conc_list
+    def _calc_equilibrium(self, concentrations: NDArray[np.float64], inlet_SH: NDArray[np.float64], solver: str) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+
+        if self.equilibrium is None:
+            raise ValueError("Equilibrium is only solved for reactions created with dissociation=True.")
+        self._validate_solver(solver)
+        final_amounts = self.kernel.final_amounts(concentrations)
+        target_SH = self.kernel.target_SH(concentrations, final_amounts, inlet_SH)
+        return self.equilibrium.solve(
+            concentrations,
+            self.kernel.inlet_enthalpy(concentrations, inlet_SH),
+            final_amounts,
+            self.kernel.solve(final_amounts, target_SH, exact=(solver == "exact")),
+        )
 
 
     """
     Calculates the flame temperature data points as a function of the variable compound's concentration. Returns as an array
     """
-    def calc_flame_table(self, variable_compound: str, base_concentrations: dict[str, float | int], resolution: int = 100) -> NDArray[np.float64]:
+    def calc_flame_table(self, variable_compound: str, base_concentrations: dict[str, float | int], resolution: int = 100, solver: str = DEFAULT_SOLVER, tolerance: float | None = None) -> NDArray[np.float64]:
+
+        """
+        @param tolerance : float | None - If given, builds an adaptive table instead (see _calc_adaptive_flame_table); resolution then sets the finest spacing
+        """
 
-        concentration_dicts = self._generate_concentrations(
+        if tolerance is not None:
+            return self._calc_adaptive_flame_table(variable_compound, base_concentrations, resolution, solver, tolerance)
+        x_values, concentrations = self._generate_concentration_matrix(
             variable_compound, base_concentrations, resolution
         )
-        x_values = []
-        flame_temps = []
-        for conc_dict in concentration_dicts:
-            x_values.append(conc_dict[variable_compound])
-            flame_temp = self.calc_flame_temp(conc_dict)
-            flame_temps.append(flame_temp)
-        x_values, flame_temps = np.array(x_values), np.array(flame_temps)
+        flame_temps = self.calc_flame_temps(concentrations, solver)
         flame_table = np.stack((x_values, flame_temps))
         return flame_table
+
+
+    """
+    Streams the same points as calc_flame_table as they are solved, one (x, T) pair at a time.
+    Points come coarse to fine (see coarse_to_fine_chunks) unless coarse_to_fine is False, when they come in increasing x
+    """
+    def iter_flame_table(self, variable_compound: str, base_concentrations: dict[str, float | int], resolution: int = 100, solver: str = DEFAULT_SOLVER, coarse_to_fine: bool = True) -> Iterator[tuple[float, float]]:
+
+        for chunk in self.iter_flame_table_chunks(variable_compound, base_concentrations, resolution, solver, coarse_to_fine):
+            yield from zip(chunk[0].tolist(), chunk[1].tolist())
+
+
+    """
+    Streams the points of calc_flame_table as partial flame tables (2 x points, like calc_flame_table), each solved as one batch.
+    Chunks start at FIRST_STREAM_CHUNK points and roughly double up to STREAM_CHUNK_SIZE, so the first curve shape arrives after a few solves.
+    Points within a chunk are in increasing x; across chunks they come coarse to fine unless coarse_to_fine is False.
+    Each chunk's x values are generated on their own, so memory does not grow with resolution
+    """
+    def iter_flame_table_chunks(self, variable_compound: str, base_concentrations: dict[str, float | int], resolution: int = 100, solver: str = DEFAULT_SOLVER, coarse_to_fine: bool = True) -> Iterator[NDArray[np.float64]]:
+
+        self._validate_solver(solver)
+        for indices in coarse_to_fine_chunks(resolution) if coarse_to_fine else _increasing_chunks(resolution):
+            chunk_x = self._generate_x_values(resolution, indices) # Increasing, so equilibrium continues from neighbouring points
+            concentrations = self._concentration_matrix(variable_compound, base_concentrations, chunk_x)
+            yield np.stack((chunk_x, self.calc_flame_temps(concentrations, solver)))
+
+
+    """
+    Non-uniform flame table: starts from a coarse grid and bisects only the intervals where linear interpolation is off by more than tolerance (K),
+    or where the flame temperature switches between np.nan and a finite value. Intervals no wider than the spacing of a uniform table at resolution
+    (within rounding) are not split
+    """
+    def _calc_adaptive_flame_table(self, variable: str, base_concs: dict[str, float | int], resolution: int, solver: str, tolerance: float) -> NDArray[np.float64]:
+
+        if tolerance <= 0:
+            raise ValueError("Adaptive tolerance must be positive.")
+        solve = lambda x: self.calc_flame_temps(self._concentration_matrix(variable, base_concs, x), solver)
+        min_width = 1.0 / (resolution + 1)
+        x_values = np.linspace(min_width, 1.0 - min_width, min(ADAPTIVE_COARSE_RESOLUTION, resolution))
+        flame_temps = solve(x_values)
+        x_parts, temp_parts = [x_values], [flame_temps]
+
+        left_x, right_x = x_values[:-1], x_values[1:]
+        left_T, right_T = flame_temps[:-1], flame_temps[1:]
+        while len(left_x) > 0:
+            splittable = (right_x - left_x) > min_width * (1 + 1e-9) # Equal widths may differ by an ulp
+            left_x, right_x, left_T, right_T = left_x[splittable], right_x[splittable], left_T[splittable], right_T[splittable]
+            mid_x = 0.5 * (left_x + right_x)
+            mid_T = solve(mid_x)
+            x_parts.append(mid_x)
+            temp_parts.append(mid_T)
+
+            error = np.abs(mid_T - 0.5 * (left_T + right_T))
+            nan_switch = (np.isnan(left_T) != np.isnan(right_T)) | (np.isnan(mid_T) != np.isnan(left_T))
+            refine = nan_switch | (error > tolerance) # error is nan (never > tolerance) when both ends are nan
+            left_x, right_x = np.concatenate((left_x[refine], mid_x[refine])), np.concatenate((mid_x[refine], right_x[refine]))
+            left_T, right_T = np.concatenate((left_T[refine], mid_T[refine])), np.concatenate((mid_T[refine], right_T[refine]))
+
+        x_values, flame_temps = np.concatenate(x_parts), np.concatenate(temp_parts)
+        order = np.argsort(x_values)
+        return np.stack((x_values[order], flame_temps[order]))
+
+
+    """
+    Concentration of the controlled reactant at which it and the other reactive species run out together, from the balanced stoichiometry.
+    np.nan if the controlled reactant is inert, as there is no such point
+    """
+    def stoichiometric_fraction(self, variable: str, ratios: dict[str, float | int]) -> float:
+
+        if variable in self.inert_reactants:
+            return np.nan
+        coefs = self.kernel.reactant_coefs
+        dependents = self._normalize({k: v for k, v in ratios.items() if k != variable})
+        variable_coef = coefs[self.kernel.index[variable]]
+        limit = min( # Moles of reaction per mole of the other reactants when those limit
+            dependents[r] / coefs[self.kernel.index[r]]
+            for r in dependents if r not in self.inert_reactants
+        )
+        return float(variable_coef * limit / (1.0 + variable_coef * limit)) # Solves x / coef = (1 - x) * limit
+
+
+    """
+    Finds the maximum flame temperature and the controlled reactant concentration where it occurs, without computing a flame table.
+    Starts from the stoichiometric point, where the flame temperature has its kink; if a neighbour is hotter (e.g. unequal preheats),
+    steps away from it on that side, doubling the step until the flame temperature drops, then refines the peak within that bracket.
+    A step that leaves the solvable range ends the bracket at the edge of that range instead, and when the stoichiometric point itself has
+    no solution the peak is the nearest solvable point on either side. An inert controlled reactant only dilutes the flame, so its peak is
+    at the lowest concentration with a solution.
+    Returns (concentration, flame temperature)
+    """
+    def find_peak_flame_temp(self, variable: str, ratios: dict[str, float | int], solver: str = DEFAULT_SOLVER, xtol: float = PEAK_XTOL) -> tuple[float, float]:
+
+        solve = lambda x: self.calc_flame_temps(self._concentration_matrix(variable, ratios, np.atleast_1d(x)), solver)
+        lower, upper = xtol, 1.0 - xtol
+        x_stoich = self.stoichiometric_fraction(variable, ratios)
+        if np.isnan(x_stoich): # Inert; cooler with every addition
+            flame_temp = solve(lower)[0]
+            return (float(lower), float(flame_temp)) if not np.isnan(flame_temp) else self._nearest_solvable(solve, lower, upper, xtol, xtol)
+
+        step = max(xtol, 1e-3 * min(x_stoich - lower, upper - x_stoich))
+        x_values = np.array([x_stoich - step, x_stoich, x_stoich + step])
+        below, at, above = solve(x_values)
+        if np.isnan(at): # Too hot for the data; the peak within bounds is at the nearer edge of the solvable range on either side
+            edges = [self._nearest_solvable(solve, x_stoich, limit, step, xtol) for limit in (lower, upper)]
+            return max(edges, key=lambda edge: -np.inf if np.isnan(edge[1]) else edge[1])
+        if not (below > at) and not (above > at):
+            return float(x_stoich), float(at)
+        direction, limit = (1.0, upper) if above > at else (-1.0, lower)
+        near, x_hot, T_hot = x_stoich, x_stoich + direction * step, max(above, below)
+        while x_hot != limit:
+            step *= 2.0
+            x_next = float(np.clip(x_hot + direction * step, lower, upper))
+            T_next = solve(x_next)[0]
+            if np.isnan(T_next): # Left the solvable range; its edge bounds the bracket
+                x_edge, T_edge = self._solvable_edge(solve, x_hot, T_hot, x_next, xtol)
+                x_peak, T_peak = self._bounded_peak(solve, *sorted((near, x_edge)), xtol)
+                return (x_peak, T_peak) if T_peak > T_edge else (x_edge, T_edge)
+            if not (T_next > T_hot): # Dropped; the peak is bracketed
+                return self._bounded_peak(solve, *sorted((near, x_next)), xtol)
+            near, x_hot, T_hot = x_hot, x_next, T_next
+        return float(x_hot), float(T_hot) # Still rising at the end of the range
+
+
+    """
+    Bounded Brent search (golden section with parabolic steps) for the maximum flame temperature on an interval it is unimodal over
+    """
+    def _bounded_peak(self, solve: Callable[[float | list[float]], NDArray[np.float64]], lower: float, upper: float, xtol: float) -> tuple[float, float]:
+
+        def cooling(x: float) -> float:
+            flame_temp = solve(x)[0]
+            return np.inf if np.isnan(flame_temp) else -flame_temp
+
+        result = minimize_scalar(cooling, bounds=(lower, upper), method="bounded", options={"xatol": xtol})
+        return float(result.x), float(-result.fun)
+
+
+    """
+    Nearest concentration to an unsolvable one, towards limit, that has a solution within bounds: steps towards limit, doubling step each time,
+    until a point solves, then bisects back to the edge of the solvable range. Returns (concentration, flame temperature), np.nan if none solves
+    """
+    def _nearest_solvable(self, solve: Callable[[float | list[float]], NDArray[np.float64]], unsolved: float, limit: float, step: float, xtol: float) -> tuple[float, float]:
+
+        direction = np.sign(limit - unsolved)
+        while unsolved != limit:
+            x = float(np.clip(unsolved + direction * step, *sorted((unsolved, limit))))
+            flame_temp = solve(x)[0]
+            if not np.isnan(flame_temp):
+                return self._solvable_edge(solve, x, flame_temp, unsolved, xtol)
+            unsolved, step = x, 2.0 * step
+        return float(limit), np.nan
+
+
+    """
+    Bisects between a solvable and an unsolvable concentration down to xtol. Returns the solvable end: (concentration, flame temperature)
+    """
+    def _solvable_edge(self, solve: Callable[[float | list[float]], NDArray[np.float64]], solved: float, flame_temp: float, unsolved: float, xtol: float) -> tuple[float, float]:
+
+        while abs(unsolved - solved) > xtol:
+            middle = 0.5 * (solved + unsolved)
+            middle_temp = solve(middle)[0]
+            if np.isnan(middle_temp):
+                unsolved = middle
+            else:
+                solved, flame_temp = middle, middle_temp
+        return float(solved), float(flame_temp)
+
+
+@dataclass
+class FlameSeries:
+    reaction: Reaction
+    variable: str # Controlled reactant
+    base_concentrations: dict[str, float | int] # Ratios of the other reactants
+
+
+"""
+Solves the flame tables of several series at once. Series whose reactions share a reactant set (and dissociation) share one reaction setup:
+their concentration rows are stacked, each row carrying its own series' inlet sensible heats, and solved in a single batch (per series with dissociation).
+Returns one flame table (2 x points, as calc_flame_table) per series, in order
+"""
+def calc_flame_tables(series: list[FlameSeries], resolution: int = 100, solver: str = DEFAULT_SOLVER) -> list[NDArray[np.float64]]:
+
+    tables: list[NDArray[np.float64]] = [np.empty((2, 0))] * len(series)
+    for members in _group_by_setup([s.reaction for s in series]).values():
+        setup = series[members[0]].reaction
+        x_values = setup._generate_x_values(resolution)
+        concentrations = np.concatenate([
+            series[i].reaction._concentration_matrix(series[i].variable, series[i].base_concentrations, x_values) for i in members
+        ])
+        inlet_SH = np.repeat(np.stack([series[i].reaction._inlet_SH for i in members]), len(x_values), axis=0)
+        if setup.dissociation: # Equilibrium is solved row by row continuing from the previous one, so stacking gains nothing
+            flame_temps = [
+                setup._calc_flame_temps(rows, row_SH, solver)
+                for rows, row_SH in zip(np.split(concentrations, len(members)), np.split(inlet_SH, len(members)))
+            ]
+        else:
+            flame_temps = setup._calc_flame_temps(concentrations, inlet_SH, solver).reshape(len(members), len(x_values))
+        for i, temps in zip(members, flame_temps):
+            tables[i] = np.stack((x_values, temps))
+    return tables
+
+
+@dataclass
+class FlamePoint:
+    reaction: Reaction
+    concentrations: dict[str, float] # Mole fractions of the reactants, summing to 1
+
+
+"""
+Solves the flame temperatures of many single mixtures at once, each with its own reaction (entry temperatures).
+Points whose reactions share a reactant set (and dissociation) are stacked and solved in one batch, as in calc_flame_tables.
+Returns the flame temperatures in order, np.nan where there is no solution within bounds
+"""
+def calc_flame_points(points: list[FlamePoint], solver: str = DEFAULT_SOLVER) -> NDArray[np.float64]:
+
+    flame_temps = np.empty(len(points))
+    for members in _group_by_setup([p.reaction for p in points]).values():
+        setup = points[members[0]].reaction
+        for i in members:
+            points[i].reaction._validate_concentrations(points[i].concentrations)
+        concentrations = np.stack([setup.kernel.amount_vector(points[i].concentrations) for i in members])
+        inlet_SH = np.stack([points[i].reaction._inlet_SH for i in members])
+        flame_temps[members] = setup._calc_flame_temps(concentrations, inlet_SH, solver)
+    return flame_temps
+
+
+"""
+Indices of the reactions sharing each reaction setup (reactant set and dissociation)
+"""
+def _group_by_setup(reactions: list[Reaction]) -> dict[tuple[frozenset[str], bool, int], list[int]]:
+
+    groups: dict[tuple[frozenset[str], bool, int], list[int]] = {}
+    for i, reaction in enumerate(reactions):
+        key = (frozenset(reaction.reactants), reaction.dissociation, id(reaction.kernel)) # Reactions built before a reload keep their own data
+        groups.setdefault(key, []).append(i)
+    return groups
@@ -0,0 +1,217 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Reaction Kernel Class File
+# ###################
+
+import numpy as np
+from numpy.typing import NDArray
+from domain.compound import Compound
+from domain.root_finding import bracketed_roots, batch_searchsorted
+from services import metrics
+
+ACCUMULATE_MAX_POINTS = 128 # Batches up to this size take running knot extrema with ufunc.accumulate rather than row by row
+
+
+class ReactionKernel:
+
+    def __init__(
+        self,
+        species: list[Compound],
+        stoichiometry: tuple[dict[str, int], dict[str, int]],
+        reactants: set[str],
+        min_temp: float,
+        max_temp: float,
+    ):
+        """
+        Array-backed form of a Reaction's species data, built once so the energy balance is a few dot products.
+        Every array is ordered by the species list; no dictionary or string lookups are needed once built.
+
+        @param species : list[Compound] - Every species in the reaction, reactants and products, in column order.
+        @param stoichiometry : tuple[dict[str, int], dict[str, int]] - Balanced reactant and product coefficients keyed by formula.
+        @param reactants : set[str] - Compound.id strings of the reactants (inert reactants included).
+        @param min_temp : float - Lowest temperature (K) shared by all species data.
+        @param max_temp : float - Highest temperature (K) shared by all species data.
+
+        @attrib ids : list[str] - Compound.id of each column.
+        @attrib index : dict[str, int] - Maps Compound.id to its column.
+        @attrib reactant_coefs : NDArray - Stoichiometric coefficient of each consumed reactant, 0 elsewhere.
+        @attrib product_coefs : NDArray - Stoichiometric coefficient of each product, 0 elsewhere (including dissociation products).
+        @attrib std_Hf : NDArray - Standard heat of formation (kJ/mol) of each species.
+        @attrib SH_knots : NDArray - Merged data temperatures (K) within bounds.
+        @attrib SH_table : NDArray - Sensible heat (kJ/mol) of every species at every knot (knots x species).
+        """
+
+        self._compounds: list[Compound] = species
+        self.ids: list[str] = [c.id for c in species]
+        self.index: dict[str, int] = {c.id: j for j, c in enumerate(species)}
+        self.min_temp: float = min_temp
+        self.max_temp: float = max_temp
+
+        self.reactant_coefs = np.array(
+            [stoichiometry[0][c.formula] if c.id in reactants else 0 for c in species], dtype=np.float64
+        )
+        self.product_coefs = np.array(
+            [stoichiometry[1].get(c.formula, 0) if c.id not in reactants else 0 for c in species], dtype=np.float64
+        )
+        self._net_coefs = self.product_coefs - self.reactant_coefs
+        self._reactive = self.reactant_coefs > 0
+        self.std_Hf = np.array([c.stdHf for c in species], dtype=np.float64)
+
+        self.piecewise_linear: bool = all(c.is_piecewise_linear() for c in species)
+        knots = np.unique(np.concatenate([c.get_temperatures() for c in species]))
+        self.SH_knots = knots[(knots >= min_temp) & (knots <= max_temp)]
+        self.SH_table = np.ascontiguousarray(np.column_stack([c.SH(self.SH_knots) for c in species])) # knots x species
+        self._SH_monotonic = bool(np.all(np.diff(self.SH_table, axis=0) >= 0.0))
+
+
+    def amount_vector(self, amounts: dict[str, float]) -> NDArray[np.float64]:
+
+        """
+        Turns a Compound.id -> amount dictionary into a vector in column order. Missing species are 0.
+        """
+
+        return np.array([amounts.get(s, 0.0) for s in self.ids], dtype=np.float64)
+
+
+    def inlet_SH(self, temperatures: dict[str, float]) -> NDArray[np.float64]:
+
+        """
+        Returns the sensible heat (kJ/mol) of each reactant at its entry temperature (K); 0 for products.
+        """
+
+        return np.array(
+            [c.SH(temperatures[c.id]) if c.id in temperatures else 0.0 for c in self._compounds], dtype=np.float64
+        )
+
+
+    def final_amounts(self, initial_amounts: NDArray[np.float64]) -> NDArray[np.float64]:
+
+        """
+        Returns final amounts of every species after complete reaction, limited by the scarcest reactive species.
+        Accepts one amount vector or a 2D array (points x species).
+        """
+
+        extents = np.min(initial_amounts[..., self._reactive] / self.reactant_coefs[self._reactive], axis=-1)
+        return initial_amounts + np.multiply.outer(extents, self._net_coefs)
+
+
+    def target_SH(self, initial_amounts: NDArray[np.float64], final_amounts: NDArray[np.float64], inlet_SH: NDArray[np.float64]) -> NDArray[np.float64]:
+
+        """
+        Temperature independent terms of the energy balance; the sensible heat (kJ) the final mixture must reach.
+        SH_initial + Hf_initial - Hf_final
+        """
+
+        return self.inlet_enthalpy(initial_amounts, inlet_SH) - final_amounts @ self.std_Hf
+
+
+    def inlet_enthalpy(self, initial_amounts: NDArray[np.float64], inlet_SH: NDArray[np.float64]) -> NDArray[np.float64]:
+
+        """
+        Total enthalpy (kJ) entering with the reactants, sensible heat and heat of formation; conserved by an adiabatic flame.
+        inlet_SH is one vector for every row, or one row per row of initial_amounts (rows with different entry temperatures).
+        """
+
+        if inlet_SH.ndim == 1:
+            return initial_amounts @ (inlet_SH + self.std_Hf)
+        return np.sum(initial_amounts * (inlet_SH + self.std_Hf), axis=-1)
+
+
+    def species_SH(self, temperatures: float | NDArray[np.float64]) -> NDArray[np.float64]:
+
+        """
+        Returns the sensible heat (kJ/mol) of every species at each temperature (K); shape (species,) or (points x species).
+        Interpolates the stacked knot table when every species is piecewise linear, otherwise evaluates each spline.
+        """
+
+        if not self.piecewise_linear:
+            return np.stack([np.asarray(c.SH(temperatures)) for c in self._compounds], axis=-1)
+        upper = np.clip(np.searchsorted(self.SH_knots, temperatures), 1, len(self.SH_knots) - 1)
+        T_low, T_high = self.SH_knots[upper - 1], self.SH_knots[upper]
+        fraction = np.asarray((temperatures - T_low) / (T_high - T_low))
+        SH_low, SH_high = self.SH_table[upper - 1], self.SH_table[upper]
+        return SH_low + fraction[..., np.newaxis] * (SH_high - SH_low)
+
+
+    @metrics.counted("energy_balance_evaluations_total")
+    def energy_balance(self, temperature: float, final_amounts: NDArray[np.float64], target_SH: float) -> float:
+
+        """
+        Residual (kJ) of the energy balance at a temperature (K) for one final amount vector.
+        """
+
+        return float(final_amounts @ self.species_SH(temperature) - target_SH)
+
+
+    def solve(self, final_amounts: NDArray[np.float64], target_SH: NDArray[np.float64], exact: bool = True) -> NDArray[np.float64]:
+
+        """
+        Solves the flame temperature (K) of every row of final amounts (points x species). Points with no root in bounds are np.nan.
+        Exact inversion is used when possible, root-finding for the rest.
+        """
+
+        if exact and self.piecewise_linear:
+            flame_temps, solved = self._invert_SH(final_amounts, target_SH)
+        else:
+            flame_temps, solved = np.full(len(target_SH), np.nan), np.zeros(len(target_SH), dtype=bool)
+        if not np.all(solved): # Non-monotonic data (or higher order splines) falls back to iteration
+            flame_temps[~solved] = self._root_find_SH(final_amounts[~solved], target_SH[~solved])
+        if metrics.ENABLED:
+            metrics.registry.inc("flame_temperature_points_total", int(np.count_nonzero(solved)), method="exact")
+            metrics.registry.inc("flame_temperature_points_total", int(np.count_nonzero(~solved)), method="iterative")
+        return flame_temps
+
+
+    def _root_find_SH(self, final_amounts: NDArray[np.float64], target_SH: NDArray[np.float64]) -> NDArray[np.float64]:
+
+        """
+        Root-finds the temperature at which each final mixture's sensible heat reaches its target.
+        """
+
+        def residuals(temperatures: NDArray[np.float64], rows: NDArray[np.intp]) -> NDArray[np.float64]:
+            return np.einsum("ij,ij->i", final_amounts[rows], self.species_SH(temperatures)) - target_SH[rows]
+
+        lower = np.full(len(target_SH), self.min_temp)
+        upper = np.full(len(target_SH), self.max_temp)
+        residuals = metrics.counted("energy_balance_evaluations_total", lambda temperatures, rows: len(rows))(residuals)
+        iterations = np.zeros(len(target_SH), dtype=np.int64) if metrics.ENABLED else None
+        roots = bracketed_roots(residuals, lower, upper, iterations=iterations)
+        if iterations is not None:
+            metrics.observe_each("root_finder_iterations", iterations.tolist(), metrics.ITERATION_BUCKETS)
+        return roots
+
+
+    def _invert_SH(self, final_amounts: NDArray[np.float64], target_SH: NDArray[np.float64]) -> tuple[NDArray[np.float64], NDArray[np.bool_]]:
+
+        """
+        Exact flame temperatures for piecewise linear sensible heats. The final mixture's sensible heat is linear between knots,
+        so the first knot segment reaching the target is found by binary search and solved in closed form.
+        Also returns which points were solved; a point is left unsolved when the data is non-monotonic and the mixture dips
+        back below the target after that segment (more than one root).
+        """
+
+        knot_SH = self.SH_table @ final_amounts.T # knots x points; accumulates below run along contiguous rows
+        if self._SH_monotonic: # Every mixture of non-negative amounts is monotonic too
+            running_max = suffix_min = knot_SH
+        elif knot_SH.shape[1] <= ACCUMULATE_MAX_POINTS: # A few points: one accumulate call beats a Python loop over the knots
+            running_max = np.maximum.accumulate(knot_SH, axis=0)
+            suffix_min = np.minimum.accumulate(knot_SH[::-1], axis=0)[::-1]
+        else:
+            running_max, suffix_min = knot_SH.copy(), knot_SH.copy()
+            for k in range(1, len(knot_SH)): # Row by row is much faster than ufunc.accumulate along axis 0
+                np.maximum(running_max[k - 1], running_max[k], out=running_max[k])
+                np.minimum(suffix_min[-k], suffix_min[-k - 1], out=suffix_min[-k - 1])
+        mixture_SH, running_max, suffix_min = knot_SH.T, running_max.T, suffix_min.T # points x knots views
+        in_bounds = (target_SH >= mixture_SH[:, 0]) & (target_SH <= mixture_SH[:, -1])
+        upper = np.clip(batch_searchsorted(running_max, target_SH), 1, len(self.SH_knots) - 1)
+        rows = np.arange(len(target_SH))
+        SH_low, SH_high = mixture_SH[rows, upper - 1], mixture_SH[rows, upper]
+        T_low, T_high = self.SH_knots[upper - 1], self.SH_knots[upper]
+        span = SH_high - SH_low
+        fraction = np.divide(target_SH - SH_low, span, out=np.zeros_like(span), where=span > 0)
+        flame_temps = T_low + fraction * (T_high - T_low)
+        solved = ~in_bounds | (suffix_min[rows, upper] >= target_SH)
+        return np.where(in_bounds, flame_temps, np.nan), solved
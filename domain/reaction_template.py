@@ -0,0 +1,196 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Reaction Template File
+# ###################
+
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from threading import Lock
+from typing import NamedTuple
+import numpy as np
+from config import INERTS, products_from_reactants
+from domain.compound import Compound
+from domain.compounds import compounds
+from domain.equilibrium import EquilibriumSolver
+from domain.reaction_kernel import ReactionKernel
+from domain.stoichiometry import balance_stoichiometry
+
+TEMPLATE_CACHE_SIZE = 64
+
+
+"""
+Everything about a reaction that depends only on its reactant set and dissociation flag, not on entry temperatures or concentrations.
+Shared between Reaction objects, so treat every attribute as read-only
+"""
+@dataclass(frozen=True)
+class ReactionTemplate:
+    reactants: frozenset[str]
+    inert_reactants: frozenset[str]
+    products: frozenset[str]
+    stoichiometry: tuple[dict[str, int], dict[str, int]]
+    species: tuple[str, ...]
+    min_temp: float
+    max_temp: float
+    kernel: ReactionKernel
+    equilibrium: EquilibriumSolver | None # Only built for dissociating reactions
+    data_hashes: dict[str, str] # Compound.content_hash of every species, as built
+    dependencies: frozenset[str] # Compounds whose data the template depends on: the species and every candidate product
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+"""
+Balances the complete reaction of the active reactants; inert reactants get a coefficient of 0
+"""
+def _balance(
+    reactants: frozenset[str], inert_reactants: set[str], products: set[str], snapshot: Mapping[str, Compound]
+) -> tuple[dict[str, int], dict[str, int]]:
+
+    reactant_strs = {snapshot[r].formula for r in reactants - inert_reactants}
+    product_strs = {snapshot[p].formula for p in products}
+    balanced_reactants, balanced_products = balance_stoichiometry(
+        reactant_strs, product_strs
+    )
+    for inert in inert_reactants:
+        balanced_reactants[snapshot[inert].formula] = 0
+    return balanced_reactants, balanced_products
+
+
+"""
+Finds minimum and maximum shared temperatures from species data. Prevents extrapolation
+"""
+def _temperature_bounds(species: tuple[str, ...], snapshot: Mapping[str, Compound]) -> tuple[float, float]:
+
+    min_temp = 0.0
+    max_temp = np.inf
+    for component in species:
+        temperatures = snapshot[component].get_temperatures()
+        min_temp = max(min_temp, np.min(temperatures))
+        max_temp = min(max_temp, np.max(temperatures))
+    return float(min_temp), float(max_temp)
+
+
+"""
+Does the reactant-set dependent work of building a Reaction: product selection, balancing, temperature bounds and the kernel arrays.
+Every compound is read from one snapshot (default the registry as it is now)
+"""
+def build_reaction_template(reactants: frozenset[str], dissociation: bool = False, snapshot: Mapping[str, Compound] | None = None) -> ReactionTemplate:
+
+    snapshot = compounds.snapshot() if snapshot is None else snapshot
+    products, inert_reactants = products_from_reactants(set(reactants), dissociation)
+    complete_products = compounds.element_index().complete_products(reactants - inert_reactants) if dissociation else products # Cached lookup
+    stoichiometry = _balance(reactants, inert_reactants, complete_products, snapshot) # Dissociation products are found by the equilibrium solve instead
+    species = tuple(sorted(reactants | products))
+    min_temp, max_temp = _temperature_bounds(species, snapshot)
+    species_compounds = [snapshot[s] for s in species]
+    kernel = ReactionKernel(
+        species_compounds,
+        stoichiometry,
+        set(reactants),
+        min_temp,
+        max_temp,
+    )
+    equilibrium = EquilibriumSolver(species_compounds, min_temp, max_temp) if dissociation else None
+    return ReactionTemplate(
+        reactants=reactants,
+        inert_reactants=frozenset(inert_reactants),
+        products=frozenset(products),
+        stoichiometry=stoichiometry,
+        species=species,
+        min_temp=min_temp,
+        max_temp=max_temp,
+        kernel=kernel,
+        equilibrium=equilibrium,
+        data_hashes={c.id: c.content_hash for c in species_compounds},
+        dependencies=frozenset(species) | compounds.element_index().compounds_within(reactants - INERTS),
+    )
+
+
+class TemplateCache:
+
+    def __init__(self, maxsize: int = TEMPLATE_CACHE_SIZE):
+        """
+        Bounded least-recently-used cache of ReactionTemplates keyed by (reactant set, dissociation flag). Thread safe.
+        Only templates built entirely from the current compound data are stored; see invalidate for reloads.
+
+        @param maxsize : int - Most templates kept before the least recently used is evicted.
+        """
+
+        self.maxsize: int = maxsize
+        self._templates: OrderedDict[tuple[frozenset[str], bool], ReactionTemplate] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+
+    def get(self, reactants: set[str] | frozenset[str], dissociation: bool = False) -> ReactionTemplate:
+
+        """
+        Returns the template for a reactant set, building and caching it on a miss.
+        """
+
+        key = (frozenset(reactants), dissociation)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                self._hits += 1
+                return template
+            self._misses += 1
+        while True:
+            snapshot = compounds.snapshot()
+            template = build_reaction_template(*key, snapshot) # Built outside the lock so other reactant sets are not blocked
+            with self._lock:
+                if not snapshot.is_current(): # Compounds were reloaded during the build; it may mix old and new data
+                    continue
+                self._templates[key] = template
+                self._templates.move_to_end(key)
+                while len(self._templates) > self.maxsize:
+                    self._templates.popitem(last=False)
+                    self._evictions += 1
+            return template
+
+
+    def invalidate(self, ids: Iterable[str]) -> int:
+
+        """
+        Drops the templates that depend on any of the given compounds, e.g. after their data was reloaded. Returns how many were dropped.
+        """
+
+        ids = set(ids)
+        with self._lock:
+            stale = [key for key, template in self._templates.items() if template.dependencies & ids]
+            for key in stale:
+                del self._templates[key]
+        return len(stale)
+
+
+    def info(self) -> CacheInfo:
+
+        """
+        Returns hit, miss and eviction counts with the current and maximum size, for monitoring.
+        """
+
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, len(self._templates), self.maxsize)
+
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._templates.clear()
+            self._hits = self._misses = self._evictions = 0
+
+
+template_cache = TemplateCache()
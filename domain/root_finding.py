@@ -0,0 +1,94 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Vectorized Root Finding File
+# ###################
+
+from collections.abc import Callable
+import numpy as np
+from numpy.typing import NDArray
+
+XTOL = 2e-12  # Same absolute and relative tolerances as scipy's brentq
+RTOL = 4 * np.finfo(float).eps
+MAX_ITER = 100
+
+
+def bracketed_roots(
+    func: Callable[[NDArray[np.float64], NDArray[np.intp]], NDArray[np.float64]],
+    lower: NDArray[np.float64],
+    upper: NDArray[np.float64],
+    xtol: float = XTOL,
+    rtol: float = RTOL,
+    max_iter: int = MAX_ITER,
+    iterations: NDArray[np.int64] | None = None,
+) -> NDArray[np.float64]:
+
+    """
+    Finds a root of many independent functions at once using the Illinois (modified regula falsi) method.
+    Every function keeps its own bracket; converged functions are dropped from later evaluations.
+
+    @param func : Callable - func(x, rows) returns the residual of each function in rows at the matching entry of x
+    @param lower : NDArray - Lower bracket of each function
+    @param upper : NDArray - Upper bracket of each function
+    @param iterations : NDArray | None - If given, the number of iterations each function took is added to it (for instrumentation)
+    @return NDArray - Root of each function, np.nan where the bracket does not contain a sign change
+    """
+
+    rows = np.arange(len(lower))
+    a = np.asarray(lower, dtype=np.float64).copy()
+    b = np.asarray(upper, dtype=np.float64).copy()
+    fa = func(a, rows)
+    fb = func(b, rows)
+    roots = np.full(len(rows), np.nan)
+
+    roots[fa == 0.0] = a[fa == 0.0]
+    roots[fb == 0.0] = b[fb == 0.0]
+    active = (fa * fb < 0.0)
+    rows, a, b, fa, fb = rows[active], a[active], b[active], fa[active], fb[active]
+
+    for _ in range(max_iter):
+        if len(rows) == 0:
+            break
+        c = (a * fb - b * fa) / (fb - fa)
+        c = np.where(np.isfinite(c), c, 0.5 * (a + b))  # Falls back to bisection on a degenerate secant
+        fc = func(c, rows)
+        if iterations is not None:
+            iterations[rows] += 1
+
+        sign_change = (fc * fb < 0.0)
+        a = np.where(sign_change, b, a)
+        fa = np.where(sign_change, fb, 0.5 * fa)  # Illinois step halves the retained end's residual
+        b, fb = c, fc
+
+        converged = (fb == 0.0) | (np.abs(b - a) <= xtol + rtol * np.abs(b))
+        roots[rows[converged]] = b[converged]
+        keep = ~converged
+        rows, a, b, fa, fb = rows[keep], a[keep], b[keep], fa[keep], fb[keep]
+
+    roots[rows] = b  # Best estimate for anything that ran out of iterations
+    return roots
+
+
+def batch_searchsorted(sorted_rows: NDArray[np.float64], values: NDArray[np.float64]) -> NDArray[np.intp]:
+
+    """
+    Row-wise np.searchsorted (side="left"); finds where values[i] would be inserted into sorted_rows[i] with one binary search per row.
+
+    @param sorted_rows : NDArray - 2D array whose rows are each sorted ascending
+    @param values : NDArray - One value per row
+    @return NDArray - Insertion index of each value within its row
+    """
+
+    n_rows, n_cols = sorted_rows.shape
+    row_index = np.arange(n_rows)
+    low = np.zeros(n_rows, dtype=np.intp)
+    high = np.full(n_rows, n_cols, dtype=np.intp)
+    while np.any(low < high):
+        searching = low < high
+        mid = (low + high) // 2
+        go_right = searching & (sorted_rows[row_index, np.minimum(mid, n_cols - 1)] < values)
+        low = np.where(go_right, mid + 1, low)
+        high = np.where(searching & ~go_right, mid, high)
+    return low
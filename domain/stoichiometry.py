@@ -0,0 +1,120 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Stoichiometry File
+# ###################
+
+from collections import OrderedDict
+from collections.abc import Iterable
+from fractions import Fraction
+from functools import lru_cache
+from math import gcd, lcm
+from domain.formula import parse_formula
+
+
+"""
+Balances a reaction from the element matrix of its formulas, e.g. ({"CH4", "O2"}, {"CO2", "H2O"}) -> ({"CH4": 1, "O2": 2}, {"CO2": 1, "H2O": 2}).
+Returns the smallest whole-number coefficients, keyed by formula in alphabetical order (the same structure chempy.balance_stoichiometry returns).
+Raises ValueError if the reaction cannot be balanced, or has more than one independent balance (e.g. too many products).
+Results are memoized; each call returns fresh dictionaries, so callers may change them
+"""
+def balance_stoichiometry(reactants: Iterable[str], products: Iterable[str], cross_check: bool = False) -> tuple[OrderedDict[str, int], OrderedDict[str, int]]:
+
+    """
+    @param reactants : Iterable[str] - Formulas of the reactants
+    @param products : Iterable[str] - Formulas of the products
+    @param cross_check : bool - Also balance with chempy (if installed) and raise AssertionError if the results differ
+    """
+
+    reactants, products = tuple(sorted(set(reactants))), tuple(sorted(set(products)))
+    coefficients = _balance(reactants, products)
+    balanced_reactants = OrderedDict(zip(reactants, coefficients[:len(reactants)]))
+    balanced_products = OrderedDict(zip(products, coefficients[len(reactants):]))
+    if cross_check:
+        _cross_check(reactants, products, balanced_reactants, balanced_products)
+    return balanced_reactants, balanced_products
+
+
+@lru_cache(maxsize=None)
+def _balance(reactants: tuple[str, ...], products: tuple[str, ...]) -> tuple[int, ...]:
+
+    """
+    Coefficients of reactants then products: the integer null space of the element matrix, with products counted negative.
+    """
+
+    formulas = reactants + products
+    if not reactants or not products:
+        raise ValueError("A reaction needs at least one reactant and one product to balance.")
+    compositions = [parse_formula(f) for f in formulas]
+    elements = sorted(set().union(*compositions))
+    signs = [1] * len(reactants) + [-1] * len(products)
+    matrix = [[Fraction(sign * c.get(e, 0)) for c, sign in zip(compositions, signs)] for e in elements]
+
+    pivots = _row_reduce(matrix)
+    free = [j for j in range(len(formulas)) if j not in pivots]
+    if len(free) != 1:
+        raise ValueError(
+            f"Reaction {' + '.join(reactants)} -> {' + '.join(products)} "
+            + ("cannot be balanced." if not free else "has more than one independent balance.")
+        )
+    solution = [Fraction(0)] * len(formulas)
+    solution[free[0]] = Fraction(1)
+    for row, column in enumerate(pivots):
+        solution[column] = -matrix[row][free[0]]
+    scale = lcm(*(s.denominator for s in solution))
+    coefficients = [int(s * scale) for s in solution]
+    divisor = gcd(*coefficients)
+    coefficients = [c // divisor for c in coefficients]
+    if all(c < 0 for c in coefficients):
+        coefficients = [-c for c in coefficients]
+    if any(c <= 0 for c in coefficients):
+        raise ValueError(f"Reaction {' + '.join(reactants)} -> {' + '.join(products)} cannot be balanced with every species taking part.")
+    return tuple(coefficients)
+
+
+"""
+Reduces a matrix of Fractions to reduced row echelon form in place; returns the pivot column of each nonzero row
+"""
+def _row_reduce(matrix: list[list[Fraction]]) -> list[int]:
+
+    pivots: list[int] = []
+    row = 0
+    num_columns = len(matrix[0]) if matrix else 0
+    for column in range(num_columns):
+        pivot = next((r for r in range(row, len(matrix)) if matrix[r][column] != 0), None)
+        if pivot is None:
+            continue
+        matrix[row], matrix[pivot] = matrix[pivot], matrix[row]
+        lead = matrix[row][column]
+        matrix[row] = [value / lead for value in matrix[row]]
+        for r in range(len(matrix)):
+            if r != row and matrix[r][column] != 0:
+                factor = matrix[r][column]
+                matrix[r] = [a - factor * b for a, b in zip(matrix[r], matrix[row])]
+        pivots.append(column)
+        row += 1
+        if row == len(matrix):
+            break
+    return pivots
+
+
+"""
+Compares a balance against chempy's; only imports chempy when asked to
+"""
+def _cross_check(
+    reactants: tuple[str, ...],
+    products: tuple[str, ...],
+    balanced_reactants: OrderedDict[str, int],
+    balanced_products: OrderedDict[str, int],
+) -> None:
+
+    try:
+        import chempy
+    except ImportError as error:
+        raise ImportError("The stoichiometry cross-check needs chempy; install it with the 'chempy' extra.") from error
+    chempy_reactants, chempy_products = chempy.balance_stoichiometry(set(reactants), set(products))
+    expected = ({k: int(v) for k, v in chempy_reactants.items()}, {k: int(v) for k, v in chempy_products.items()})
+    if expected != (dict(balanced_reactants), dict(balanced_products)):
+        raise AssertionError(f"Balance {dict(balanced_reactants)} -> {dict(balanced_products)} differs from chempy's {expected[0]} -> {expected[1]}")
@@ -0,0 +1,181 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Binary Data Store File
+# ###################
+
+import glob
+import hashlib
+import json
+import os
+from threading import Lock
+import numpy as np
+from domain.compound_data import CompoundData
+from services.comp_loader import DATA_FILE, NUMERIC_COLUMNS, data_content_hash, data_source_path, parse_data_source
+
+BINARY_FILE = "thermochemical_data.bin"
+INDEX_FILE = "thermochemical_data.index.json"
+COLUMNS = NUMERIC_COLUMNS # Order of the column blocks in the binary file
+FORMAT_VERSION = 3
+
+_store_lock = Lock()
+_store: "BinaryStore | None" = None
+
+
+"""
+Compiles the editable data (the CSV, or its segment store when one exists) into the binary store: one contiguous float64 block per column,
+with each compound's rows adjacent, and a JSON index of compound -> (offset, length) tagged with the data's content hash.
+The blocks go to a new file named after their content (thermochemical_data.<hash>.bin), which the index names; replacing the index
+is the single step that switches readers over, so no reader pairs new blocks with old offsets
+"""
+def build_binary_store(csv_path: str = DATA_FILE, binary_path: str = BINARY_FILE, index_path: str = INDEX_FILE) -> dict:
+
+    table = parse_data_source(csv_path)
+    blocks = np.stack([table.columns[column] for column in COLUMNS])
+    rows = blocks.shape[1]
+
+    stat = os.stat(data_source_path(csv_path))
+    index = {
+        "version": FORMAT_VERSION,
+        "data_sha256": data_content_hash(csv_path),
+        "data_signature": [stat.st_mtime_ns, stat.st_size],
+        "rows": rows,
+        "columns": COLUMNS,
+        "compounds": {id: [span.start, span.stop - span.start] for id, span in table.slices.items()},
+    }
+    content = blocks.tobytes()
+    stem, extension = os.path.splitext(binary_path)
+    index["binary"] = os.path.basename(f"{stem}.{hashlib.sha256(content).hexdigest()[:16]}{extension}")
+    previous = _read_index(index_path)
+    if not os.path.exists(blocks_path(binary_path, index)): # Same name means same content
+        _atomic_write(blocks_path(binary_path, index), content)
+    _atomic_write(index_path, json.dumps(index).encode())
+    _remove_stale_blocks(binary_path, index, previous)
+    return index
+
+
+"""
+Path of the blocks file an index names, in the folder of binary_path
+"""
+def blocks_path(binary_path: str, index: dict) -> str:
+
+    return os.path.join(os.path.dirname(binary_path), index["binary"])
+
+
+def _read_index(index_path: str) -> dict | None:
+
+    try:
+        with open(index_path) as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+"""
+Deletes blocks files neither the new nor the previous index names; the previous one is kept a generation for readers that opened its index
+before the swap. Files still mapped elsewhere (which Windows will not delete) are left for the next build
+"""
+def _remove_stale_blocks(binary_path: str, index: dict, previous: dict | None) -> None:
+
+    keep = {index["binary"], (previous or {}).get("binary")}
+    stem, extension = os.path.splitext(binary_path)
+    stale = [path for path in glob.glob(f"{glob.escape(stem)}.*{extension}") if os.path.basename(path) not in keep]
+    if os.path.exists(binary_path): # Unversioned blocks file of earlier formats
+        stale.append(binary_path)
+    for path in stale:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _atomic_write(path: str, content: bytes) -> None:
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(content)
+    os.replace(temp_path, path)
+
+
+"""
+Returns the index of an up to date binary store, rebuilding it when the data's content hash no longer matches.
+Only rehashes the data when the modification time or size of the CSV (or segment manifest) changed
+"""
+def ensure_binary_store(csv_path: str = DATA_FILE, binary_path: str = BINARY_FILE, index_path: str = INDEX_FILE) -> dict:
+
+    index = _read_index(index_path)
+    if index is None or index.get("version") != FORMAT_VERSION or not os.path.exists(blocks_path(binary_path, index)):
+        return build_binary_store(csv_path, binary_path, index_path)
+    stat = os.stat(data_source_path(csv_path))
+    if index["data_signature"] == [stat.st_mtime_ns, stat.st_size]:
+        return index
+    if index["data_sha256"] != data_content_hash(csv_path):
+        return build_binary_store(csv_path, binary_path, index_path)
+    index["data_signature"] = [stat.st_mtime_ns, stat.st_size] # Touched but unchanged; skip hashing next time
+    _atomic_write(index_path, json.dumps(index).encode())
+    return index
+
+
+class BinaryStore:
+
+    def __init__(self, binary_path: str = BINARY_FILE, index_path: str = INDEX_FILE, csv_path: str = DATA_FILE):
+        """
+        Memory-maps the binary store; compound data is handed out as zero-copy views, so memory use does not grow with the database.
+
+        @param binary_path : str - Base name of the column blocks files written by build_binary_store; the index names the current one.
+        @param index_path : str - JSON index written by build_binary_store.
+        @param csv_path : str - Editable CSV the store is compiled from (or from its segment store); the store is rebuilt first if it is out of date.
+        """
+
+        index = ensure_binary_store(csv_path, binary_path, index_path)
+        self.compounds: dict[str, list[int]] = index["compounds"]
+        self.data_sha256: str = index["data_sha256"]
+        self._columns = {column: i for i, column in enumerate(index["columns"])}
+        self._blocks = np.memmap(blocks_path(binary_path, index), dtype=np.float64, mode="r", shape=(len(index["columns"]), index["rows"]))
+
+
+    def load_many(self, ids) -> dict[str, CompoundData]:
+
+        return {id: self.load(id) for id in ids}
+
+
+    def load(self, id: str) -> CompoundData:
+
+        offset, length = self.compounds[id]
+        rows = slice(offset, offset + length)
+        column = lambda name: self._blocks[self._columns[name], rows]
+        return CompoundData(
+            temperatures=column("T"),
+            Cf_list=column("Cf"),
+            S_list=column("S"),
+            DS_list=column("(G-H)/T"),
+            SH_list=column("SH"),
+            Hf_list=column("Hf"),
+            Gf_list=column("G"),
+            logKf_list=column("logKf"),
+        )
+
+
+"""
+Returns the process-wide BinaryStore, opening (and if needed rebuilding) it on first use
+"""
+def get_binary_store() -> BinaryStore:
+
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BinaryStore()
+        return _store
+
+
+"""
+Loads CompoundData from the memory-mapped binary store; a drop-in replacement for CompoundLoader
+"""
+class BinaryCompoundLoader:
+    def load(self, id) -> CompoundData:
+        return get_binary_store().load(id)
+
+    def load_many(self, ids) -> dict[str, CompoundData]:
+        return get_binary_store().load_many(ids)
@@ -7,48 +7,135 @@
 # ###################
 
 from domain.compound_data import CompoundData
+from dataclasses import dataclass
+from functools import lru_cache
+import hashlib
+import os
+from threading import Lock
 import numpy as np
 from numpy.typing import NDArray
-import pandas as pd
 
 STANDARD_REF_TEMP = 298.15
 
 DATA_FILE = "thermochemical_data.csv"
-TD: pd.DataFrame = pd.read_csv(DATA_FILE)
+HASH_BLOCK_SIZE = 1024 * 1024
+NUMERIC_COLUMNS = ["T", "Cf", "S", "(G-H)/T", "SH", "Hf", "G", "logKf"]
+CSV_DTYPES = {"Compound": str} | {column: np.float64 for column in NUMERIC_COLUMNS} # 'inf' entries parse natively as np.inf
+
+_hash_lock = Lock()
+_hash_memo: dict[str, tuple[tuple[int, int], str]] = {}
+
+
+"""
+Thermochemical data grouped by compound: one contiguous float64 array per column, with each compound's rows adjacent
+"""
+@dataclass(frozen=True)
+class GroupedTable:
+    columns: dict[str, NDArray[np.float64]]
+    slices: dict[str, slice]
+
+    def compound_data(self, id: str) -> CompoundData:
+
+        rows = self.slices[id]
+        return CompoundData(
+            temperatures=self.columns["T"][rows],
+            Cf_list=self.columns["Cf"][rows],
+            S_list=self.columns["S"][rows],
+            DS_list=self.columns["(G-H)/T"][rows],
+            SH_list=self.columns["SH"][rows],
+            Hf_list=self.columns["Hf"][rows],
+            Gf_list=self.columns["G"][rows],
+            logKf_list=self.columns["logKf"][rows],
+        )
+
+
+"""
+Parses a data file once with explicit float dtypes and groups its rows by compound (in order of first appearance)
+"""
+def parse_data_file(path: str = DATA_FILE) -> GroupedTable:
+
+    import pandas as pd # Deferred; only needed when the CSV itself is parsed, not when loading from the binary store
+    table = pd.read_csv(path, dtype=CSV_DTYPES)
+    codes, names = pd.factorize(table["Compound"])
+    order = np.argsort(codes, kind="stable") # Keeps each compound's rows in file order
+    counts = np.bincount(codes, minlength=len(names))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    columns = {column: table[column].to_numpy(dtype=np.float64)[order] for column in NUMERIC_COLUMNS}
+    slices = {str(name): slice(int(start), int(start + count)) for name, start, count in zip(names, starts, counts)}
+    return GroupedTable(columns=columns, slices=slices)
+
+
+"""
+Parses the thermochemical data: from the segment store next to csv_path when one exists (see services.segment_store), else from csv_path itself
+"""
+def parse_data_source(csv_path: str = DATA_FILE) -> GroupedTable:
+
+    from services.segment_store import SegmentStore, segment_dir
+    store = SegmentStore(segment_dir(csv_path))
+    if store.exists():
+        return store.read_table()
+    return parse_data_file(csv_path)
+
+
+"""
+Parses the data the first time it is needed rather than at import
+"""
+@lru_cache(maxsize=1)
+def load_table() -> GroupedTable:
+
+    return parse_data_source(DATA_FILE)
+
+
+"""
+Returns the sha256 of a data file's contents. Memoized on the file's modification time and size so it is only rehashed when it changes
+"""
+def file_content_hash(path: str = DATA_FILE) -> str:
+
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _hash_lock:
+        memo = _hash_memo.get(path)
+        if memo is not None and memo[0] == signature:
+            return memo[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while block := file.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    with _hash_lock:
+        _hash_memo[path] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+
+"""
+Returns the file that changes whenever the data does (the segment manifest when a segment store exists, else csv_path)
+"""
+def data_source_path(csv_path: str = DATA_FILE) -> str:
+
+    from services.segment_store import SegmentStore, segment_dir
+    store = SegmentStore(segment_dir(csv_path))
+    return store.manifest_path if store.exists() else csv_path
+
+
+"""
+Returns the sha256 identifying the data: the segment store's content hash when one exists (read from its manifest alone), else the CSV's
+"""
+def data_content_hash(csv_path: str = DATA_FILE) -> str:
+
+    from services.segment_store import SegmentStore, segment_dir
+    store = SegmentStore(segment_dir(csv_path))
+    if store.exists():
+        return store.content_hash()
+    return file_content_hash(csv_path)
 
 
 """
 Reads thermochemical data from CSV file and loads it into CompoundData objects.
+The file is parsed once per process; every compound's arrays are views into the grouped columns.
 """
 class CompoundLoader:
     def load(self, id) -> CompoundData:
-        data_table = TD[TD["Compound"] == id]
-
-        temperatures = data_table["T"].to_numpy(dtype=np.float64)
-        Cf_list = data_table["Cf"].to_numpy(dtype=np.float64)
-        S_list = data_table["S"].to_numpy(dtype=np.float64)
-        DS_list = self._convert_infs(data_table["(G-H)/T"].to_numpy()) # data includes 'inf' strings
-        SH_list = data_table["SH"].to_numpy(dtype=np.float64)
-        Hf_list = data_table["Hf"].to_numpy(dtype=np.float64)
-        Gf_list = data_table["G"].to_numpy(dtype=np.float64)
-        logKf_list = self._convert_infs(data_table["logKf"].to_numpy()) # data includes 'inf' strings
-
-        compound_data = CompoundData(
-            temperatures=temperatures,
-            Cf_list=Cf_list,
-            S_list=S_list,
-            DS_list=DS_list,
-            SH_list=SH_list,
-            Hf_list=Hf_list,
-            Gf_list=Gf_list,
-            logKf_list=logKf_list,
-        )
-
-        return compound_data
+        return load_table().compound_data(id)
 
-    def _convert_infs(self, series: NDArray) -> NDArray:
-        converted_list = np.copy(series)
-        for i in range(len(series)):
-            if series[i] == "inf":
-                converted_list[i] = np.inf
-        return converted_list
+    def load_many(self, ids) -> dict[str, CompoundData]:
+        table = load_table()
+        return {id: table.compound_data(id) for id in ids}
@@ -0,0 +1,260 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Compute API File
+# ###################
+
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass
+import logging
+import math
+from threading import Condition, Thread
+import time
+from services import metrics
+
+API_PATH = "/api/flame-temperature"
+BATCH_WINDOW_SECONDS = 0.005 # How long the first query of a batch waits for others to join it
+MAX_BATCH_SIZE = 4096 # Queries solved together at most
+MAX_IN_FLIGHT = 20000 # Queries queued or being solved; requests beyond this are shed with 503
+REQUEST_TIMEOUT_SECONDS = 30.0
+RETRY_AFTER_SECONDS = 1
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+
+class Overloaded(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class FlameQuery:
+    temperatures: tuple[tuple[str, float], ...] # (Compound.id, entry temperature (K)) of every reactant, sorted
+    concentrations: tuple[tuple[str, float], ...] # (Compound.id, mole fraction), sorted; normalized from the given amounts
+    dissociation: bool
+    solver: str
+
+
+"""
+Validates one JSON query and normalizes its amounts to mole fractions. Raises ValueError describing what is wrong.
+A query is {"concentrations": {id: amount}, "temperatures": {id: K}, "dissociation": false, "solver": "exact"};
+temperatures default to 298.15 K, amounts may be any positive ratios (e.g. {"Methane": 1, "Oxygen": 2})
+"""
+def parse_query(payload: object) -> FlameQuery:
+
+    from domain.compound import STANDARD_REF_TEMP
+    from domain.compounds import compounds
+    from domain.reaction import DEFAULT_SOLVER, SOLVERS
+
+    if not isinstance(payload, dict):
+        raise ValueError("A query must be a JSON object.")
+    amounts = payload.get("concentrations")
+    if not isinstance(amounts, dict) or not amounts:
+        raise ValueError("'concentrations' must be an object mapping reactant ids to amounts.")
+    temperatures = payload.get("temperatures", {})
+    if not isinstance(temperatures, dict):
+        raise ValueError("'temperatures' must be an object mapping reactant ids to entry temperatures (K).")
+    unknown = set(amounts) - set(compounds)
+    if unknown:
+        raise ValueError(f"Unknown compounds: {sorted(unknown)}. Options: {sorted(compounds)}")
+    unknown = set(temperatures) - set(amounts)
+    if unknown:
+        raise ValueError(f"Temperatures given for compounds that are not reactants: {sorted(unknown)}")
+    values = [*amounts.values(), *temperatures.values()]
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v) for v in values):
+        raise ValueError("Amounts and temperatures must be finite numbers.")
+    if any(v < 0 for v in amounts.values()) or any(v <= 0 for v in temperatures.values()):
+        raise ValueError("Amounts must be non-negative and temperatures positive.")
+    total = sum(amounts.values())
+    if total <= 0:
+        raise ValueError("Amounts must not all be zero.")
+    solver = payload.get("solver", DEFAULT_SOLVER)
+    if solver not in SOLVERS:
+        raise ValueError(f"Solver '{solver}' not recognized. Options: {SOLVERS}")
+    dissociation = payload.get("dissociation", False)
+    if not isinstance(dissociation, bool):
+        raise ValueError("'dissociation' must be true or false.")
+
+    return FlameQuery(
+        temperatures=tuple(sorted((r, float(temperatures.get(r, STANDARD_REF_TEMP))) for r in amounts)),
+        concentrations=tuple(sorted((r, a / total) for r, a in amounts.items())),
+        dissociation=dissociation,
+        solver=solver,
+    )
+
+
+"""
+Solves a batch of queries with one vectorized solve per reactant set and solver (see calc_flame_points).
+Returns a flame temperature (np.nan when out of bounds) or the exception raised for each query, in order
+"""
+def solve_queries(queries: list[FlameQuery]) -> list[float | Exception]:
+
+    from domain.reaction import calc_flame_points, FlamePoint, Reaction
+
+    results: list[float | Exception] = [math.nan] * len(queries)
+    by_solver: dict[str, list[tuple[int, FlamePoint]]] = {}
+    for i, query in enumerate(queries):
+        try:
+            temperatures = dict(query.temperatures)
+            reaction = Reaction(set(temperatures), temperatures, query.dissociation)
+        except Exception as error: # e.g. a reactant set with no products; only this query fails
+            results[i] = error
+            continue
+        by_solver.setdefault(query.solver, []).append((i, FlamePoint(reaction, dict(query.concentrations))))
+
+    for solver, points in by_solver.items():
+        flame_temps = calc_flame_points([p for _, p in points], solver)
+        for (i, _), flame_temp in zip(points, flame_temps):
+            results[i] = float(flame_temp)
+    return results
+
+
+class MicroBatcher:
+
+    def __init__(
+        self,
+        solve: Callable[[list], list],
+        window: float = BATCH_WINDOW_SECONDS,
+        max_batch: int = MAX_BATCH_SIZE,
+        max_in_flight: int = MAX_IN_FLIGHT,
+    ):
+        """
+        Merges items submitted from many threads within a short window into one call of solve, then hands each caller its own results.
+        A single worker thread, started on the first submit, runs the batches one after another.
+
+        @param solve : Callable[[list], list] - Solves a batch of items; returns one result (or Exception) per item, in order.
+        @param window : float - Seconds the first item of a batch waits for more items, unless max_batch items arrive first.
+        @param max_batch : int - Largest batch passed to solve.
+        @param max_in_flight : int - Items queued or being solved at most; submit raises Overloaded beyond it (load shedding).
+        """
+
+        self.solve = solve
+        self.window = window
+        self.max_batch = max_batch
+        self.max_in_flight = max_in_flight
+        self._condition = Condition()
+        self._queue: list[tuple[object, Future]] = []
+        self._in_flight = 0
+        self._worker: Thread | None = None
+
+
+    def submit(self, items: list) -> list[Future]:
+
+        """
+        Queues items for the next batches; all of them or none, raising Overloaded if they would exceed max_in_flight.
+        """
+
+        futures = [Future() for _ in items]
+        with self._condition:
+            if self._in_flight + len(items) > self.max_in_flight:
+                raise Overloaded(f"{self._in_flight} queries already in flight (limit {self.max_in_flight}).")
+            self._in_flight += len(items)
+            self._queue.extend(zip(items, futures))
+            if self._worker is None:
+                self._worker = Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._worker.start()
+            self._condition.notify()
+        return futures
+
+
+    @property
+    def in_flight(self) -> int:
+
+        return self._in_flight
+
+
+    def _run(self) -> None:
+
+        while True:
+            batch = self._next_batch()
+            items = [item for item, _ in batch]
+            try:
+                results = self.solve(items)
+            except Exception as error: # The whole batch failed; every caller gets the error
+                logger.exception("Batch of %d queries failed", len(batch))
+                results = [error] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            with self._condition:
+                self._in_flight -= len(batch)
+            if metrics.ENABLED:
+                metrics.registry.observe("api_batch_size", len(batch), BATCH_SIZE_BUCKETS)
+
+
+    def _next_batch(self) -> list[tuple[object, Future]]:
+
+        """
+        Waits for the first item, then up to window seconds for the batch to fill.
+        """
+
+        with self._condition:
+            while not self._queue:
+                self._condition.wait()
+            deadline = time.monotonic() + self.window
+            while len(self._queue) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+        return batch
+
+
+batcher = MicroBatcher(solve_queries)
+
+
+"""
+Adds the JSON compute endpoint (POST API_PATH) to a Flask server. The body is one query (see parse_query), answered with
+{"flame_temperature": K}, or {"queries": [...]}, answered with {"results": [...]} in the same order. Unsolvable points give null;
+a query that fails gives {"error": message} in its place. Bad requests get 400, 503 when too much work is already in flight,
+and 504 when the answers take longer than REQUEST_TIMEOUT_SECONDS
+"""
+def install(server, batcher: MicroBatcher = batcher) -> None:
+
+    from flask import jsonify, request
+
+    def flame_temperature_endpoint():
+        payload = request.get_json(silent=True)
+        many = isinstance(payload, dict) and "queries" in payload
+        raw_queries = payload["queries"] if many else [payload]
+        if not isinstance(raw_queries, list) or not raw_queries:
+            return jsonify(error="'queries' must be a non-empty list."), 400
+        if len(raw_queries) > batcher.max_in_flight:
+            return jsonify(error=f"At most {batcher.max_in_flight} queries per request."), 413
+        try:
+            queries = [parse_query(q) for q in raw_queries]
+        except ValueError as error:
+            return jsonify(error=str(error)), 400
+
+        try:
+            futures = batcher.submit(queries)
+        except Overloaded as error:
+            if metrics.ENABLED:
+                metrics.registry.inc("api_shed_requests_total")
+            response = jsonify(error=f"Server busy: {error}")
+            response.headers["Retry-After"] = str(RETRY_AFTER_SECONDS)
+            return response, 503
+
+        results = []
+        deadline = time.monotonic() + REQUEST_TIMEOUT_SECONDS
+        for future in futures:
+            try:
+                flame_temp = future.result(timeout=max(deadline - time.monotonic(), 0))
+                results.append({"flame_temperature": None if math.isnan(flame_temp) else flame_temp})
+            except TimeoutError:
+                return jsonify(error=f"No answer within {REQUEST_TIMEOUT_SECONDS:g} s; the server is busy, retry later."), 504
+            except Exception as error:
+                results.append({"error": str(error)})
+        if many:
+            return jsonify(results=results)
+        status = 200 if "error" not in results[0] else 422
+        return jsonify(results[0]), status
+
+    server.add_url_rule(API_PATH, "flame_temperature_api", flame_temperature_endpoint, methods=["POST"])
@@ -0,0 +1,219 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Export File
+# ###################
+
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+import os
+import zipfile
+import numpy as np
+from numpy.typing import NDArray
+from domain.reaction import Reaction, DEFAULT_SOLVER
+
+FORMATS = {".csv": "csv", ".npz": "npz", ".parquet": "parquet", ".npy": "memmap"} # Extension -> format
+DEFAULT_CHUNK_ROWS = 65536 # Rows held in memory at once
+COPY_BLOCK_ROWS = 1 << 20 # Rows copied at once when repacking a spooled table
+
+Columns = dict[str, NDArray] # One chunk of a table: equal length arrays by column name
+
+
+"""
+Writes a table arriving as chunks of columns to path, chunk_rows rows at a time, so memory stays bounded however long the table is.
+The format is csv, npz, parquet (needs pyarrow) or memmap (a .npy of records readable with load_memmap), by default from the extension.
+The file is written under a temporary name and moved into place when complete, so readers never see a partial file. Returns the rows written
+"""
+def export_table(path: str, chunks: Iterable[Columns], format: str | None = None, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+
+    format = format or FORMATS.get(os.path.splitext(path)[1].lower())
+    writers: dict[str, Callable[[str, Iterator[Columns]], int]] = {
+        "csv": _write_csv,
+        "npz": _write_npz,
+        "parquet": _write_parquet,
+        "memmap": _write_memmap,
+    }
+    if format not in writers:
+        raise ValueError(f"Unknown export format for {path}; expected one of {sorted(writers)} or an extension in {sorted(FORMATS)}.")
+    with _atomic_path(path) as temp_path:
+        return writers[format](temp_path, rechunk(chunks, chunk_rows))
+
+
+"""
+Streams a flame table to a file (see export_table), solving it chunk by chunk in increasing concentration
+"""
+def export_flame_table(
+    path: str,
+    reaction: Reaction,
+    variable: str,
+    base_concentrations: dict[str, float | int],
+    resolution: int = 100,
+    solver: str = DEFAULT_SOLVER,
+    format: str | None = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> int:
+
+    chunks = (
+        {f"{variable}_fraction": x, "flame_temperature": t}
+        for x, t in reaction.iter_flame_table_chunks(variable, base_concentrations, resolution, solver, coarse_to_fine=False)
+    )
+    return export_table(path, chunks, format, chunk_rows)
+
+
+"""
+Streams a parametric sweep to a file (see export_table and services.sweep.iter_sweep), one row per flame temperature point
+"""
+def export_sweep(path: str, *sweep_args, format: str | None = None, chunk_rows: int = DEFAULT_CHUNK_ROWS, **sweep_kwargs) -> int:
+
+    from services.sweep import iter_sweep
+    return export_table(path, iter_sweep(*sweep_args, **sweep_kwargs), format, chunk_rows)
+
+
+"""
+Opens a table written in the memmap format without reading it: a record array indexed by column name, paged in from disk as it is used
+"""
+def load_memmap(path: str) -> np.memmap:
+
+    return np.load(path, mmap_mode="r")
+
+
+"""
+Regroups chunks of any size into chunks of exactly chunk_rows rows (the last may be shorter)
+"""
+def rechunk(chunks: Iterable[Columns], chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Columns]:
+
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be positive.")
+    pending: list[Columns] = []
+    pending_rows = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_rows += len(next(iter(chunk.values())))
+        while pending_rows >= chunk_rows:
+            merged = _concatenate(pending)
+            yield {name: column[:chunk_rows] for name, column in merged.items()}
+            pending = [{name: column[chunk_rows:] for name, column in merged.items()}]
+            pending_rows -= chunk_rows
+    if pending_rows > 0:
+        yield _concatenate(pending)
+
+
+def _concatenate(chunks: list[Columns]) -> Columns:
+
+    if len(chunks) == 1:
+        return chunks[0]
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+@contextmanager
+def _atomic_path(path: str) -> Iterator[str]:
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        yield temp_path
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path): # Failed part way; the final file is left as it was
+            os.remove(temp_path)
+
+
+def _write_csv(path: str, chunks: Iterator[Columns]) -> int:
+
+    import pandas as pd
+    rows = 0
+    with open(path, "w", newline="") as file:
+        for chunk in chunks:
+            pd.DataFrame(chunk).to_csv(file, header=(rows == 0), index=False)
+            rows += len(next(iter(chunk.values())))
+    return rows
+
+
+def _write_parquet(path: str, chunks: Iterator[Columns]) -> int:
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as error:
+        raise ImportError("Parquet export needs pyarrow; install the parquet extra (uv sync --extra parquet).") from error
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.table(chunk)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None: # Nothing to write; still leave a valid empty file
+        pq.write_table(pa.table({}), path)
+    return rows
+
+
+"""
+Spools the records to a raw file, as the .npy header needs the row count up front, then writes the header and copies the records after it
+"""
+def _write_memmap(path: str, chunks: Iterator[Columns]) -> int:
+
+    spool_path = f"{path}.spool"
+    try:
+        dtype, rows = _spool(spool_path, chunks)
+        spooled = np.memmap(spool_path, dtype=dtype, mode="r", shape=(rows,)) if rows else np.empty(0, dtype)
+        with open(path, "wb") as file:
+            np.lib.format.write_array_header_1_0(file, {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (rows,)})
+            for start in range(0, rows, COPY_BLOCK_ROWS):
+                file.write(spooled[start:start + COPY_BLOCK_ROWS].tobytes())
+        del spooled
+    finally:
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+    return rows
+
+
+"""
+Spools the records to a raw file, then streams each column into its own .npy member of the archive
+"""
+def _write_npz(path: str, chunks: Iterator[Columns]) -> int:
+
+    spool_path = f"{path}.spool"
+    try:
+        dtype, rows = _spool(spool_path, chunks)
+        spooled = np.memmap(spool_path, dtype=dtype, mode="r", shape=(rows,)) if rows else np.empty(0, dtype)
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for name in dtype.names or ():
+                column_dtype = dtype[name]
+                with archive.open(f"{name}.npy", "w", force_zip64=True) as member:
+                    np.lib.format.write_array_header_1_0(member, {"descr": np.lib.format.dtype_to_descr(column_dtype), "fortran_order": False, "shape": (rows,)})
+                    for start in range(0, rows, COPY_BLOCK_ROWS):
+                        member.write(np.ascontiguousarray(spooled[name][start:start + COPY_BLOCK_ROWS]).tobytes())
+        del spooled
+    finally:
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+    return rows
+
+
+"""
+Appends every chunk to a raw file as records (one field per column). Returns the record dtype and row count
+"""
+def _spool(path: str, chunks: Iterator[Columns]) -> tuple[np.dtype, int]:
+
+    dtype = np.dtype([])
+    rows = 0
+    with open(path, "wb") as file:
+        for chunk in chunks:
+            if rows == 0:
+                dtype = np.dtype([(name, np.asarray(column).dtype) for name, column in chunk.items()])
+            records = np.empty(len(next(iter(chunk.values()))), dtype)
+            for name, column in chunk.items():
+                column = np.asarray(column)
+                if not np.can_cast(column.dtype, dtype[name], "same_kind"):
+                    raise ValueError(f"Column {name} changed type from {dtype[name]} to {column.dtype} between chunks.")
+                records[name] = column
+            file.write(records.tobytes())
+            rows += len(records)
+    return dtype, rows
@@ -0,0 +1,160 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Hot Reload File
+# ###################
+
+import logging
+import os
+from threading import Event, Lock, Thread
+from typing import TYPE_CHECKING
+from domain.compounds import CompoundRegistry, compounds
+
+if TYPE_CHECKING: # Imported on first use instead; they pull in numpy and scipy, which importing app.py does not need
+    from domain.compound_data import CompoundData
+
+RELOAD_POLL_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Reads the per-compound versions of the data and the data of any compounds asked for.
+With a segment store the versions are the segment hashes in the manifest and only the requested segments are read;
+with a flat CSV the file is parsed and versions are the content hashes of each compound's rows
+"""
+def read_data(csv_path: str, ids: set[str] = frozenset()) -> tuple[dict[str, str], dict[str, "CompoundData"]]:
+
+    from domain.compound import content_hash
+    from services.comp_loader import parse_data_file
+    from services.segment_store import SegmentStore, segment_dir
+    store = SegmentStore(segment_dir(csv_path))
+    if store.exists():
+        versions = {id: entry["sha256"] for id, entry in store.manifest()["compounds"].items()}
+        return versions, {id: store.load(id) for id in ids if id in versions}
+    table = parse_data_file(csv_path)
+    data = {id: table.compound_data(id) for id in table.slices}
+    versions = {id: content_hash(compound_data) for id, compound_data in data.items()}
+    return versions, {id: data[id] for id in ids if id in data}
+
+
+class DataWatcher:
+
+    def __init__(self, registry: CompoundRegistry = compounds, csv_path: str | None = None, interval: float = RELOAD_POLL_SECONDS):
+        """
+        Watches the thermochemical data (the segment manifest, or the CSV when there is no segment store) and, when it changes,
+        reloads only the compounds whose rows changed. Their interpolants are rebuilt on next use and only the reaction templates
+        depending on them are dropped; flame tables are keyed by species data, so tables of unchanged reactions stay cached.
+        Requests already holding a Reaction finish on the data it was built with.
+
+        @param registry : CompoundRegistry - Registry the changed compounds are reloaded into.
+        @param csv_path : str | None - Flat data file (thermochemical_data.csv by default); its segment store is watched instead when one exists.
+        @param interval : float - Seconds between checks of the data's modification time and size.
+        """
+
+        from services.comp_loader import DATA_FILE
+        self.registry = registry
+        self.csv_path = csv_path or DATA_FILE
+        self.interval = interval
+        self._signature: tuple[str, int, int] | None = None
+        self._versions: dict[str, str] = {}
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+
+    def start(self) -> Thread:
+
+        """
+        Records the current versions of the data, then checks for changes on a daemon thread until stop() is called.
+        """
+
+        self._signature = self._read_signature()
+        self._versions, _ = read_data(self.csv_path)
+        self._thread = Thread(target=self._run, name="data-watcher", daemon=True)
+        self._thread.start()
+        return self._thread
+
+
+    def stop(self) -> None:
+
+        self._stop.set()
+
+
+    def check(self) -> set[str]:
+
+        """
+        Reloads the compounds changed since the last check, if the data changed at all. Returns the ids reloaded.
+        """
+
+        signature = self._read_signature()
+        if signature == self._signature:
+            return set()
+        versions, _ = read_data(self.csv_path)
+        changed = {id for id in versions.keys() | self._versions.keys() if versions.get(id) != self._versions.get(id)}
+        registered = changed & set(self.registry)
+        _, data = read_data(self.csv_path, registered) if registered else ({}, {})
+        if registered - data.keys():
+            logger.warning("Compounds removed from the data keep their previous data until restart: %s", sorted(registered - data.keys()))
+        reload_compounds(data, self.registry)
+        self._signature, self._versions = signature, versions
+        return set(data)
+
+
+    def _read_signature(self) -> tuple[str, int, int]:
+
+        from services.comp_loader import data_source_path
+        path = data_source_path(self.csv_path)
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+
+
+    def _run(self) -> None:
+
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception: # e.g. a half-edited CSV; retried on the next change
+                logger.exception("Reloading thermochemical data failed")
+
+
+"""
+Swaps new data for the given compounds into the registry and drops the reaction templates that depend on them
+"""
+def reload_compounds(data: dict[str, "CompoundData"], registry: CompoundRegistry = compounds) -> None:
+
+    from domain.reaction_template import template_cache
+    if not data:
+        return
+    registry.reload(data)
+    dropped = template_cache.invalidate(data)
+    logger.info("Reloaded %s; dropped %d reaction templates", ", ".join(sorted(data)), dropped)
+
+
+"""
+Starts watching the data for changes on a daemon thread (see DataWatcher)
+"""
+def start_data_watcher(csv_path: str | None = None, interval: float = RELOAD_POLL_SECONDS) -> DataWatcher:
+
+    watcher = DataWatcher(compounds, csv_path, interval)
+    watcher.start()
+    return watcher
+
+
+"""
+Starts the data watcher the first time a Flask server handles a request, once per process. It thus runs in whichever process
+serves the app (the development server, its reloader's child or each WSGI worker) and never in the reloader's file-watcher parent
+"""
+def install(server, csv_path: str | None = None, interval: float = RELOAD_POLL_SECONDS) -> None:
+
+    lock = Lock()
+    watchers: list[DataWatcher] = []
+
+    def start_watcher() -> None:
+        if not watchers:
+            with lock:
+                if not watchers:
+                    watchers.append(start_data_watcher(csv_path, interval))
+
+    server.before_request(start_watcher)
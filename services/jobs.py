@@ -0,0 +1,40 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Background Jobs File
+# ###################
+
+from functools import lru_cache
+import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from dash import DiskcacheManager
+    from diskcache import Deque
+
+JOB_CACHE_DIR = ".cache/jobs"
+JOB_METRICS_DIR = os.path.join(JOB_CACHE_DIR, "metrics")
+
+
+"""
+Creates the manager that runs Dash background callbacks. Each job runs in its own process,
+so long flame table computations never hold a server thread; job state and progress are kept in a diskcache folder
+"""
+def create_job_manager(directory: str = JOB_CACHE_DIR) -> "DiskcacheManager":
+
+    import diskcache
+    from dash import DiskcacheManager
+    return DiskcacheManager(diskcache.Cache(directory))
+
+
+"""
+Returns the on-disk deque job processes report their metrics to and the server process drains (see services.metrics.job).
+Opened once per process
+"""
+@lru_cache(maxsize=1)
+def job_metrics_outbox(directory: str = JOB_METRICS_DIR) -> "Deque":
+
+    from diskcache import Deque
+    return Deque(directory=directory)
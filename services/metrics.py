@@ -0,0 +1,379 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Metrics File
+# ###################
+
+from bisect import bisect_left
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+import logging
+import os
+from threading import Lock
+import time
+
+ENABLED: bool = os.environ.get("FLAME_METRICS", "").lower() in ("1", "true", "yes", "on") # Read once at import
+SLOW_REQUEST_SECONDS: float = float(os.environ.get("FLAME_SLOW_REQUEST_SECONDS", "1.0"))
+METRICS_PATH = "/metrics"
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ITERATION_BUCKETS = (0, 2, 4, 6, 8, 10, 15, 20, 30, 50, 100)
+
+logger = logging.getLogger(__name__)
+_NO_OP = nullcontext() # Returned by trace() and stage() when disabled; entering it does nothing
+_current_trace: ContextVar["_Trace | None"] = ContextVar("current_trace", default=None)
+
+LabelKey = tuple[str, tuple[tuple[str, str], ...]]
+
+
+class _Histogram:
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # Last is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+    def observe(self, value: float, times: int = 1) -> None:
+
+        self.counts[bisect_left(self.buckets, value)] += times
+        self.sum += value * times
+        self.count += times
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        """
+        Counters and histograms kept in memory and rendered in the Prometheus text exposition format. Thread safe.
+        Collectors add values computed at scrape time, e.g. cache statistics that are already counted elsewhere.
+        """
+
+        self._lock = Lock()
+        self._help: dict[str, tuple[str, str]] = {} # name -> (type, help)
+        self._counters: dict[LabelKey, float] = {}
+        self._histograms: dict[LabelKey, _Histogram] = {}
+        self._collectors: list[Callable[[], Iterable[tuple[str, str, str, dict[str, str], float]]]] = []
+
+
+    def describe(self, name: str, kind: str, help: str) -> None:
+
+        self._help[name] = (kind, help)
+
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+
+    def observe(self, name: str, value: float, buckets: tuple[float, ...] = SECONDS_BUCKETS, times: int = 1, **labels: str) -> None:
+
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(buckets)
+            histogram.observe(value, times)
+
+
+    def add_collector(self, collector: Callable[[], Iterable[tuple[str, str, str, dict[str, str], float]]]) -> None:
+
+        """
+        Adds a function called on every scrape, yielding (name, type, help, labels, value) samples.
+        """
+
+        self._collectors.append(collector)
+
+
+    def render(self) -> str:
+
+        """
+        Returns every metric in the Prometheus text exposition format (version 0.0.4).
+        """
+
+        samples: dict[str, list[str]] = {}
+        collected = self._collect()
+        with self._lock:
+            counters = dict(self._counters)
+            for name, kind, help, labels, value in collected: # Counted by collectors here and by registry counters merged from jobs
+                if kind == "counter":
+                    self._help.setdefault(name, (kind, help))
+                    key = (name, tuple(sorted(labels.items())))
+                    counters[key] = counters.get(key, 0.0) + value
+            for (name, labels), value in sorted(counters.items()):
+                samples.setdefault(name, []).append(f"{name}{_labels(labels)} {_number(value)}")
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                lines = samples.setdefault(name, [])
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+                lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        for name, kind, help, labels, value in collected:
+            if kind != "counter":
+                self._help.setdefault(name, (kind, help))
+                samples.setdefault(name, []).append(f"{name}{_labels(tuple(sorted(labels.items())))} {_number(value)}")
+
+        output = []
+        for name in sorted(samples):
+            kind, help = self._help.get(name, ("untyped", ""))
+            output += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", *samples[name]]
+        return "\n".join(output) + "\n"
+
+
+    def snapshot(self, collected: bool = False) -> dict:
+
+        """
+        Returns a plain (picklable) copy of every counter and histogram; with collected, counter samples of the collectors are added to the counters.
+        """
+
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (h.buckets, list(h.counts), h.sum, h.count) for key, h in self._histograms.items()}
+        if collected:
+            for name, kind, help, labels, value in self._collect():
+                if kind == "counter":
+                    key = (name, tuple(sorted(labels.items())))
+                    counters[key] = counters.get(key, 0.0) + value
+        return {"counters": counters, "histograms": histograms}
+
+
+    def merge(self, snapshot: dict, sign: int = 1) -> None:
+
+        """
+        Adds the counters and histograms of a snapshot (or of a difference of snapshots, see difference) to the registry; sign=-1 subtracts them.
+        """
+
+        with self._lock:
+            for key, value in snapshot["counters"].items():
+                self._counters[key] = self._counters.get(key, 0.0) + sign * value
+            for key, (buckets, counts, total, count) in snapshot["histograms"].items():
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = _Histogram(buckets)
+                histogram.counts = [a + sign * b for a, b in zip(histogram.counts, counts)]
+                histogram.sum += sign * total
+                histogram.count += sign * count
+
+
+    def _collect(self) -> list[tuple[str, str, str, dict[str, str], float]]:
+
+        return [sample for collector in self._collectors for sample in collector()]
+
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _labels(labels: tuple[tuple[str, str], ...]) -> str:
+
+    if not labels:
+        return ""
+    escape = lambda value: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+
+
+def _number(value: float) -> str:
+
+    if value == float("inf"):
+        return "+Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+"""
+What was recorded between two snapshots of a registry (after minus before)
+"""
+def difference(after: dict, before: dict) -> dict:
+
+    counters = {key: value - before["counters"].get(key, 0.0) for key, value in after["counters"].items()}
+    histograms = {}
+    for key, (buckets, counts, total, count) in after["histograms"].items():
+        _, counts_before, total_before, count_before = before["histograms"].get(key, (buckets, [0] * len(counts), 0.0, 0))
+        histograms[key] = (buckets, [a - b for a, b in zip(counts, counts_before)], total - total_before, count - count_before)
+    return {
+        "counters": {key: value for key, value in counters.items() if value},
+        "histograms": {key: value for key, value in histograms.items() if value[3]},
+    }
+
+
+registry = MetricsRegistry()
+registry.describe("energy_balance_evaluations_total", "counter", "Energy balance residuals evaluated, counted per point")
+registry.describe("root_finder_iterations", "histogram", "Root finder iterations per flame temperature point")
+registry.describe("flame_temperature_points_total", "counter", "Flame temperature points solved, by method")
+registry.describe("equilibrium_newton_steps_total", "counter", "Newton steps taken by the dissociation equilibrium solver")
+registry.describe("callback_seconds", "histogram", "Wall time of Dash callbacks")
+registry.describe("callback_stage_seconds", "histogram", "Wall time of each stage within Dash callbacks")
+registry.describe("slow_requests_total", "counter", "Callbacks slower than the slow request threshold")
+registry.describe("api_batch_size", "histogram", "Queries merged into each batch solve of the compute API")
+registry.describe("api_shed_requests_total", "counter", "Compute API requests rejected because too much work was in flight")
+
+
+"""
+Decorator counting calls of a function into a counter; weight(*args) gives the amount per call (default 1).
+Returns the function itself when metrics are disabled, so there is no overhead at all
+"""
+def counted(name: str, weight: Callable[..., float] | None = None, **labels: str) -> Callable[[Callable], Callable]:
+
+    def decorate(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            registry.inc(name, weight(*args, **kwargs) if weight is not None else 1.0, **labels)
+            return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+"""
+Adds many values to a histogram at once, e.g. the iteration count of every point of a batch solve
+"""
+def observe_each(name: str, values: Iterable[float], buckets: tuple[float, ...] = SECONDS_BUCKETS, **labels: str) -> None:
+
+    for value, times in Counter(values).items():
+        registry.observe(name, value, buckets, times, **labels)
+
+
+class _Trace:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: list[tuple[str, float]] = []
+
+
+"""
+Decorator timing a Dash callback as one trace: its total time, and the stages timed inside it with stage().
+Callbacks slower than FLAME_SLOW_REQUEST_SECONDS are logged with their stage breakdown.
+Returns the function itself when metrics are disabled
+"""
+def traced(name: str) -> Callable[[Callable], Callable]:
+
+    def decorate(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+"""
+Decorator for callbacks run in background job processes, whose registry is discarded with the process. Whatever a call records
+(including the collectors' counters, e.g. cache hits) is moved out of this process's registry and appended to outbox(), a deque
+shared with the server process (see services.jobs.job_metrics_outbox), which merges it into its own registry on the next scrape.
+Moved rather than copied, so it is counted once even if the job runs in the server process. Returns the function itself when metrics are disabled
+"""
+def job(outbox: Callable[[], deque[dict]]) -> Callable[[Callable], Callable]:
+
+    def decorate(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            before = registry.snapshot(collected=True)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorded = difference(registry.snapshot(collected=True), before)
+                registry.merge(recorded, sign=-1)
+                outbox().append(recorded)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def _trace(name: str) -> Iterator[_Trace]:
+
+    current = _Trace(name)
+    token = _current_trace.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        elapsed = time.perf_counter() - start
+        _current_trace.reset(token)
+        registry.observe("callback_seconds", elapsed, callback=name)
+        if elapsed > SLOW_REQUEST_SECONDS:
+            registry.inc("slow_requests_total", callback=name)
+            breakdown = ", ".join(f"{stage}: {seconds * 1e3:.1f} ms" for stage, seconds in current.stages)
+            logger.warning("Slow request: %s took %.1f ms (%s)", name, elapsed * 1e3, breakdown or "no stages")
+
+
+def trace(name: str):
+
+    """
+    Context manager form of traced(); a no-op when metrics are disabled.
+    """
+
+    return _trace(name) if ENABLED else _NO_OP
+
+
+@contextmanager
+def _stage(name: str) -> Iterator[None]:
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        current = _current_trace.get()
+        callback = current.name if current is not None else ""
+        if current is not None:
+            current.stages.append((name, elapsed))
+        registry.observe("callback_stage_seconds", elapsed, callback=callback, stage=name)
+
+
+def stage(name: str):
+
+    """
+    Times a stage of the enclosing trace; a no-op when metrics are disabled.
+    """
+
+    return _stage(name) if ENABLED else _NO_OP
+
+
+"""
+Adds the Prometheus text endpoint (GET /metrics) to a Flask server. Does nothing when metrics are disabled.
+outbox, if given, returns the queue background jobs report to (see job); it is emptied into the registry on every scrape
+"""
+def install(server, outbox: Callable[[], deque[dict]] | None = None) -> None:
+
+    if not ENABLED:
+        return
+    from flask import Response
+
+    def metrics_endpoint() -> Response:
+        if outbox is not None:
+            drain(outbox())
+        return Response(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    server.add_url_rule(METRICS_PATH, "metrics", metrics_endpoint, methods=["GET"])
+
+
+"""
+Merges every snapshot queued by background jobs into the registry, removing them from the queue
+"""
+def drain(outbox: deque[dict]) -> None:
+
+    while True:
+        try:
+            recorded = outbox.popleft()
+        except IndexError:
+            return
+        registry.merge(recorded)
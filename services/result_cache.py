@@ -0,0 +1,277 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Flame Table Result Cache File
+# ###################
+
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+from pathlib import Path
+from threading import Lock
+import uuid
+import numpy as np
+from numpy.typing import NDArray
+from domain.reaction import Reaction, DEFAULT_SOLVER
+
+CACHE_DIR = ".cache/flame_tables"
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+LOCK_STRIPES = 256 # Lock files shared by keys, so they never need cleaning up
+
+
+class FlameTableCache:
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        """
+        Disk-backed cache of flame tables, one .npy file per table named by a hash of everything the table depends on.
+        Least recently used files are evicted once the directory grows past max_bytes.
+        Concurrent requests for the same key wait on one computation (single-flight): within a process on a shared future,
+        and across processes (e.g. background jobs) on a file lock, after which they read the stored table.
+
+        @param directory : str - Folder the cached tables are written to; created if missing.
+        @param max_bytes : int - Size limit of the cache folder in bytes.
+        """
+
+        self.directory = Path(directory)
+        self.max_bytes: int = max_bytes
+        self._lock = Lock()
+        self._in_flight: dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+
+    def key(self, reaction: Reaction, variable: str, base_concentrations: dict[str, float | int], resolution: int, solver: str) -> str:
+
+        """
+        Content address of a flame table: hash of the mixture, entry temperatures, resolution, solver settings and the data of each species.
+        Changing one compound's data only changes the keys of tables whose reactions involve it.
+        Ratios are normalized so equivalent ratios (2:1 and 4:2) share an entry.
+        """
+
+        total = sum(c for r, c in base_concentrations.items() if r != variable) # The controlled reactant's own value does not affect the table
+        description = {
+            "reactants": sorted(reaction.reactants),
+            "dissociation": reaction.dissociation,
+            "temperatures": {r: float(t) for r, t in sorted(reaction.temperatures.items())},
+            "variable": variable,
+            "ratios": {r: float(c) / total for r, c in sorted(base_concentrations.items()) if r != variable},
+            "resolution": int(resolution),
+            "solver": solver,
+            "data": reaction.data_hashes,
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+    def get_or_compute(self, key: str, compute: Callable[[], NDArray[np.float64]]) -> NDArray[np.float64]:
+
+        """
+        Returns the cached table for key, or computes, stores and returns it. Only one caller computes a missing key at a time.
+        """
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+        if not leader:
+            return future.result()
+
+        try:
+            table = self._read(key)
+            computed = False
+            if table is None:
+                with self._key_lock(key):
+                    table = self._read(key) # Another process may have stored it while this one waited
+                    if table is None:
+                        table = compute()
+                        self._write(key, table)
+                        computed = True
+            self._count(hit=not computed)
+            future.set_result(table)
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return table
+
+
+    def stream(self, key: str, chunks: Callable[[], Iterator[NDArray[np.float64]]]) -> Iterator[NDArray[np.float64]]:
+
+        """
+        Yields the cached table for key as a single chunk, or the partial tables of chunks() as they are solved,
+        storing the whole table (sorted by x) once the last one is done. A stream closed early stores nothing.
+        Only one stream (in any thread or process) computes a key at a time; the others wait for it and yield the stored table.
+        """
+
+        table = self._read(key)
+        if table is not None:
+            self._count(hit=True)
+            yield table
+            return
+        with self._key_lock(key):
+            table = self._read(key)
+            self._count(hit=table is not None)
+            if table is not None:
+                yield table
+                return
+            parts = []
+            for chunk in chunks():
+                parts.append(chunk)
+                yield chunk
+            table = np.concatenate(parts, axis=1)
+            self._write(key, table[:, np.argsort(table[0], kind="stable")])
+
+
+    def clear(self) -> None:
+
+        for file in self.directory.glob("*.npy"):
+            file.unlink(missing_ok=True)
+
+
+    @contextmanager
+    def _key_lock(self, key: str) -> Iterator[None]:
+
+        """
+        Holds an exclusive lock shared by every thread and process computing key. The operating system releases it if the holder dies (e.g. a cancelled job).
+        """
+
+        lock_directory = self.directory / "locks"
+        lock_directory.mkdir(parents=True, exist_ok=True)
+        stripe = int(key[:8], 16) % LOCK_STRIPES
+        with open(lock_directory / f"{stripe:03d}.lock", "a+b") as file:
+            _lock_file(file)
+            try:
+                yield
+            finally:
+                _unlock_file(file)
+
+
+    def _path(self, key: str) -> Path:
+
+        return self.directory / f"{key}.npy"
+
+
+    def _read(self, key: str) -> NDArray[np.float64] | None:
+
+        path = self._path(key)
+        try:
+            table = np.load(path)
+        except (FileNotFoundError, ValueError, OSError): # Missing, or a corrupt file from an interrupted write
+            return None
+        os.utime(path) # Marks as recently used for eviction
+        return table
+
+
+    def _count(self, hit: bool) -> None:
+
+        """
+        Counts one lookup: a hit when the table came from disk, a miss when this caller computed it.
+        """
+
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+    def _write(self, key: str, table: NDArray[np.float64]) -> None:
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        temp_path = path.with_suffix(f".{os.getpid()}.{uuid.uuid4().hex}.tmp") # Unique per writer, even between threads of one process
+        with open(temp_path, "wb") as file:
+            np.save(file, table)
+        os.replace(temp_path, path) # Atomic, so readers never see a partial table
+        self._evict()
+
+
+    def _evict(self) -> None:
+
+        """
+        Deletes least recently used tables until the folder fits within max_bytes.
+        """
+
+        files = []
+        for path in self.directory.glob("*.npy"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError: # Evicted by another process meanwhile
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock_file(file) -> None:
+        file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1) # Retries for about 10 s before raising
+                return
+            except OSError:
+                continue
+
+    def _unlock_file(file) -> None:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(file) -> None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(file) -> None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+flame_table_cache = FlameTableCache()
+
+
+"""
+Reaction.calc_flame_table through the disk cache; identical requests are only ever solved once
+"""
+def cached_flame_table(
+    reaction: Reaction,
+    variable: str,
+    base_concentrations: dict[str, float | int],
+    resolution: int = 100,
+    solver: str = DEFAULT_SOLVER,
+) -> NDArray[np.float64]:
+
+    key = flame_table_cache.key(reaction, variable, base_concentrations, resolution, solver)
+    return flame_table_cache.get_or_compute(
+        key, lambda: reaction.calc_flame_table(variable, base_concentrations, resolution, solver)
+    )
+
+
+"""
+Reaction.iter_flame_table_chunks through the disk cache: a cached table arrives as one chunk, a new one streams coarse to fine and is cached when complete
+"""
+def stream_flame_table(
+    reaction: Reaction,
+    variable: str,
+    base_concentrations: dict[str, float | int],
+    resolution: int = 100,
+    solver: str = DEFAULT_SOLVER,
+) -> Iterator[NDArray[np.float64]]:
+
+    key = flame_table_cache.key(reaction, variable, base_concentrations, resolution, solver)
+    return flame_table_cache.stream(
+        key, lambda: reaction.iter_flame_table_chunks(variable, base_concentrations, resolution, solver)
+    )
@@ -0,0 +1,256 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Segment Store File
+# ###################
+
+from collections.abc import Iterable
+import hashlib
+import json
+import os
+import re
+from typing import TYPE_CHECKING
+import numpy as np
+from domain.compound_data import CompoundData
+from services.comp_loader import CSV_DTYPES, DATA_FILE, GroupedTable, NUMERIC_COLUMNS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MANIFEST_FILE = "manifest.json"
+RETIRED_FILE = "retired.json" # Manifest of a store retired by compact; its segments are deleted by the next commit
+FORMAT_VERSION = 1
+HEADER = ["Compound", *NUMERIC_COLUMNS]
+SEGMENT_PATTERN = re.compile(r"[A-Za-z0-9_-]+\.[0-9a-f]{16}\.csv") # <compound>.<sha256 prefix>.csv
+
+
+"""
+Folder of the segment store kept alongside a flat data file (thermochemical_data.csv -> thermochemical_data.segments)
+"""
+def segment_dir(csv_path: str = DATA_FILE) -> str:
+
+    return f"{os.path.splitext(csv_path)[0]}.segments"
+
+
+class SegmentStore:
+
+    def __init__(self, directory: str = segment_dir()):
+        """
+        Thermochemical data stored as one small CSV segment per compound plus a JSON manifest naming the current segment of each.
+        Segments are never modified: a changed compound gets a new segment named after its content, and the change becomes visible
+        in a single atomic replace of the manifest, so a crash part way leaves the previous data intact. Segments a commit stops using
+        are kept until the next commit, so readers still holding the previous manifest can finish reading them.
+        Compacting into the flat data file retires the store, making that file the data again until the next commit splits it anew.
+
+        @param directory : str - Folder holding the manifest and the segments.
+        """
+
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST_FILE)
+        self.retired_path = os.path.join(directory, RETIRED_FILE)
+
+
+    def exists(self) -> bool:
+
+        return os.path.exists(self.manifest_path)
+
+
+    def manifest(self) -> dict:
+
+        """
+        Returns the current manifest: {"version", "compounds": {id: {"segment", "sha256", "rows"}}, "retired": [segment]},
+        compounds in data order; retired names the segments the previous manifest used and this one does not.
+        """
+
+        with open(self.manifest_path) as file:
+            manifest = json.load(file)
+        if manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported segment manifest version {manifest.get('version')} in {self.manifest_path}.")
+        return manifest
+
+
+    def compounds(self) -> list[str]:
+
+        return list(self.manifest()["compounds"])
+
+
+    def content_hash(self, manifest: dict | None = None) -> str:
+
+        """
+        sha256 identifying the data as a whole, from the segments' own hashes; only the manifest is read.
+        """
+
+        manifest = manifest or self.manifest()
+        entries = [[id, entry["sha256"]] for id, entry in manifest["compounds"].items()]
+        return hashlib.sha256(json.dumps(entries).encode()).hexdigest()
+
+
+    def read(self, id: str) -> "pd.DataFrame":
+
+        """
+        Reads the rows of one compound from its segment alone. Raises KeyError if the compound is not stored.
+        """
+
+        import pandas as pd
+        entry = self.manifest()["compounds"][id]
+        return pd.read_csv(os.path.join(self.directory, entry["segment"]), dtype=CSV_DTYPES)
+
+
+    def load(self, id: str) -> CompoundData:
+
+        """
+        Returns the data of one compound, read from its segment alone.
+        """
+
+        frame = self.read(id)
+        columns = {column: frame[column].to_numpy(dtype=np.float64) for column in NUMERIC_COLUMNS}
+        return GroupedTable(columns=columns, slices={id: slice(0, len(frame))}).compound_data(id)
+
+
+    def read_table(self) -> GroupedTable:
+
+        """
+        Reads every segment into one GroupedTable, compounds in manifest order (same layout as parse_data_file).
+        """
+
+        import pandas as pd
+        frames = [
+            pd.read_csv(os.path.join(self.directory, entry["segment"]), dtype=CSV_DTYPES)
+            for entry in self.manifest()["compounds"].values()
+        ]
+        ids = self.compounds()
+        columns = {
+            column: np.concatenate([frame[column].to_numpy(dtype=np.float64) for frame in frames]) if frames else np.empty(0)
+            for column in NUMERIC_COLUMNS
+        }
+        stops = np.cumsum([len(frame) for frame in frames], dtype=int)
+        slices = {id: slice(int(stop - len(frame)), int(stop)) for id, frame, stop in zip(ids, frames, stops)}
+        return GroupedTable(columns=columns, slices=slices)
+
+
+    def commit(self, replace: "dict[str, pd.DataFrame]", remove: Iterable[str] = ()) -> dict:
+
+        """
+        Writes segments for the replaced (or new) compounds, drops the removed ones and swaps in the new manifest.
+        Only the affected compounds' segments are written. The segments retired by the previous commit are deleted afterwards;
+        the ones this commit stops using are retired in turn, as are all segments of a store retired by compact. Returns the new manifest.
+        """
+
+        previous = self.manifest() if self.exists() else {"version": FORMAT_VERSION, "compounds": {}}
+        stale = set(previous.get("retired", ())) | self._retired_store_segments()
+        os.makedirs(self.directory, exist_ok=True)
+        remove = set(remove)
+        compounds = {id: entry for id, entry in previous["compounds"].items() if id not in remove}
+        for id, frame in replace.items():
+            compounds[id] = self._write_segment(id, frame)
+
+        used = {entry["segment"] for entry in compounds.values()}
+        retired = sorted({entry["segment"] for entry in previous["compounds"].values()} - used)
+        manifest = {"version": FORMAT_VERSION, "compounds": compounds, "retired": retired}
+        _atomic_write(self.manifest_path, json.dumps(manifest, indent=1).encode())
+        self._remove_segments(stale - used)
+        if os.path.exists(self.retired_path):
+            os.remove(self.retired_path)
+        return manifest
+
+
+    def compact(self, csv_path: str = DATA_FILE) -> int:
+
+        """
+        Rebuilds a single flat CSV of every compound (in manifest order) from the segments, atomically. Returns the rows written.
+        When csv_path is the flat data file of this store, the store is then retired (see retire), so the CSV is the data again
+        and later edits to it are read; otherwise the CSV is only a copy.
+        """
+
+        temp_path = f"{csv_path}.{os.getpid()}.tmp"
+        rows = 0
+        try:
+            with open(temp_path, "w", newline="") as file:
+                file.write(",".join(HEADER) + "\n")
+                for entry in self.manifest()["compounds"].values():
+                    with open(os.path.join(self.directory, entry["segment"]), newline="") as segment:
+                        next(segment) # Header
+                        for line in segment:
+                            file.write(line)
+                    rows += entry["rows"]
+            os.replace(temp_path, csv_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        if os.path.abspath(segment_dir(csv_path)) == os.path.abspath(self.directory):
+            self.retire()
+        return rows
+
+
+    def retire(self) -> None:
+
+        """
+        Stops the store being the data, in one atomic rename of its manifest, so readers fall back to the flat data file.
+        The segments stay until the next commit, for readers still holding the manifest.
+        """
+
+        os.replace(self.manifest_path, self.retired_path)
+
+
+    def _write_segment(self, id: str, frame: "pd.DataFrame") -> dict:
+
+        content = frame[HEADER].to_csv(index=False, lineterminator="\n").encode()
+        sha256 = hashlib.sha256(content).hexdigest()
+        name = f"{re.sub(r'[^A-Za-z0-9_-]', '_', id)}.{sha256[:16]}.csv"
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path): # Same name means same content
+            _atomic_write(path, content)
+        return {"segment": name, "sha256": sha256, "rows": len(frame)}
+
+
+    def _retired_store_segments(self) -> set[str]:
+
+        """
+        Segments named by the manifest of a store retired by compact, if there is one.
+        """
+
+        try:
+            with open(self.retired_path) as file:
+                retired = json.load(file)
+        except FileNotFoundError:
+            return set()
+        return {entry["segment"] for entry in retired["compounds"].values()} | set(retired.get("retired", ()))
+
+
+    def _remove_segments(self, names: set[str]) -> None:
+
+        """
+        Deletes the named segments; names that are not segment files (or already gone) are left alone.
+        """
+
+        for name in names:
+            if SEGMENT_PATTERN.fullmatch(name):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+
+"""
+Splits a flat data file into a new segment store, one segment per compound (in order of first appearance). Returns the store
+"""
+def create_segment_store(csv_path: str = DATA_FILE, directory: str | None = None) -> SegmentStore:
+
+    import pandas as pd
+    store = SegmentStore(directory or segment_dir(csv_path))
+    table = pd.read_csv(csv_path, dtype=CSV_DTYPES)
+    frames = {str(id): frame for id, frame in table.groupby("Compound", sort=False)}
+    store.commit(frames, remove=store.compounds() if store.exists() else ())
+    return store
+
+
+def _atomic_write(path: str, content: bytes) -> None:
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
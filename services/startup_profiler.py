@@ -0,0 +1,98 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Startup Profiler File
+# ###################
+
+from dataclasses import dataclass
+import json
+from pathlib import Path
+import re
+import subprocess
+import sys
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+PROJECT_PACKAGES = ("app", "config", "domain", "services")
+TOP_PACKAGES = 12 # Third party packages listed in the report
+
+# Runs in a fresh interpreter so nothing is already imported or loaded
+_PROFILE_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import app
+import_time = time.perf_counter() - start
+from services.warmup import run_warmup, warmup_steps
+timings = run_warmup(warmup_steps(app.WARMUP_REACTANT_SETS))
+print(json.dumps({"import": import_time, "warmup": timings}))
+"""
+_IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+"""
+Parses the stderr of python -X importtime
+"""
+def parse_import_times(stderr: str) -> list[ImportRecord]:
+
+    records = []
+    for line in stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return records
+
+
+"""
+Total self import time (s) of every module in each top-level package
+"""
+def package_totals(records: list[ImportRecord]) -> dict[str, float]:
+
+    totals: dict[str, float] = {}
+    for record in records:
+        package = record.module.split(".")[0]
+        totals[package] = totals.get(package, 0.0) + record.self_us / 1e6
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+"""
+Starts the app's imports and warm-up in a fresh interpreter and reports where the time went:
+the time to import app (before the server can bind), import time per package and per project module, and each background warm-up step
+"""
+def profile_startup() -> str:
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROFILE_SCRIPT],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup profile run failed:\n{result.stderr[-2000:]}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    records = parse_import_times(result.stderr)
+
+    lines = [
+        "Startup profile (fresh interpreter)",
+        f"  import app (before the server binds) {timings['import'] * 1e3:10.1f} ms",
+        "",
+        "Import time by package (self time, import app and warm-up)",
+    ]
+    totals = package_totals(records)
+    third_party = [(p, t) for p, t in totals.items() if p not in PROJECT_PACKAGES][:TOP_PACKAGES]
+    lines += [f"  {package:<36} {seconds * 1e3:10.1f} ms" for package, seconds in third_party]
+    lines += ["", "Project modules (cumulative, including what they import first)"]
+    project = [r for r in records if r.module.split(".")[0] in PROJECT_PACKAGES]
+    lines += [f"  {r.module:<36} {r.cumulative_us / 1e3:10.1f} ms" for r in sorted(project, key=lambda r: -r.cumulative_us)]
+    lines += ["", "Background warm-up (after the server binds)"]
+    lines += [f"  {label:<36} {seconds * 1e3:10.1f} ms" for label, seconds in timings["warmup"].items()]
+    return "\n".join(lines)
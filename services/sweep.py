@@ -0,0 +1,161 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Parametric Sweep File
+# ###################
+
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import product
+import os
+import numpy as np
+from numpy.typing import NDArray
+import pandas as pd
+from domain.compound import STANDARD_REF_TEMP
+from domain.compounds import compounds
+from domain.reaction import Reaction, DEFAULT_SOLVER
+
+DEFAULT_CHUNK_SIZE = 32
+MAX_PENDING_PER_WORKER = 2 # Chunks queued per worker ahead of the consumer of iter_sweep
+
+
+"""
+Runs in each worker process once, before any sweep chunks; makes sure the compound data the sweep needs is loaded up front
+"""
+def _init_worker(reactants: list[str]) -> None:
+
+    for reactant in reactants:
+        compounds[reactant]
+
+
+"""
+Solves one chunk of sweep points in a worker process. Returns the chunk index with a (points x resolution) array of flame temperatures
+"""
+def _solve_chunk(
+    chunk_index: int,
+    reactants: list[str],
+    variable: str,
+    points: list[tuple[dict[str, float], dict[str, float]]],
+    resolution: int,
+    solver: str,
+) -> tuple[int, NDArray[np.float64], NDArray[np.float64]]:
+
+    x_values = np.empty(0)
+    flame_temps = []
+    for ratios, temperatures in points:
+        reaction = Reaction(set(reactants), temperatures)
+        x_values, temps = reaction.calc_flame_table(variable, ratios, resolution, solver)
+        flame_temps.append(temps)
+    return chunk_index, x_values, np.array(flame_temps)
+
+
+"""
+Splits a list into consecutive chunks of at most chunk_size items
+"""
+def _chunk(items: list, chunk_size: int) -> Iterator[list]:
+
+    for start in range(0, len(items), chunk_size):
+        yield items[start:start + chunk_size]
+
+
+"""
+Computes flame tables over every combination of reactant ratios and entry temperatures, sharded across worker processes.
+Returns a DataFrame indexed by the sweep parameters and the controlled reactant's concentration
+"""
+def run_sweep(
+    reactants: list[str],
+    variable: str,
+    ratio_grid: dict[str, list[float]],
+    temperature_grid: dict[str, list[float]],
+    resolution: int = 100,
+    solver: str = DEFAULT_SOLVER,
+    max_workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Callable[[int, int], None] | None = None,
+) -> pd.DataFrame:
+
+    """
+    @param reactants : list[str] - Compound.id of every reactant, inert reactants included
+    @param variable : str - Compound.id of the controlled reactant; its concentration is swept by every flame table
+    @param ratio_grid : dict[str, list[float]] - Ratio values to sweep for each other reactant (e.g. diluent ratio). Reactants left out are held at 1
+    @param temperature_grid : dict[str, list[float]] - Entry temperatures (K) to sweep for each reactant (e.g. preheats). Reactants left out enter at 298.15 K
+    @param resolution : int - Number of controlled reactant concentrations per flame table
+    @param solver : str - Reaction solver mode
+    @param max_workers : int | None - Number of worker processes (default is the number of CPUs)
+    @param chunk_size : int - Number of sweep points solved per task; progress is reported after each chunk
+    @param progress : Callable[[int, int], None] | None - Called with (points done, total points) as chunks finish
+    """
+
+    chunks = list(iter_sweep(reactants, variable, ratio_grid, temperature_grid, resolution, solver, max_workers, chunk_size, progress))
+    columns = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+    flame_temps = columns.pop("flame_temperature")
+    index = pd.MultiIndex.from_arrays(list(columns.values()), names=list(columns))
+    return pd.DataFrame({"flame_temperature": flame_temps}, index=index)
+
+
+"""
+Streams the rows of run_sweep (same arguments) as they are solved, one dict of columns per chunk of sweep points:
+a column per sweep parameter, the controlled reactant's concentration and the flame temperature.
+Chunks come in sweep order; at most MAX_PENDING_PER_WORKER chunks per worker are solved ahead of the consumer, so memory stays bounded
+"""
+def iter_sweep(
+    reactants: list[str],
+    variable: str,
+    ratio_grid: dict[str, list[float]],
+    temperature_grid: dict[str, list[float]],
+    resolution: int = 100,
+    solver: str = DEFAULT_SOLVER,
+    max_workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Callable[[int, int], None] | None = None,
+) -> Iterator[dict[str, NDArray]]:
+
+    unknown = (set(ratio_grid) | set(temperature_grid)) - set(reactants)
+    if unknown:
+        raise ValueError(f"Sweep parameters given for compounds that are not reactants: {unknown}")
+    if variable in ratio_grid:
+        raise ValueError("The controlled reactant's concentration is set by the flame table; it cannot have a ratio grid.")
+
+    ratio_axes = {r: list(ratio_grid.get(r, [1])) for r in reactants if r != variable}
+    temperature_axes = {r: list(temperature_grid.get(r, [STANDARD_REF_TEMP])) for r in reactants}
+    empty = [f"ratio of {r}" for r, values in ratio_axes.items() if not values]
+    empty += [f"temperature of {r}" for r, values in temperature_axes.items() if not values]
+    if empty:
+        raise ValueError(f"Every sweep grid needs at least one value; none given for the {', '.join(empty)}.")
+    points = []
+    for combo in product(*ratio_axes.values(), *temperature_axes.values()):
+        ratios = {variable: 1.0, **dict(zip(ratio_axes, combo[:len(ratio_axes)]))}
+        temperatures = dict(zip(temperature_axes, combo[len(ratio_axes):]))
+        points.append((ratios, temperatures))
+
+    # Each parameter column keeps the type of its whole axis in every chunk (a ratio grid of [0, 3.76] is float even where the value is 0)
+    ratio_dtypes = {r: np.asarray(values).dtype for r, values in ratio_axes.items()}
+    temperature_dtypes = {r: np.asarray(values).dtype for r, values in temperature_axes.items()}
+    chunks = list(_chunk(points, chunk_size))
+    done = 0
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(reactants,)) as executor:
+        max_pending = MAX_PENDING_PER_WORKER * (max_workers or os.cpu_count() or 1)
+        pending: deque[Future] = deque()
+        submitted = 0
+        try:
+            while submitted < len(chunks) or pending:
+                while submitted < len(chunks) and len(pending) < max_pending:
+                    pending.append(executor.submit(_solve_chunk, submitted, reactants, variable, chunks[submitted], resolution, solver))
+                    submitted += 1
+                chunk_index, x_values, flame_temps = pending.popleft().result()
+                chunk = chunks[chunk_index]
+                done += len(chunk)
+                if progress is not None:
+                    progress(done, len(points))
+
+                columns = {f"{r}_ratio": np.repeat(np.array([p[0][r] for p in chunk], ratio_dtypes[r]), len(x_values)) for r in ratio_axes}
+                columns.update({f"{r}_temperature": np.repeat(np.array([p[1][r] for p in chunk], temperature_dtypes[r]), len(x_values)) for r in temperature_axes})
+                columns[f"{variable}_fraction"] = np.tile(x_values, len(chunk))
+                columns["flame_temperature"] = flame_temps.ravel()
+                yield columns
+        finally: # The consumer stopped early (or a chunk failed); don't solve what is still queued
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,109 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Background Warm-up File
+# ###################
+
+from collections.abc import Callable, Iterable
+import logging
+import socket
+from threading import Thread
+import time
+
+SERVER_WAIT_TIMEOUT = 60.0 # Seconds to wait for the server to accept connections before warming up anyway
+SERVER_POLL_INTERVAL = 0.05
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Imports the modules the first reaction request needs (numpy, scipy, plotly and the solvers)
+"""
+def import_solver_modules() -> None:
+
+    import plotly.graph_objs
+    import domain.reaction
+    import services.result_cache
+
+
+"""
+Loads every registered compound's data
+"""
+def load_compounds() -> None:
+
+    from domain.compounds import compounds
+    compounds.preload()
+
+
+"""
+Builds and caches the reaction templates (products, stoichiometry, kernel arrays) of the given reactant sets
+"""
+def build_templates(reactant_sets: Iterable[frozenset[str]]) -> None:
+
+    from domain.reaction_template import template_cache
+    for reactants in reactant_sets:
+        template_cache.get(reactants)
+
+
+"""
+Steps of the warm-up, in order, as (label, step) pairs
+"""
+def warmup_steps(reactant_sets: Iterable[frozenset[str]] = ()) -> list[tuple[str, Callable[[], None]]]:
+
+    reactant_sets = list(reactant_sets)
+    return [
+        ("import solver modules", import_solver_modules),
+        ("load compound data", load_compounds),
+        ("build reaction templates", lambda: build_templates(reactant_sets)),
+    ]
+
+
+"""
+Runs each warm-up step, returning how long each took (s). A failing step is logged and skipped; the request that needs it will raise instead
+"""
+def run_warmup(steps: list[tuple[str, Callable[[], None]]]) -> dict[str, float]:
+
+    timings = {}
+    for label, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception("Warm-up step '%s' failed", label)
+        timings[label] = time.perf_counter() - start
+    return timings
+
+
+"""
+Blocks until something accepts connections on host:port, or the timeout passes. Returns whether it did
+"""
+def wait_for_server(host: str, port: int, timeout: float = SERVER_WAIT_TIMEOUT) -> bool:
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=SERVER_POLL_INTERVAL):
+                return True
+        except OSError:
+            time.sleep(SERVER_POLL_INTERVAL)
+    return False
+
+
+"""
+Warms up on a daemon thread once the server at host:port is accepting requests, so startup is not delayed by it
+"""
+def start_background_warmup(host: str, port: int, reactant_sets: Iterable[frozenset[str]] = ()) -> Thread:
+
+    steps = warmup_steps(reactant_sets)
+
+    def warm() -> None:
+        if not wait_for_server(host, port):
+            logger.warning("Server at %s:%d did not come up within %.0fs; warming up anyway", host, port, SERVER_WAIT_TIMEOUT)
+        timings = run_warmup(steps)
+        logger.info("Warm-up done in %.2fs (%s)", sum(timings.values()), ", ".join(f"{k}: {v:.2f}s" for k, v in timings.items()))
+
+    thread = Thread(target=warm, name="warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,41 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Equilibrium Tests File
+# ###################
+
+import unittest
+import numpy as np
+from domain.reaction import Reaction
+
+
+"""
+Indices of np.nan flame temperatures between the first and last solved points of a flame table
+"""
+def interior_nans(table: np.ndarray) -> list[int]:
+
+    solved = np.flatnonzero(np.isfinite(table[1]))
+    return [i for i in range(solved[0], solved[-1]) if np.isnan(table[1, i])]
+
+
+class TestEquilibriumTables(unittest.TestCase):
+
+    def test_methane_oxygen_has_no_interior_gaps(self):
+
+        reaction = Reaction({"Methane", "Oxygen"}, {"Methane": 298.15, "Oxygen": 298.15}, dissociation=True)
+        table = reaction.calc_flame_table("Methane", {"Methane": 1, "Oxygen": 2}, 400)
+        self.assertEqual(interior_nans(table), [])
+
+
+    def test_nitrogen_controlled_has_no_interior_gaps(self):
+
+        temperatures = {"Methane": 298.15, "Oxygen": 298.15, "Nitrogen": 298.15}
+        reaction = Reaction(set(temperatures), temperatures, dissociation=True)
+        table = reaction.calc_flame_table("Nitrogen", {"Methane": 1, "Oxygen": 2, "Nitrogen": 1}, 400)
+        self.assertEqual(interior_nans(table), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Reaction Tests File
+# ###################
+
+import unittest
+import numpy as np
+from domain.reaction import Reaction
+
+TEMPERATURES = {"Methane": 298.15, "Oxygen": 298.15, "Nitrogen": 298.15}
+
+
+"""
+Counts the points a Reaction solves, by wrapping its calc_flame_temps
+"""
+def count_solves(reaction: Reaction) -> list[int]:
+
+    count = [0]
+    calc_flame_temps = reaction.calc_flame_temps
+    def counted(concentrations, *args, **kwargs):
+        count[0] += len(concentrations)
+        return calc_flame_temps(concentrations, *args, **kwargs)
+    reaction.calc_flame_temps = counted
+    return count
+
+
+class TestPeakFlameTemp(unittest.TestCase):
+
+    def test_inert_controlled_peak_is_at_lowest_concentration(self):
+
+        for dissociation in (False, True):
+            with self.subTest(dissociation=dissociation):
+                reaction = Reaction(set(TEMPERATURES), TEMPERATURES, dissociation)
+                table = reaction.calc_flame_table("Nitrogen", {"Methane": 1, "Oxygen": 2}, 400)
+                solves = count_solves(reaction)
+                x_peak, peak = reaction.find_peak_flame_temp("Nitrogen", {"Methane": 1, "Oxygen": 2})
+                self.assertLess(x_peak, table[0, 0])
+                self.assertGreaterEqual(peak, np.nanmax(table[1]))
+                self.assertLessEqual(solves[0], 3)
+
+
+    def test_unsolvable_stoichiometric_point_gives_edge_of_solvable_range(self):
+
+        temperatures = {"Methane": 1200.0, "Oxygen": 298.15}
+        reaction = Reaction(set(temperatures), temperatures)
+        table = reaction.calc_flame_table("Methane", {"Oxygen": 2}, 400)
+        x_peak, peak = reaction.find_peak_flame_temp("Methane", {"Oxygen": 2})
+        self.assertTrue(np.isfinite(peak))
+        self.assertGreaterEqual(peak, np.nanmax(table[1]))
+
+
+class TestAdaptiveFlameTable(unittest.TestCase):
+
+    def test_intervals_at_minimum_spacing_are_not_split(self):
+
+        reaction = Reaction({"Methane", "Oxygen"}, {"Methane": 298.15, "Oxygen": 298.15})
+        for resolution in (5, 9, 33):
+            with self.subTest(resolution=resolution):
+                table = reaction.calc_flame_table("Methane", {"Oxygen": 2}, resolution, tolerance=1e-9)
+                self.assertGreaterEqual(np.diff(table[0]).min(), (1.0 - 1e-9) / (resolution + 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Result Cache Tests File
+# ###################
+
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from services.result_cache import FlameTableCache
+
+TABLE = np.array([[0.25, 0.5, 0.75], [1000.0, 2000.0, 1500.0]])
+
+
+class TestCacheCounts(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.cache = FlameTableCache(self.directory)
+
+
+    def tearDown(self):
+
+        shutil.rmtree(self.directory)
+
+
+    def test_get_or_compute_counts_each_lookup_once(self):
+
+        self.cache.get_or_compute("0" * 64, lambda: TABLE)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+        self.cache.get_or_compute("0" * 64, lambda: TABLE)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+
+    def test_stream_counts_each_lookup_once(self):
+
+        list(self.cache.stream("1" * 64, lambda: iter([TABLE[:, :2], TABLE[:, 2:]])))
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+        list(self.cache.stream("1" * 64, lambda: iter([])))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
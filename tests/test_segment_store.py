@@ -0,0 +1,63 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Segment Store Tests File
+# ###################
+
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from services.comp_loader import CSV_DTYPES, DATA_FILE, data_source_path, parse_data_source
+from services.segment_store import create_segment_store
+
+
+class TestCompaction(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.directory, "thermochemical_data.csv")
+        shutil.copy(DATA_FILE, self.csv_path)
+        self.store = create_segment_store(self.csv_path)
+
+
+    def tearDown(self):
+
+        shutil.rmtree(self.directory)
+
+
+    def edit_csv(self, id: str, column: str, value: float) -> None:
+
+        table = pd.read_csv(self.csv_path, dtype=CSV_DTYPES)
+        table.loc[(table["Compound"] == id).idxmax(), column] = value
+        table.to_csv(self.csv_path, index=False)
+
+
+    def test_csv_edit_after_compaction_is_read(self):
+
+        retired_segments = {entry["segment"] for entry in self.store.manifest()["compounds"].values()}
+        self.store.compact(self.csv_path)
+        self.edit_csv("Methane", "Cf", 123.0)
+
+        self.assertEqual(data_source_path(self.csv_path), self.csv_path)
+        table = parse_data_source(self.csv_path)
+        self.assertEqual(table.compound_data("Methane").Cf_list[0], 123.0)
+
+        store = create_segment_store(self.csv_path) # The next merge splits the edited file again
+        self.assertEqual(store.load("Methane").Cf_list[0], 123.0)
+        current = {entry["segment"] for entry in store.manifest()["compounds"].values()}
+        self.assertEqual(set(os.listdir(store.directory)) & (retired_segments - current), set())
+
+
+    def test_compacting_elsewhere_keeps_the_store(self):
+
+        self.store.compact(os.path.join(self.directory, "copy.csv"))
+        self.assertTrue(self.store.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+# ###################
+# Ian Janes
+# Professor Don Lipkin
+# MSEN 210 200
+# Adiabatic Flame Temperature
+# Parametric Sweep Tests File
+# ###################
+
+import unittest
+from services.sweep import run_sweep
+
+REACTANTS = ["Methane", "Oxygen", "Nitrogen"]
+
+
+class TestSweepGrids(unittest.TestCase):
+
+    def test_empty_ratio_grid_is_rejected(self):
+
+        with self.assertRaisesRegex(ValueError, "ratio of Nitrogen"):
+            run_sweep(REACTANTS, "Methane", {"Oxygen": [2], "Nitrogen": []}, {})
+
+
+    def test_empty_temperature_grid_is_rejected(self):
+
+        with self.assertRaisesRegex(ValueError, "temperature of Oxygen"):
+            run_sweep(REACTANTS, "Methane", {}, {"Oxygen": []})
+
+
+if __name__ == "__main__":
+    unittest.main()